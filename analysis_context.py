@@ -0,0 +1,37 @@
+import threading
+from pdf_search_client import PDFSearchClient
+
+class AnalysisContext:
+    """분석 1회 동안 공유되는 컨텍스트
+    
+    매뉴얼 검색 결과를 한 번만 계산해서 매뉴얼 기반 분석, 통합 결과의 manual_search_info,
+    UI의 매뉴얼 참고 정보가 같은 검색 결과를 사용하도록 합니다.
+    """
+    def __init__(self, requirement_text, analysis_type="기본 분석", focus_areas=None):
+        self.requirement_text = requirement_text
+        self.analysis_type = analysis_type
+        self.focus_areas = focus_areas
+        self._lock = threading.Lock()
+        self._search_done = False
+        self._search_result = None
+        self.analysis_result = None
+        # 기본/매뉴얼 분석 통합 시 중복 질문·이슈 병합 통계 (통합하지 않았으면 None)
+        self.merge_stats = None
+    
+    def get_search_result(self, pdf_client):
+        # 매뉴얼 검색 결과를 반환하는 함수 (최초 1회만 검색)
+        with self._lock:
+            if not self._search_done:
+                self._search_result = pdf_client.search_manual_content(self.requirement_text)
+                self._search_done = True
+            return self._search_result
+    
+    @property
+    def search_result(self):
+        # 이미 수행된 검색 결과 (검색 전이면 None)
+        return self._search_result
+    
+    @property
+    def manual_context(self):
+        # UI 표시용 매뉴얼 컨텍스트 정보
+        return PDFSearchClient.build_system_context(self._search_result)
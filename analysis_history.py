@@ -0,0 +1,137 @@
+import hashlib
+import json
+import time
+import zlib
+from collections import OrderedDict
+from analysis_schema import parse_analysis_json
+
+def _compress(text):
+    return zlib.compress(text.encode("utf-8"), 6) if text else None
+
+def _decompress(blob):
+    return zlib.decompress(blob).decode("utf-8") if blob else None
+
+class HistoryEntry:
+    """히스토리에 저장된 분석 1건
+
+    분석 결과와 체크리스트는 zlib으로 압축한 원문 하나만 보관하고, 파싱 결과(result_data)는
+    필요할 때 만들어 현재 보고 있는 항목에 대해서만 유지합니다.
+    """
+    def __init__(self, entry_id, requirement_text, analysis_type, focus_areas, analysis_result, manual_context, usage=None,
+                 routes=None):
+        self.entry_id = entry_id
+        self.requirement_text = requirement_text
+        self.analysis_type = analysis_type
+        self.focus_areas = list(focus_areas or [])
+        self.manual_context = manual_context
+        self.usage = usage
+        self.routes = routes
+        self.created_at = time.time()
+        self._analysis_blob = _compress(analysis_result)
+        self._checklist_blob = None
+        self._result_data = None
+
+    @property
+    def analysis_result(self):
+        return _decompress(self._analysis_blob)
+
+    @property
+    def result_data(self):
+        # 파싱한 분석 결과 (파싱할 수 없으면 원문을 raw_text로)
+        if self._result_data is None:
+            analysis_result = self.analysis_result
+            self._result_data = parse_analysis_json(analysis_result) or {"raw_text": analysis_result}
+        return self._result_data
+
+    @property
+    def checklist(self):
+        return _decompress(self._checklist_blob)
+
+    @checklist.setter
+    def checklist(self, checklist):
+        self._checklist_blob = _compress(checklist)
+
+    @property
+    def size_bytes(self):
+        # 보관 중인 데이터의 대략적인 크기 (파생 데이터 제외)
+        manual_context = json.dumps(self.manual_context, ensure_ascii=False) if self.manual_context else ""
+        return (len(self._analysis_blob or b"") + len(self._checklist_blob or b"")
+                + len(self.requirement_text.encode("utf-8")) + len(manual_context.encode("utf-8")))
+
+    def release_derived(self):
+        # 파생 데이터를 버려 압축된 원문만 남김
+        self._result_data = None
+
+class AnalysisHistory:
+    """세션별 분석 히스토리 (최근 사용 순, 개수/용량 제한)
+
+    제한을 넘으면 가장 오래 사용하지 않은 항목부터 제거하며, 가장 최근 항목은 항상 유지합니다.
+    """
+    def __init__(self, max_entries=20, max_bytes=2 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._active_id = None
+
+    @staticmethod
+    def entry_id(requirement_text, analysis_type, focus_areas, analysis_result):
+        # 같은 요구사항/옵션/결과는 같은 ID를 갖도록 내용으로 만드는 함수
+        payload = json.dumps([requirement_text, analysis_type, sorted(focus_areas or []), analysis_result], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+    def add(self, requirement_text, analysis_type, focus_areas, analysis_result, manual_context=None, usage=None,
+            result_data=None, routes=None):
+        # 분석 결과를 히스토리에 추가하고 ID를 반환하는 함수 (이미 있으면 최근 항목으로 이동)
+        # result_data를 넘기면 이미 파싱한 결과를 그대로 사용
+        entry_id = self.entry_id(requirement_text, analysis_type, focus_areas, analysis_result)
+        if entry_id in self._entries:
+            self._entries.move_to_end(entry_id)
+        else:
+            self._entries[entry_id] = HistoryEntry(
+                entry_id, requirement_text, analysis_type, focus_areas, analysis_result, manual_context, usage, routes
+            )
+            self._evict()
+        if result_data is not None:
+            self.get(entry_id)._result_data = result_data
+        return entry_id
+
+    def get(self, entry_id):
+        # 항목을 반환하고 최근 사용으로 표시하는 함수 (다른 항목의 파생 데이터는 버림)
+        entry = self._entries.get(entry_id)
+        if entry is None:
+            return None
+        self._entries.move_to_end(entry_id)
+        if self._active_id != entry_id:
+            previous = self._entries.get(self._active_id)
+            if previous is not None:
+                previous.release_derived()
+            self._active_id = entry_id
+        return entry
+
+    def set_checklist(self, entry_id, checklist):
+        # 항목에 체크리스트를 저장하는 함수 (용량 제한 다시 적용)
+        entry = self._entries.get(entry_id)
+        if entry is not None:
+            entry.checklist = checklist
+            self._evict()
+
+    def entries(self):
+        # 최근 분석 순 항목 목록 (UI 선택 목록용, 사용 순서를 바꾸지 않음)
+        return sorted(self._entries.values(), key=lambda entry: entry.created_at, reverse=True)
+
+    @property
+    def size_bytes(self):
+        return sum(entry.size_bytes for entry in self._entries.values())
+
+    def _evict(self):
+        """개수/용량 제한을 넘으면 오래된 항목부터 제거 (최근 항목 1개는 유지)"""
+        size = self.size_bytes
+        while len(self._entries) > 1 and (len(self._entries) > self.max_entries or size > self.max_bytes):
+            _, entry = self._entries.popitem(last=False)
+            size -= entry.size_bytes
+
+    def __contains__(self, entry_id):
+        return entry_id in self._entries
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,76 @@
+from config import Config
+from text_utils import cosine_similarity, term_vector
+
+# 우선순위 비교용 순위 (작을수록 높음)
+PRIORITY_RANK = {"높음": 0, "보통": 1, "낮음": 2}
+
+def _cluster(texts, sources, threshold):
+    """출처가 다른 항목끼리만, 묶음의 모든 항목과 유사도가 threshold 이상일 때 묶어 [[인덱스, ...], ...] 반환
+
+    같은 출처(기본 분석/매뉴얼 분석) 안의 항목은 모델이 일부러 나눠 쓴 질문이므로 합치지 않고,
+    조건을 만족하는 묶음이 여러 개면 가장 낮은 유사도가 가장 높은 묶음에 넣습니다.
+    """
+    clusters = []
+    vectors = [term_vector(text) for text in texts]
+    for index, vector in enumerate(vectors):
+        best, best_score = None, threshold
+        for cluster in clusters:
+            if any(sources[member] == sources[index] for member in cluster):
+                continue
+            score = min(cosine_similarity(vector, vectors[member]) for member in cluster)
+            # 유사도가 같으면 먼저 만들어진 묶음 우선
+            if score > best_score or (best is None and score >= threshold):
+                best, best_score = cluster, score
+        if best is None:
+            clusters.append([index])
+        else:
+            best.append(index)
+    return clusters
+
+def _join_unique(values, separator=" / "):
+    seen = []
+    for value in values:
+        value = (value or "").strip()
+        if value and value not in seen:
+            seen.append(value)
+    return separator.join(seen)
+
+def _tagged(groups, accept):
+    """출처별 항목 목록을 (항목 목록, 출처 목록)으로 펼침"""
+    items, sources = [], []
+    for source, group in enumerate(groups):
+        for item in group or []:
+            if accept(item):
+                items.append(item)
+                sources.append(source)
+    return items, sources
+
+def merge_clarifications(*groups, threshold=None):
+    # 출처(기본/매뉴얼 분석)가 다른 비슷한 확인 질문을 하나로 합치는 함수
+    # 먼저 나온 질문과 그 이유를 유지하고, 우선순위는 가장 높은 값, 매뉴얼 참조는 합침
+    threshold = Config.MERGE_SIMILARITY_THRESHOLD if threshold is None else threshold
+    items, sources = _tagged(groups, lambda item: isinstance(item, dict))
+
+    merged = []
+    for cluster in _cluster([item.get("question", "") for item in items], sources, threshold):
+        group = [items[index] for index in cluster]
+        item = dict(group[0])
+        if len(group) > 1:
+            item["priority"] = min(
+                (member.get("priority", "보통") for member in group),
+                key=lambda priority: PRIORITY_RANK.get(priority, 1)
+            )
+            manual_reference = _join_unique(member.get("manual_reference") for member in group)
+            if manual_reference:
+                item["manual_reference"] = manual_reference
+        merged.append(item)
+    return merged
+
+def merge_issues(*groups, threshold=None):
+    # 출처가 다른 비슷한 잠재적 이슈 문장을 하나로 합치는 함수 (더 자세한 문장 유지)
+    threshold = Config.MERGE_SIMILARITY_THRESHOLD if threshold is None else threshold
+    items, sources = _tagged(groups, lambda item: isinstance(item, str) and item.strip())
+    return [
+        max((items[index] for index in cluster), key=len)
+        for cluster in _cluster(items, sources, threshold)
+    ]
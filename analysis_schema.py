@@ -0,0 +1,226 @@
+import json
+import re
+from config import Config
+
+# 확인사항 우선순위 값
+PRIORITIES = ("높음", "보통", "낮음")
+
+# 분석 결과 스키마 (json_schema 구조화 출력 모드에서 그대로 API에 전달)
+ANALYSIS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "analysis_summary": {"type": "string"},
+        "manual_references": {"type": "array", "items": {"type": "string"}},
+        "clarification_needed": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "category": {"type": "string"},
+                    "question": {"type": "string"},
+                    "reason": {"type": "string"},
+                    "priority": {"type": "string", "enum": list(PRIORITIES)},
+                    "manual_reference": {"type": "string"}
+                },
+                "required": ["category", "question", "reason", "priority", "manual_reference"],
+                "additionalProperties": False
+            }
+        },
+        "potential_issues": {"type": "array", "items": {"type": "string"}},
+        "business_impact": {"type": "string"}
+    },
+    "required": ["analysis_summary", "manual_references", "clarification_needed", "potential_issues", "business_impact"],
+    "additionalProperties": False
+}
+
+TEXT_FIELDS = ("analysis_summary", "business_impact")
+LIST_FIELDS = ("manual_references", "potential_issues")
+CLARIFICATION_TEXT_FIELDS = ("category", "question", "reason")
+
+def analysis_response_format(mode=None):
+    """설정된 구조화 출력 모드에 맞는 response_format (off면 None)"""
+    mode = (mode or Config.STRUCTURED_OUTPUT_MODE).lower()
+    if mode == "json_object":
+        return {"type": "json_object"}
+    if mode == "json_schema":
+        return {
+            "type": "json_schema",
+            "json_schema": {"name": "requirement_analysis", "schema": ANALYSIS_SCHEMA, "strict": True}
+        }
+    return None
+
+def _strip_code_fence(text):
+    """```json ... ``` 로 감싼 응답에서 본문만 추출"""
+    match = re.search(r"```(?:json)?\s*(.*?)(?:```|$)", text, re.S | re.I)
+    if match and text.lstrip().startswith("```"):
+        return match.group(1)
+    return text
+
+def _string_start(text):
+    """text 끝의 닫힌 문자열이 시작하는 위치"""
+    index = len(text) - 2
+    while index >= 0:
+        if text[index] == '"':
+            backslashes = 0
+            while index - backslashes - 1 >= 0 and text[index - backslashes - 1] == "\\":
+                backslashes += 1
+            if backslashes % 2 == 0:
+                return index
+        index -= 1
+    return 0
+
+def _trim_dangling(text, in_object):
+    """잘린 JSON 끝에 남은 불완전한 토큰(쉼표, 값 없는 키, 잘린 리터럴) 제거"""
+    while True:
+        text = text.rstrip()
+        if text.endswith(","):
+            text = text[:-1]
+            continue
+
+        literal = re.search(r"[-+.\w]+$", text)
+        if literal and not text.endswith('"'):
+            token = literal.group(0)
+            try:
+                json.loads(token)
+            except ValueError:
+                text = text[:literal.start()]
+                continue
+
+        if text.endswith(":"):
+            text = text[:-1].rstrip()
+            text = text[:_string_start(text)]
+            continue
+
+        if in_object and text.endswith('"'):
+            before = text[:_string_start(text)].rstrip()
+            if before.endswith("{") or before.endswith(","):
+                # 값 없이 잘린 키
+                text = before
+                continue
+        return text
+
+def repair_json(text):
+    """코드 펜스/앞뒤 설명문/잘린 배열·객체/후행 쉼표를 보정한 JSON 문자열 (JSON 객체가 없으면 None)"""
+    if not text:
+        return None
+
+    text = _strip_code_fence(text)
+    start = text.find("{")
+    if start < 0:
+        return None
+
+    out = []
+    stack = []
+    in_string = False
+    escape = False
+    for ch in text[start:]:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append("}" if ch == "{" else "]")
+        elif ch in "}]":
+            # 후행 쉼표 제거
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+            if stack and stack[-1] == ch:
+                stack.pop()
+            out.append(ch)
+            if not stack:
+                # 최상위 객체가 닫히면 뒤에 붙은 설명문은 버림
+                break
+            continue
+        out.append(ch)
+
+    repaired = "".join(out)
+    if in_string:
+        if escape:
+            repaired = repaired[:-1]
+        repaired += '"'
+
+    if stack:
+        repaired = _trim_dangling(repaired, in_object=stack[-1] == "}")
+        repaired += "".join(reversed(stack))
+    return repaired
+
+def _as_text(value):
+    if value is None:
+        return ""
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, (dict, list)):
+        return json.dumps(value, ensure_ascii=False)
+    return str(value)
+
+def _as_list(value):
+    if value is None:
+        return []
+    return value if isinstance(value, list) else [value]
+
+def normalize_priority(value):
+    """우선순위 표기를 높음/보통/낮음 중 하나로 정규화"""
+    text = _as_text(value).lower()
+    if "높" in text or "high" in text:
+        return "높음"
+    if "낮" in text or "low" in text:
+        return "낮음"
+    return "보통"
+
+def normalize_analysis(data):
+    """분석 결과를 스키마에 맞게 검증/보정 (분석 결과로 볼 수 없으면 None)"""
+    if not isinstance(data, dict) or not any(field in data for field in ANALYSIS_SCHEMA["properties"]):
+        return None
+
+    result = dict(data)
+    for field in TEXT_FIELDS:
+        result[field] = _as_text(data.get(field))
+    for field in LIST_FIELDS:
+        result[field] = [text for text in map(_as_text, _as_list(data.get(field))) if text]
+
+    clarifications = []
+    for item in _as_list(data.get("clarification_needed")):
+        if isinstance(item, str):
+            item = {"question": item}
+        if not isinstance(item, dict) or not _as_text(item.get("question")):
+            continue
+        clarification = {field: _as_text(item.get(field)) for field in CLARIFICATION_TEXT_FIELDS}
+        clarification["priority"] = normalize_priority(item.get("priority"))
+        if _as_text(item.get("manual_reference")):
+            clarification["manual_reference"] = _as_text(item.get("manual_reference"))
+        clarifications.append(clarification)
+    result["clarification_needed"] = clarifications
+    return result
+
+def is_valid_analysis(text):
+    # 분석 응답을 (보정 후) 분석 결과로 해석할 수 있는지 여부 (LLM 캐시 저장 조건)
+    return parse_analysis_json(text) is not None
+
+def parse_analysis_json(text):
+    """LLM 분석 응답을 dict로 파싱 (필요하면 보정 후 스키마 검증, 실패 시 None)"""
+    if isinstance(text, dict):
+        return normalize_analysis(text)
+    if not text:
+        return None
+
+    try:
+        data = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        repaired = repair_json(text)
+        if repaired is None:
+            return None
+        try:
+            data = json.loads(repaired)
+        except json.JSONDecodeError:
+            return None
+    return normalize_analysis(data)
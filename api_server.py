@@ -0,0 +1,260 @@
+import asyncio
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from aiohttp import web
+from config import Config
+from client_pool import get_openai_client
+from analysis_context import AnalysisContext
+from analysis_schema import parse_analysis_json
+from text_utils import collapse_whitespace
+from usage_tracker import UsageMeter, usage_scope
+from model_router import RouteReport, get_model_router, route_scope
+
+def request_key(endpoint, requirement, *params):
+    """SingleFlight 키 (공백만 정리한 요구사항의 sha256과 나머지 요청 값)
+
+    숫자나 문장부호만 다른 요구사항("1.5초"/"15초", "C++"/"C")은 서로 다른 요청이므로
+    비교용 정규화(normalize_text)는 쓰지 않습니다.
+    """
+    digest = hashlib.sha256(collapse_whitespace(requirement).encode("utf-8")).hexdigest()
+    return (endpoint, digest) + params
+
+class SingleFlight:
+    """동일한 키의 요청이 동시에 들어오면 한 번만 실행하고 결과를 공유"""
+    def __init__(self):
+        self._in_flight = {}
+    
+    async def run(self, key, coroutine_factory):
+        # (결과, 공유 여부)를 반환하는 함수
+        task = self._in_flight.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+        
+        task = asyncio.ensure_future(coroutine_factory())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        return await asyncio.shield(task), False
+    
+    @property
+    def in_flight(self):
+        return len(self._in_flight)
+
+class ServiceMetrics:
+    """엔드포인트별 요청 수, 공유(coalesced) 수, 오류 수, 지연시간과 대기열 깊이 집계"""
+    def __init__(self, window=1000):
+        self.requests = defaultdict(int)
+        self.coalesced = defaultdict(int)
+        self.errors = defaultdict(int)
+        self.latencies = defaultdict(lambda: deque(maxlen=window))
+        self.queued = 0
+        self.running = 0
+        # 대기열/실행 중 개수는 워커 스레드와 이벤트 루프에서 함께 바뀜
+        self._lock = threading.Lock()
+    
+    def job_queued(self):
+        with self._lock:
+            self.queued += 1
+    
+    def job_dequeued(self):
+        # 실행되지 않고 취소된 작업
+        with self._lock:
+            self.queued -= 1
+    
+    def job_started(self):
+        with self._lock:
+            self.queued -= 1
+            self.running += 1
+    
+    def job_finished(self):
+        with self._lock:
+            self.running -= 1
+    
+    def observe(self, endpoint, latency, coalesced=False, error=False):
+        self.requests[endpoint] += 1
+        self.latencies[endpoint].append(latency)
+        if coalesced:
+            self.coalesced[endpoint] += 1
+        if error:
+            self.errors[endpoint] += 1
+    
+    @staticmethod
+    def _percentile(values, percentile):
+        if not values:
+            return None
+        ordered = sorted(values)
+        index = min(len(ordered) - 1, int(round(percentile / 100 * (len(ordered) - 1))))
+        return ordered[index]
+    
+    def snapshot(self, in_flight):
+        endpoints = {}
+        for endpoint, latencies in self.latencies.items():
+            endpoints[endpoint] = {
+                "requests": self.requests[endpoint],
+                "coalesced": self.coalesced[endpoint],
+                "errors": self.errors[endpoint],
+                "latency_p50_ms": round(self._percentile(latencies, 50) * 1000, 1),
+                "latency_p95_ms": round(self._percentile(latencies, 95) * 1000, 1)
+            }
+        return {
+            "queue_depth": self.queued,
+            "running": self.running,
+            "in_flight_pipelines": in_flight,
+            "endpoints": endpoints
+        }
+
+class AnalysisService:
+    """분석/매뉴얼 컨텍스트/체크리스트 HTTP API
+    
+    LLM 호출은 블로킹이므로 제한된 스레드 풀에서 실행하고, 같은 요청(공백만 다른 요구사항,
+    집중 영역, 분석 유형)이 동시에 들어오면 파이프라인을 한 번만 실행해 결과를 공유합니다.
+    """
+    def __init__(self, workers=None):
+        self.openai_client = get_openai_client()
+        self.executor = ThreadPoolExecutor(max_workers=workers or Config.API_WORKERS)
+        self.single_flight = SingleFlight()
+        self.metrics = ServiceMetrics()
+        # 서버 시작 이후 누적 토큰 사용량
+        self.usage = UsageMeter("API")
+    
+    async def _run_blocking(self, fn, *args):
+        """스레드 풀에서 실행 (대기열 깊이/실행 중 개수 집계)"""
+        def job():
+            self.metrics.job_started()
+            try:
+                with usage_scope(self.usage):
+                    return fn(*args)
+            finally:
+                self.metrics.job_finished()
+        
+        self.metrics.job_queued()
+        try:
+            future = self.executor.submit(job)
+        except RuntimeError:
+            # 종료 중인 스레드 풀
+            self.metrics.job_dequeued()
+            raise
+        # 시작 전에 취소된 작업(executor.shutdown(cancel_futures=True))은 대기열에서만 뺌
+        future.add_done_callback(lambda done: self.metrics.job_dequeued() if done.cancelled() else None)
+        return await asyncio.wrap_future(future)
+    
+    async def _handle(self, endpoint, request, handler):
+        """공통 요청 처리 (JSON 파싱, 오류 응답, 지표 기록)"""
+        started = time.monotonic()
+        coalesced = False
+        try:
+            payload = await request.json()
+            if not isinstance(payload, dict):
+                raise ValueError("요청 본문은 JSON 객체여야 합니다.")
+            requirement = (payload.get("requirement") or "").strip()
+            if len(requirement) < 5:
+                raise ValueError("requirement는 5자 이상이어야 합니다.")
+            if len(requirement) > Config.MAX_TEXT_LENGTH:
+                raise ValueError(f"requirement는 {Config.MAX_TEXT_LENGTH}자 이하여야 합니다.")
+            
+            result, coalesced = await handler(requirement, payload)
+            status = 200
+            if result is None:
+                result, status = {"error": "결과를 생성할 수 없습니다."}, 502
+        except (ValueError, json.JSONDecodeError) as e:
+            result, status = {"error": str(e)}, 400
+        except Exception as e:
+            result, status = {"error": str(e)}, 500
+        
+        self.metrics.observe(endpoint, time.monotonic() - started, coalesced=coalesced, error=status >= 400)
+        return web.json_response(result, status=status, dumps=lambda data: json.dumps(data, ensure_ascii=False))
+    
+    async def analyze(self, request):
+        async def handler(requirement, payload):
+            analysis_type = payload.get("analysis_type", "기본 분석")
+            if analysis_type not in Config.ANALYSIS_TYPES:
+                raise ValueError(f"analysis_type은 {', '.join(Config.ANALYSIS_TYPES)} 중 하나여야 합니다.")
+            focus_areas = payload.get("focus_areas") or []
+            if not isinstance(focus_areas, list) or not all(isinstance(area, str) for area in focus_areas):
+                raise ValueError("focus_areas는 문자열 목록이어야 합니다.")
+            focus_areas = sorted(focus_areas)
+            key = request_key("analyze", requirement, analysis_type, tuple(focus_areas))
+            
+            def run():
+                context = AnalysisContext(requirement, analysis_type, focus_areas)
+                usage = UsageMeter("분석", Config.ANALYSIS_TOKEN_BUDGET)
+                routes = RouteReport()
+                with usage_scope(usage), route_scope(routes):
+                    analysis_result = self.openai_client.analyze_requirements(
+                        requirement, analysis_type, focus_areas, context=context
+                    )
+                if not analysis_result:
+                    return None
+                analysis = parse_analysis_json(analysis_result) or {"raw_text": analysis_result}
+                return {"analysis": analysis, "manual_context": context.manual_context, "usage": usage.to_dict(),
+                        "models": routes.to_dict()}
+            
+            result, coalesced = await self.single_flight.run(key, lambda: self._run_blocking(run))
+            return (dict(result, coalesced=coalesced) if result else None), coalesced
+        
+        return await self._handle("analyze", request, handler)
+    
+    async def manual_context(self, request):
+        async def handler(requirement, payload):
+            key = request_key("manual_context", requirement)
+            result, coalesced = await self.single_flight.run(
+                key, lambda: self._run_blocking(self.openai_client.get_manual_context, requirement)
+            )
+            return {"manual_context": result, "coalesced": coalesced}, coalesced
+        
+        return await self._handle("manual_context", request, handler)
+    
+    async def checklist(self, request):
+        async def handler(requirement, payload):
+            analysis = payload.get("analysis")
+            if not analysis:
+                raise ValueError("analysis가 필요합니다.")
+            analysis_result = analysis if isinstance(analysis, str) else json.dumps(analysis, ensure_ascii=False)
+            key = request_key("checklist", requirement, analysis_result)
+            
+            def run():
+                usage = UsageMeter("분석", Config.ANALYSIS_TOKEN_BUDGET)
+                routes = RouteReport()
+                with usage_scope(usage), route_scope(routes):
+                    checklist = self.openai_client.generate_checklist(requirement, analysis_result)
+                return {"checklist": checklist, "usage": usage.to_dict(), "models": routes.to_dict()} if checklist else None
+            
+            result, coalesced = await self.single_flight.run(key, lambda: self._run_blocking(run))
+            return (dict(result, coalesced=coalesced) if result else None), coalesced
+        
+        return await self._handle("checklist", request, handler)
+    
+    async def metrics_endpoint(self, request):
+        return web.json_response(dict(
+            self.metrics.snapshot(self.single_flight.in_flight),
+            usage=self.usage.to_dict(),
+            routing=get_model_router().snapshot()
+        ))
+    
+    async def health(self, request):
+        return web.json_response({"status": "ok"})
+    
+    def create_app(self):
+        # aiohttp 애플리케이션 생성
+        app = web.Application()
+        app.add_routes([
+            web.post("/analyze", self.analyze),
+            web.post("/manual-context", self.manual_context),
+            web.post("/checklist", self.checklist),
+            web.get("/metrics", self.metrics_endpoint),
+            web.get("/health", self.health),
+        ])
+        app.on_cleanup.append(self._shutdown)
+        return app
+    
+    async def _shutdown(self, app):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+def main():
+    web.run_app(AnalysisService().create_app(), host=Config.API_HOST, port=Config.API_PORT)
+
+if __name__ == "__main__":
+    main()
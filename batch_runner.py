@@ -0,0 +1,216 @@
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from config import Config
+from client_pool import get_openai_client
+from analysis_context import AnalysisContext
+from analysis_schema import parse_analysis_json
+from usage_tracker import UsageMeter, usage_scope
+from model_router import RouteReport, route_scope
+
+class BatchRunner:
+    """JSONL 요구사항 파일을 일괄 분석하는 헤드리스 실행기
+    
+    입력을 한 줄씩 읽어 제한된 수의 워커로 분석하고, 결과를 완료되는 대로 JSONL로 기록합니다.
+    완료된 항목 ID는 체크포인트 파일에 남겨 중단 후 다시 실행하면 이어서 처리합니다.
+    (같은 ID가 출력에 여러 번 있으면 마지막 기록이 최신 결과입니다.)
+    입력에 같은 ID가 여러 번 있으면 체크포인트로 어느 행을 처리했는지 구분할 수 없으므로 시작하지 않습니다.
+    배치 토큰 예산을 모두 사용하면 새 항목을 시작하지 않으며, 남은 항목은 다시 실행할 때 처리됩니다.
+    """
+    def __init__(self, input_path, output_path, checkpoint_path=None, workers=4,
+                 with_checklist=False, analysis_type="기본 분석", focus_areas=None):
+        self.input_path = input_path
+        self.output_path = output_path
+        self.checkpoint_path = checkpoint_path or f"{output_path}.checkpoint"
+        self.workers = workers
+        self.with_checklist = with_checklist
+        self.analysis_type = analysis_type
+        self.focus_areas = focus_areas or []
+        self.openai_client = get_openai_client()
+        self._write_lock = threading.Lock()
+        self.completed = 0
+        self.failed = 0
+        self.skipped = 0
+        self.usage = UsageMeter("배치", Config.BATCH_TOKEN_BUDGET)
+    
+    @staticmethod
+    def _item_id(record, line_number):
+        for key in ["id", "request_id"]:
+            if record.get(key):
+                return str(record[key])
+        return f"line-{line_number}"
+    
+    @staticmethod
+    def _requirement_text(record):
+        """레코드에서 요구사항 텍스트 추출 (requirement/text 또는 title+body)"""
+        for key in ["requirement", "text"]:
+            if record.get(key):
+                return record[key]
+        parts = [record.get("title", ""), record.get("body", "")]
+        return "\n\n".join(part for part in parts if part)
+    
+    def _load_checkpoint(self):
+        """이미 완료된 항목 ID 목록"""
+        if not os.path.exists(self.checkpoint_path):
+            return set()
+        with open(self.checkpoint_path, encoding="utf-8") as f:
+            return {line.strip() for line in f if line.strip()}
+    
+    def _check_duplicate_ids(self):
+        """입력에 같은 ID가 여러 번 있으면 ValueError (분석을 시작하기 전에 확인)"""
+        first_lines = {}
+        duplicates = []
+        with open(self.input_path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                item_id = self._item_id(json.loads(line), line_number)
+                if item_id in first_lines:
+                    duplicates.append(f"{item_id} ({first_lines[item_id]}행, {line_number}행)")
+                else:
+                    first_lines[item_id] = line_number
+        if duplicates:
+            shown = ", ".join(duplicates[:5]) + (f" 외 {len(duplicates) - 5}건" if len(duplicates) > 5 else "")
+            raise ValueError(f"입력 파일에 같은 ID가 여러 번 있습니다: {shown}. ID를 고유하게 바꾼 뒤 다시 실행하세요.")
+    
+    def _iter_pending(self, done_ids):
+        """아직 처리하지 않은 (ID, 요구사항) 항목을 순서대로 읽음"""
+        with open(self.input_path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                item_id = self._item_id(record, line_number)
+                if item_id in done_ids:
+                    self.skipped += 1
+                    continue
+                yield item_id, self._requirement_text(record)
+    
+    def _process(self, item_id, requirement_text):
+        """항목 하나 분석 (선택 시 체크리스트까지 생성)"""
+        started = time.monotonic()
+        context = AnalysisContext(requirement_text, self.analysis_type, self.focus_areas)
+        record = {"id": item_id, "requirement": requirement_text}
+        item_usage = UsageMeter("분석", Config.ANALYSIS_TOKEN_BUDGET)
+        routes = RouteReport()
+        
+        try:
+            with usage_scope(self.usage, item_usage), route_scope(routes):
+                analysis_result = self.openai_client.analyze_requirements(
+                    requirement_text, self.analysis_type, self.focus_areas, context=context
+                )
+                if not analysis_result:
+                    raise RuntimeError("분석 결과를 생성할 수 없습니다.")
+                
+                record["analysis"] = parse_analysis_json(analysis_result) or {"raw_text": analysis_result}
+                record["manual_context"] = context.manual_context
+                
+                if self.with_checklist:
+                    record["checklist"] = self.openai_client.generate_checklist(requirement_text, analysis_result)
+        except Exception as e:
+            record["error"] = str(e)
+        
+        record["usage"] = item_usage.to_dict()
+        record["models"] = routes.to_dict()
+        record["elapsed_sec"] = round(time.monotonic() - started, 3)
+        return record
+    
+    def _write(self, record):
+        """결과 기록 후 성공한 항목만 체크포인트에 추가 (실패 항목은 재실행 시 다시 처리)"""
+        with self._write_lock:
+            self._output.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._output.flush()
+            if "error" in record:
+                self.failed += 1
+                return
+            self._checkpoint.write(record["id"] + "\n")
+            self._checkpoint.flush()
+            os.fsync(self._checkpoint.fileno())
+            self.completed += 1
+    
+    def run(self, report_every=10):
+        # 배치 분석 실행 후 처리 통계를 반환하는 함수
+        self._check_duplicate_ids()
+        done_ids = self._load_checkpoint()
+        started = time.monotonic()
+        
+        def report(final=False):
+            elapsed = time.monotonic() - started
+            processed = self.completed + self.failed
+            rate = processed / elapsed * 60 if elapsed > 0 else 0.0
+            label = "완료" if final else "진행"
+            usage = self.usage.to_dict()
+            print(f"[{label}] 성공 {self.completed}, 실패 {self.failed}, 건너뜀 {self.skipped} "
+                  f"| {elapsed:.1f}s, {rate:.1f} items/min "
+                  f"| 토큰 {usage['total_tokens']:,} (입력 {usage['prompt_tokens']:,}, 출력 {usage['completion_tokens']:,})",
+                  file=sys.stderr)
+            return rate
+        
+        with open(self.output_path, "a", encoding="utf-8") as self._output, \
+                open(self.checkpoint_path, "a", encoding="utf-8") as self._checkpoint:
+            executor = ThreadPoolExecutor(max_workers=self.workers)
+            in_flight = set()
+            try:
+                for item_id, requirement_text in self._iter_pending(done_ids):
+                    if self.usage.state() == "exceeded":
+                        print(f"배치 토큰 예산({self.usage.budget:,})을 모두 사용해 새 항목을 시작하지 않습니다. "
+                              "같은 명령으로 다시 실행하면 남은 항목부터 이어서 처리합니다.", file=sys.stderr)
+                        break
+                    # 입력 전체를 미리 제출하지 않고 워커 수의 2배까지만 대기열에 유지
+                    if len(in_flight) >= self.workers * 2:
+                        finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            self._write(future.result())
+                            if (self.completed + self.failed) % report_every == 0:
+                                report()
+                    in_flight.add(executor.submit(self._process, item_id, requirement_text))
+                
+                for future in wait(in_flight).done:
+                    self._write(future.result())
+            except KeyboardInterrupt:
+                print("중단되었습니다. 같은 명령으로 다시 실행하면 완료되지 않은 항목부터 이어서 처리합니다.", file=sys.stderr)
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown()
+        
+        rate = report(final=True)
+        return {
+            "completed": self.completed,
+            "failed": self.failed,
+            "skipped": self.skipped,
+            "items_per_minute": rate,
+            "usage": self.usage.to_dict()
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="JSONL 요구사항 일괄 분석")
+    parser.add_argument("input", help="요구사항 JSONL 파일 (requirement/text 또는 title/body 필드)")
+    parser.add_argument("output", help="결과를 추가 기록할 JSONL 파일")
+    parser.add_argument("--checkpoint", default=None, help="체크포인트 파일 경로 (기본: <output>.checkpoint)")
+    parser.add_argument("--workers", type=int, default=Config.BATCH_WORKERS)
+    parser.add_argument("--checklist", action="store_true", help="체크리스트도 함께 생성")
+    parser.add_argument("--analysis-type", default="기본 분석", choices=Config.ANALYSIS_TYPES)
+    parser.add_argument("--focus", default="", help="집중 분석 영역 (쉼표 구분)")
+    args = parser.parse_args()
+    
+    runner = BatchRunner(
+        args.input,
+        args.output,
+        checkpoint_path=args.checkpoint,
+        workers=args.workers,
+        with_checklist=args.checklist,
+        analysis_type=args.analysis_type,
+        focus_areas=[area.strip() for area in args.focus.split(",") if area.strip()]
+    )
+    try:
+        runner.run()
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        sys.exit(2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,493 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import random
+import re
+import shutil
+import socket
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from text_utils import tokenize_korean
+
+# 이 스크립트는 Azure OpenAI / Azure AI Search 대신 로컬 가짜 서버를 띄우고 실제 분석 파이프라인을 실행합니다.
+# Config는 import 시점에 환경변수를 읽으므로, config를 사용하는 모듈은 환경변수 설정 후 run_benchmark에서 import합니다.
+
+DEFAULT_CORPUS = "data/benchmark/requirements.jsonl"
+DEFAULT_CHUNKS = "data/benchmark/manual_chunks.jsonl"
+
+CATEGORIES = ["UI/UX", "권한", "데이터", "비즈니스 규칙", "연동", "예외 처리", "성능", "보안"]
+PRIORITIES = ["높음", "보통", "낮음"]
+
+def percentile(values, pct):
+    # 정렬된 값의 백분위수 (nearest-rank)
+    if not values:
+        return 0.0
+    values = sorted(values)
+    index = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[index]
+
+def _read_jsonl(path):
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+class FakeChatModel:
+    """프롬프트 종류(분석/키워드/체크리스트 항목/체크리스트)에 맞는 결정적인 응답을 만드는 가짜 모델"""
+    def respond(self, messages):
+        prompt = messages[-1].get("content", "") if messages else ""
+        rng = random.Random(hashlib.sha256(prompt.encode("utf-8")).hexdigest())
+        requirement = self._requirement(prompt)
+        terms = tokenize_korean(requirement) or ["요구사항"]
+
+        if "분석 항목:" in prompt:
+            return self._checklist_items(prompt, rng)
+        if "검색할 키워드" in prompt:
+            return " ".join(terms[:6])
+        if "JSON 형식으로 응답" in prompt:
+            return self._analysis(requirement, terms, rng, with_manual="매뉴얼" in prompt)
+        if "체크리스트" in prompt:
+            return self._checklist(terms, rng)
+        return "확인했습니다."
+
+    @staticmethod
+    def _requirement(prompt):
+        match = re.search(r"(?:사용자 요구사항|요구사항):\s*\n?\s*(.+)", prompt)
+        return match.group(1).strip() if match else prompt[:100]
+
+    @staticmethod
+    def _analysis(requirement, terms, rng, with_manual):
+        clarifications = []
+        for i in range(rng.randint(4, 7)):
+            term = terms[i % len(terms)]
+            item = {
+                "category": rng.choice(CATEGORIES),
+                "question": f"{term} 관련 {rng.choice(['적용 범위', '예외 상황', '권한 조건', '화면 위치', '처리 시점'])}는 어떻게 정의해야 하나요? ({i + 1})",
+                "reason": f"'{requirement}' 요구사항에서 {term}의 세부 조건이 명시되지 않았습니다.",
+                "priority": rng.choice(PRIORITIES)
+            }
+            if with_manual:
+                item["manual_reference"] = f"매뉴얼 {rng.randint(1, 10)}.{rng.randint(1, 4)}절"
+            clarifications.append(item)
+
+        result = {
+            "analysis_summary": f"{requirement} 구현을 위해 범위, 권한, 예외 처리 기준 확인이 필요합니다.",
+            "clarification_needed": clarifications,
+            "potential_issues": [f"{term} 변경으로 인한 기존 기능 영향" for term in terms[:rng.randint(2, 4)]],
+            "business_impact": f"{terms[0]} 관련 업무 처리 방식이 변경됩니다."
+        }
+        if with_manual:
+            result["manual_references"] = [f"매뉴얼 {rng.randint(1, 10)}장 {terms[0]} 관련 내용"]
+        return json.dumps(result, ensure_ascii=False)
+
+    @staticmethod
+    def _checklist_items(prompt, rng):
+        match = re.search(r"분석 항목: (\[.*\])", prompt)
+        items = json.loads(match.group(1)) if match else []
+        sections = ["before", "during", "after", "deploy"]
+        return json.dumps({"items": [
+            {"id": item["id"], "tasks": [
+                {"section": rng.choice(sections), "task": f"항목 {item['id'][:4]} 작업 {n + 1} 확인", "owner": rng.choice(["기획", "개발", "디자인", "전체"])}
+                for n in range(rng.randint(1, 3))
+            ]}
+            for item in items
+        ]}, ensure_ascii=False)
+
+    @staticmethod
+    def _checklist(terms, rng):
+        sections = ["📋 개발 전 확인사항", "🔧 개발 중 확인사항", "✅ 개발 후 검증사항", "🚀 배포 전 최종 점검"]
+        return "\n\n".join(
+            f"## {section}\n" + "\n".join(
+                f"- [ ] {rng.choice(terms)} 관련 작업 {n + 1} (담당자: {rng.choice(['기획', '개발', '디자인', '전체'])})"
+                for n in range(rng.randint(2, 4))
+            )
+            for section in sections
+        )
+
+class FakeServerStats:
+    """가짜 서버 호출 통계 (스레드 안전)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.values = {"llm_calls": 0, "llm_stream_calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+                       "injected_errors": 0, "search_calls": 0}
+
+    def add(self, **counts):
+        with self._lock:
+            for key, value in counts.items():
+                self.values[key] += value
+
+    def snapshot(self):
+        with self._lock:
+            return dict(self.values)
+
+def _deployment_name(path):
+    """Azure OpenAI 요청 경로(/openai/deployments/<이름>/chat/completions)의 배포 이름"""
+    parts = urlparse(path).path.strip("/").split("/")
+    return parts[parts.index("deployments") + 1] if "deployments" in parts[:-1] else None
+
+def make_chat_handler(model, stats, count_tokens, latency_ms, tokens_per_second, error_rate, seed,
+                      deployment_latency_ms=None):
+    """Azure OpenAI / OpenAI chat completions 형식으로 응답하는 요청 처리기
+
+    deployment_latency_ms에 배포 이름별 추가 지연을 지정하면 해당 배포만 느리게 응답합니다 (모델 라우팅 확인용).
+    """
+    deployment_latency_ms = deployment_latency_ms or {}
+    rng = random.Random(seed)
+    rng_lock = threading.Lock()
+
+    class ChatHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def _send_json(self, status, payload, headers=None):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length) or b"{}")
+            if not urlparse(self.path).path.endswith("/chat/completions"):
+                self._send_json(404, {"error": {"message": "not found"}})
+                return
+
+            with rng_lock:
+                fail = rng.random() < error_rate
+                jitter = rng.uniform(0.8, 1.2)
+            if fail:
+                stats.add(injected_errors=1)
+                self._send_json(429, {"error": {"code": "429", "message": "Rate limit is exceeded."}},
+                                headers={"retry-after-ms": "50"})
+                return
+
+            messages = request.get("messages", [])
+            content = model.respond(messages)
+            prompt_tokens = sum(count_tokens(str(message.get("content", ""))) for message in messages)
+            completion_tokens = count_tokens(content)
+            stream = bool(request.get("stream"))
+            stats.add(llm_calls=1, llm_stream_calls=int(stream),
+                      prompt_tokens=prompt_tokens, completion_tokens=completion_tokens)
+
+            extra_ms = deployment_latency_ms.get(_deployment_name(self.path), 0.0)
+            time.sleep((latency_ms * jitter + extra_ms) / 1000)
+            generation_time = completion_tokens / tokens_per_second if tokens_per_second > 0 else 0.0
+            model_name = request.get("model") or "fake-model"
+            usage = {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                     "total_tokens": prompt_tokens + completion_tokens}
+            if stream:
+                include_usage = (request.get("stream_options") or {}).get("include_usage")
+                self._stream(content, model_name, generation_time, usage if include_usage else None)
+                return
+
+            time.sleep(generation_time)
+            self._send_json(200, {
+                "id": "chatcmpl-bench",
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model_name,
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+                "usage": usage
+            })
+
+        def _stream(self, content, model_name, generation_time, usage=None):
+            # SSE 형식으로 조각을 나눠 tokens/s 속도에 맞춰 전송
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+
+            pieces = [content[i:i + 8] for i in range(0, len(content), 8)] or [""]
+            delay = generation_time / len(pieces)
+            for index, piece in enumerate(pieces):
+                time.sleep(delay)
+                chunk = {
+                    "id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                    "model": model_name,
+                    "choices": [{"index": 0, "delta": {"content": piece},
+                                 "finish_reason": "stop" if index == len(pieces) - 1 else None}]
+                }
+                self._write_chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n")
+            if usage is not None:
+                # stream_options.include_usage 요청 시 마지막에 사용량만 담은 청크 전송
+                chunk = {"id": "chatcmpl-bench", "object": "chat.completion.chunk", "created": int(time.time()),
+                         "model": model_name, "choices": [], "usage": usage}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self.wfile.write(b"0\r\n\r\n")
+
+        def _write_chunk(self, text):
+            data = text.encode("utf-8")
+            self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+            self.wfile.flush()
+
+    return ChatHandler
+
+def make_search_handler(index, stats, latency_ms):
+    """Azure AI Search 문서 검색 REST 형식으로 BM25 결과를 돌려주는 요청 처리기"""
+    class SearchHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            query = parse_qs(urlparse(self.path).query)
+            search = query.get("search", [""])[0]
+            top = int(query.get("$top", ["5"])[0])
+            stats.add(search_calls=1)
+            time.sleep(latency_ms / 1000)
+
+            value = [dict(doc, **{"@search.score": score}) for doc, score in index.search(search, top)]
+            body = json.dumps({"value": value}, ensure_ascii=False).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return SearchHandler
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class _BenchmarkHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # 클라이언트가 keep-alive/스트리밍 연결을 먼저 닫는 경우는 무시
+        if isinstance(sys.exc_info()[1], ConnectionError):
+            return
+        super().handle_error(request, client_address)
+
+def start_server(port, handler):
+    # 지정한 포트에서 백그라운드 HTTP 서버를 시작하는 함수
+    server = _BenchmarkHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def configure_environment(chat_url, search_url, work_dir, args):
+    """파이프라인이 가짜 서버와 벤치마크용 색인을 사용하도록 환경변수 설정"""
+    os.environ.update({
+        "OPENAI_API_TYPE": "azure",
+        "AZURE_OPENAI_ENDPOINT": chat_url,
+        "OPENAI_API_KEY": "benchmark",
+        "OPENAI_API_VERSION": "2024-08-01-preview",
+        "AZURE_OPENAI_LLM1": "benchmark-gpt",
+        "AZURE_SEARCH_ENDPOINT": search_url,
+        "AZURE_SEARCH_SERVICE_NAME": "benchmark",
+        "AZURE_AI_SEARCH_INDEX_NAME": "manual",
+        "AZURE_SEARCH_ADMIN_KEY": "benchmark",
+        "RETRIEVER_BACKEND": args.retriever,
+        "LOCAL_INDEX_DIR": work_dir,
+        "KEYWORD_EXTRACTOR": args.keywords,
+        "KEYWORD_STATS_PATH": os.path.join(work_dir, "term_stats.json"),
+        "LLM_CACHE_ENABLED": "true" if args.use_cache else "false",
+        "LLM_CACHE_PATH": os.path.join(work_dir, "llm_cache.sqlite3"),
+        "TRACE_EXPORT_PATH": args.trace or "",
+        "LLM_RATE_LIMIT_RPS": str(args.rate_limit),
+        "LLM_RATE_LIMIT_BURST": str(max(args.concurrency * 2, 10)),
+        "HTTP_MAX_CONNECTIONS": str(max(args.concurrency * 4, 20)),
+        "AZURE_OPENAI_LLM2": args.fast_deployment or "",
+        "MODEL_ROUTING": args.model_routing or "",
+    })
+
+def run_benchmark(args):
+    # 가짜 서버를 띄우고 코퍼스 전체를 실제 파이프라인으로 분석해 지표를 반환하는 함수
+    # (캐시 DB, 색인 등을 둔 임시 작업 디렉터리는 끝나면 삭제, --keep-work-dir이면 유지)
+    work_dir = tempfile.mkdtemp(prefix="benchmark-")
+    try:
+        return _run_benchmark_in(work_dir, args)
+    finally:
+        if args.keep_work_dir:
+            print(f"작업 디렉터리를 유지합니다: {work_dir}", file=sys.stderr)
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+def _run_benchmark_in(work_dir, args):
+    """work_dir을 작업 디렉터리로 벤치마크 실행"""
+    corpus = _read_jsonl(args.corpus) * args.repeat
+    chunks = _read_jsonl(args.chunks)
+    chat_port, search_port = _free_port(), _free_port()
+    configure_environment(f"http://127.0.0.1:{chat_port}", f"http://127.0.0.1:{search_port}", work_dir, args)
+
+    from context_packer import count_tokens
+    from keyword_extractor import LocalKeywordExtractor
+    from local_retriever import BM25Index
+    from client_pool import get_openai_client
+    from analysis_context import AnalysisContext
+    from usage_tracker import UsageMeter, usage_scope
+    from model_router import RouteReport, route_scope
+
+    BM25Index.build(chunks, work_dir)
+    LocalKeywordExtractor.build_term_stats((chunk.get("chunk", "") for chunk in chunks),
+                                           os.path.join(work_dir, "term_stats.json"))
+
+    stats = FakeServerStats()
+    chat_server = start_server(chat_port, make_chat_handler(
+        FakeChatModel(), stats, count_tokens, args.latency_ms, args.tokens_per_second, args.error_rate, args.seed,
+        deployment_latency_ms=args.deployment_latency
+    ))
+    search_index = BM25Index(work_dir)
+    search_server = start_server(search_port, make_search_handler(search_index, stats, args.search_latency_ms))
+    openai_client = get_openai_client()
+    tracked_usage = UsageMeter("벤치마크")
+
+    def run_item(record):
+        routes = RouteReport()
+        with usage_scope(tracked_usage), route_scope(routes):
+            timings = measure_item(record)
+        timings["models"] = routes.to_dict()
+        return timings
+
+    def measure_item(record):
+        requirement = record.get("requirement") or record.get("text") or ""
+        timings = {"ok": False}
+        started = time.perf_counter()
+        try:
+            context = AnalysisContext(requirement, args.analysis_type, [])
+            if args.stream:
+                for _ in openai_client.analyze_requirements_stream(requirement, args.analysis_type, [], context=context):
+                    pass
+                analysis_result = context.analysis_result
+            else:
+                analysis_result = openai_client.analyze_requirements(requirement, args.analysis_type, [], context=context)
+            timings["analysis"] = time.perf_counter() - started
+
+            if analysis_result and args.checklist:
+                checklist_started = time.perf_counter()
+                openai_client.generate_checklist(requirement, analysis_result)
+                timings["checklist"] = time.perf_counter() - checklist_started
+            timings["ok"] = bool(analysis_result)
+        except Exception as e:
+            timings["error"] = str(e)
+        timings["total"] = time.perf_counter() - started
+        return timings
+
+    started = time.perf_counter()
+    try:
+        with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+            results = list(executor.map(run_item, corpus))
+    finally:
+        chat_server.shutdown()
+        search_server.shutdown()
+        search_index.close()
+    wall_time = time.perf_counter() - started
+
+    server = stats.snapshot()
+    items = len(results)
+    succeeded = sum(1 for result in results if result["ok"])
+
+    # 단계별로 선택된 모델 분포 (대체 배포 전환 횟수 포함)
+    models = {}
+    for result in results:
+        for stage, route in result["models"].items():
+            stage_models = models.setdefault(stage, {"fallbacks": 0})
+            stage_models[route["model"]] = stage_models.get(route["model"], 0) + 1
+            stage_models["fallbacks"] += int(route["fallback"])
+
+    def latency(key):
+        values = [result[key] * 1000 for result in results if key in result]
+        return {
+            "p50_ms": round(percentile(values, 50), 1),
+            "p95_ms": round(percentile(values, 95), 1),
+            "max_ms": round(max(values), 1) if values else 0.0
+        }
+
+    return {
+        "items": items,
+        "succeeded": succeeded,
+        "concurrency": args.concurrency,
+        "wall_time_s": round(wall_time, 3),
+        "throughput_items_per_s": round(items / wall_time, 3) if wall_time else 0.0,
+        "latency": {key: latency(key) for key in ("analysis", "checklist", "total")},
+        "llm_calls_per_item": round(server["llm_calls"] / items, 2) if items else 0.0,
+        "prompt_tokens_per_item": round(server["prompt_tokens"] / items, 1) if items else 0.0,
+        "completion_tokens_per_item": round(server["completion_tokens"] / items, 1) if items else 0.0,
+        "search_calls_per_item": round(server["search_calls"] / items, 2) if items else 0.0,
+        "tracked_usage": tracked_usage.to_dict(),
+        "models": models,
+        "injected_errors": server["injected_errors"],
+        "settings": {
+            "latency_ms": args.latency_ms, "tokens_per_second": args.tokens_per_second,
+            "error_rate": args.error_rate, "stream": args.stream, "checklist": args.checklist,
+            "retriever": args.retriever, "keywords": args.keywords, "use_cache": args.use_cache
+        }
+    }
+
+def _parse_deployment_latency(value):
+    """"이름=ms,이름=ms" 형식의 배포별 추가 지연"""
+    latencies = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, ms = item.partition("=")
+        latencies[name.strip()] = float(ms)
+    return latencies
+
+def print_report(report):
+    # 벤치마크 결과를 표 형태로 출력하는 함수
+    print(f"항목 {report['items']}개 (성공 {report['succeeded']}), 동시성 {report['concurrency']}, "
+          f"소요 {report['wall_time_s']:.2f}s, 처리량 {report['throughput_items_per_s']:.2f} items/s")
+    for key, title in (("analysis", "분석"), ("checklist", "체크리스트"), ("total", "전체")):
+        values = report["latency"][key]
+        if values["max_ms"]:
+            print(f"  {title:<6} p50 {values['p50_ms']:>8.1f}ms  p95 {values['p95_ms']:>8.1f}ms  max {values['max_ms']:>8.1f}ms")
+    print(f"  항목당 LLM 호출 {report['llm_calls_per_item']}, 프롬프트 토큰 {report['prompt_tokens_per_item']}, "
+          f"응답 토큰 {report['completion_tokens_per_item']}, 검색 호출 {report['search_calls_per_item']}")
+    tracked = report["tracked_usage"]
+    print(f"  파이프라인 집계 토큰 {tracked['total_tokens']:,} (호출 {tracked['calls']}, 추정 {tracked['estimated_calls']}, "
+          f"캐시 적중 {tracked['cache_hits']})")
+    for stage, stage_models in report["models"].items():
+        counts = ", ".join(f"{model} {count}" for model, count in stage_models.items() if model != "fallbacks")
+        print(f"  모델 [{stage}] {counts} (대체 배포 전환 {stage_models['fallbacks']}회)")
+    if report["injected_errors"]:
+        print(f"  주입된 오류(429) {report['injected_errors']}건")
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 가짜 Azure 서버로 분석 파이프라인 벤치마크")
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="요구사항 JSONL (requirement 필드)")
+    parser.add_argument("--chunks", default=DEFAULT_CHUNKS, help="가짜 검색 색인에 넣을 매뉴얼 청크 JSONL")
+    parser.add_argument("--repeat", type=int, default=1, help="코퍼스 반복 횟수")
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency-ms", type=float, default=300.0, help="LLM 첫 토큰까지 지연")
+    parser.add_argument("--tokens-per-second", type=float, default=200.0, help="LLM 응답 생성 속도")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="429 응답 비율 (0~1)")
+    parser.add_argument("--search-latency-ms", type=float, default=30.0)
+    parser.add_argument("--rate-limit", type=float, default=1000.0, help="클라이언트 측 초당 LLM 호출 한도")
+    parser.add_argument("--retriever", default="azure", choices=["azure", "local"])
+    parser.add_argument("--keywords", default="local", choices=["local", "llm"])
+    parser.add_argument("--analysis-type", default="기본 분석", choices=["기본 분석", "상세 분석"])
+    parser.add_argument("--stream", action="store_true", help="스트리밍 분석 경로 사용")
+    parser.add_argument("--checklist", action="store_true", help="체크리스트 생성까지 측정")
+    parser.add_argument("--use-cache", action="store_true", help="LLM 응답 캐시 사용 (기본: 끔)")
+    parser.add_argument("--fast-deployment", default=None, help="키워드/체크리스트용 저비용 배포 이름 (AZURE_OPENAI_LLM2)")
+    parser.add_argument("--model-routing", default=None, help="단계별 모델 라우팅 (MODEL_ROUTING 형식)")
+    parser.add_argument("--deployment-latency", type=_parse_deployment_latency, default={},
+                        help="배포별 추가 지연 (예: benchmark-gpt=2000,benchmark-mini=0)")
+    parser.add_argument("--trace", default=None, help="span을 기록할 JSONL 경로")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--json", default=None, help="결과를 JSON으로 저장할 경로")
+    parser.add_argument("--keep-work-dir", action="store_true", help="임시 작업 디렉터리(캐시 DB, 색인)를 삭제하지 않음")
+    args = parser.parse_args()
+
+    report = run_benchmark(args)
+    print_report(report)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    return 0 if report["succeeded"] == report["items"] else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+import hashlib
+import json
+from analysis_schema import repair_json
+from context_packer import compact_json
+from text_utils import normalize_text
+
+# 체크리스트 섹션 (키, 제목) - 표시 순서
+CHECKLIST_SECTIONS = [
+    ("before", "📋 개발 전 확인사항"),
+    ("during", "🔧 개발 중 확인사항"),
+    ("after", "✅ 개발 후 검증사항"),
+    ("deploy", "🚀 배포 전 최종 점검"),
+]
+
+SECTION_KEYS = {key for key, _ in CHECKLIST_SECTIONS}
+
+# 항목 내용 중 캐시 키에 반영하는 필드
+CLARIFICATION_KEY_FIELDS = ("category", "question", "reason", "priority", "manual_reference")
+
+PRIORITY_ORDER = {"높음": 0, "보통": 1, "낮음": 2}
+
+# 항목별 작업 프롬프트(build_item_messages) 버전 (프롬프트를 바꾸면 올려서 이전 캐시를 쓰지 않음)
+ITEM_PROMPT_VERSION = 2
+
+def _content_hash(kind, content):
+    payload = json.dumps({"kind": kind, "content": content}, ensure_ascii=False, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def item_cache_scope(requirement_text):
+    """항목별 작업 캐시 키에 함께 넣을 값 (같은 확인사항이라도 요구사항이나 프롬프트가 다르면 다른 키)"""
+    return {
+        "requirement": _content_hash("requirement", requirement_text.strip()),
+        "prompt_version": ITEM_PROMPT_VERSION
+    }
+
+def checklist_units(requirement_text, analysis):
+    """체크리스트 생성 단위(요구사항 공통 항목, 확인사항, 잠재적 이슈) 목록
+
+    각 단위는 내용 해시(hash)로 식별되므로 분석을 다시 실행해도 내용이 같은 항목은 같은 키를 가집니다.
+    """
+    units = [{"kind": "requirement", "content": {"requirement": requirement_text.strip()}}]
+
+    clarifications = sorted(
+        analysis.get("clarification_needed", []),
+        key=lambda item: PRIORITY_ORDER.get(item.get("priority"), 1)
+    )
+    for item in clarifications:
+        content = {field: item[field] for field in CLARIFICATION_KEY_FIELDS if item.get(field)}
+        units.append({"kind": "clarification", "content": content})
+
+    for issue in analysis.get("potential_issues", []):
+        units.append({"kind": "issue", "content": {"issue": issue}})
+
+    for unit in units:
+        unit["hash"] = _content_hash(unit["kind"], unit["content"])
+        unit["id"] = unit["hash"][:10]
+    return units
+
+def build_item_messages(requirement_text, units):
+    """생성이 필요한 단위들을 한 번에 요청하는 프롬프트 메시지"""
+    items = [{"id": unit["id"], "type": unit["kind"], **unit["content"]} for unit in units]
+    prompt = f"""
+다음 요구사항의 각 분석 항목별로 개발자와 기획자가 사용할 체크리스트 작업을 만들어주세요.
+
+요구사항: {requirement_text}
+분석 항목: {compact_json(items)}
+
+- type이 requirement인 항목은 요구사항 전체에 대한 공통 작업(개발 후 검증, 배포 전 점검 포함)입니다.
+- 각 작업은 실제로 체크할 수 있는 구체적인 내용이어야 합니다.
+- section은 before(개발 전 확인), during(개발 중 확인), after(개발 후 검증), deploy(배포 전 최종 점검) 중 하나입니다.
+- owner는 기획/개발/디자인/전체 중에서 지정합니다.
+- manual_reference가 있으면 작업 내용에 반영해주세요.
+- 항목당 작업은 1~3개로 작성합니다.
+
+다음 JSON 형식으로 응답해주세요:
+{{"items": [{{"id": "항목 id", "tasks": [{{"section": "before", "task": "작업 내용", "owner": "기획"}}]}}]}}
+"""
+    return [
+        {"role": "system", "content": "당신은 프로젝트 관리 전문가입니다. 실무에서 바로 사용할 수 있는 구체적이고 실행 가능한 체크리스트를 생성합니다. 시스템 매뉴얼 정보가 있다면 이를 반영합니다."},
+        {"role": "user", "content": prompt}
+    ]
+
+def _normalize_task(task):
+    if not isinstance(task, dict) or not str(task.get("task", "")).strip():
+        return None
+    section = str(task.get("section", "")).strip().lower()
+    return {
+        "section": section if section in SECTION_KEYS else "during",
+        "task": str(task["task"]).strip(),
+        "owner": str(task.get("owner") or "전체").strip()
+    }
+
+def parse_item_tasks(response):
+    """LLM 응답을 {항목 id: [작업, ...]}로 파싱 (형식이 맞지 않는 작업은 버림)"""
+    if not response:
+        return {}
+    try:
+        data = json.loads(response)
+    except json.JSONDecodeError:
+        repaired = repair_json(response)
+        try:
+            data = json.loads(repaired) if repaired else {}
+        except json.JSONDecodeError:
+            return {}
+
+    tasks_by_id = {}
+    for item in data.get("items", []) if isinstance(data, dict) else []:
+        if not isinstance(item, dict) or not item.get("id"):
+            continue
+        tasks = [task for task in map(_normalize_task, item.get("tasks") or []) if task]
+        if tasks:
+            tasks_by_id[str(item["id"])] = tasks
+    return tasks_by_id
+
+def assemble_checklist(units, tasks_by_id):
+    """단위별 작업을 개발 전/중/후/배포 섹션의 마크다운 체크리스트로 조립 (중복 작업은 한 번만)"""
+    sections = {key: [] for key, _ in CHECKLIST_SECTIONS}
+    seen = set()
+    for unit in units:
+        for task in tasks_by_id.get(unit["id"], []):
+            normalized = normalize_text(task["task"])
+            if normalized in seen:
+                continue
+            seen.add(normalized)
+            sections[task["section"]].append(f"- [ ] {task['task']} (담당자: {task['owner']})")
+
+    blocks = []
+    for key, title in CHECKLIST_SECTIONS:
+        if sections[key]:
+            blocks.append(f"## {title}\n" + "\n".join(sections[key]))
+    return "\n\n".join(blocks)
@@ -0,0 +1,117 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from config import Config
+
+class ChecklistJob:
+    """체크리스트 생성 작업과 이 작업을 기다리는 세션(owner) 목록"""
+    def __init__(self, future, owners):
+        self.future = future
+        self.owners = set(owners)
+
+class ChecklistJobManager:
+    """분석 결과별 체크리스트 백그라운드 생성 작업 관리자
+
+    분석이 끝나면 체크리스트를 미리 생성해 두고, 버튼을 누르면 완료된 결과를 바로 돌려주거나
+    진행 중인 작업을 기다립니다. 완료된 작업은 max_entries개까지 분석 결과별로 보관합니다.
+    작업 표는 프로세스 전체에서 공유하므로 같은 입력을 기다리는 세션을 owner로 세고,
+    마지막 owner가 취소할 때만 작업을 취소합니다.
+    """
+    def __init__(self, max_workers=2, max_entries=64):
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="checklist")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def job_key(requirement_text, analysis_result):
+        # 요구사항과 분석 결과로 작업 키를 만드는 함수
+        payload = f"{requirement_text}\0{analysis_result}"
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def submit(self, key, fn, *args, owner=None):
+        # 체크리스트 생성 작업을 시작하는 함수 (같은 키의 작업이 있으면 owner만 추가하고 그 작업을 반환)
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is not None and not job.future.cancelled():
+                job.owners.add(owner)
+                self._jobs.move_to_end(key)
+                return job.future
+
+            future = self._executor.submit(fn, *args)
+            self._jobs[key] = ChecklistJob(future, [owner])
+            self._evict()
+            return future
+
+    def _evict(self):
+        """보관 개수를 넘으면 오래된 완료 작업부터 제거"""
+        for key in list(self._jobs):
+            if len(self._jobs) <= self.max_entries:
+                break
+            if self._jobs[key].future.done():
+                del self._jobs[key]
+
+    def _future(self, key):
+        with self._lock:
+            job = self._jobs.get(key)
+        return job.future if job is not None else None
+
+    def is_ready(self, key):
+        # 작업이 완료되어 결과가 있는지 여부
+        future = self._future(key)
+        return bool(future is not None and future.done() and not future.cancelled()
+                    and future.exception() is None and future.result())
+
+    def result(self, key, timeout=None):
+        # 작업 결과를 반환하는 함수 (진행 중이면 기다림, 작업이 없거나 실패하면 None)
+        future = self._future(key)
+        if future is None:
+            return None
+
+        try:
+            checklist = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            return None
+        except Exception:
+            checklist = None
+
+        if not checklist:
+            # 실패한 작업은 버려서 다음 요청 때 다시 생성되도록 함
+            with self._lock:
+                job = self._jobs.get(key)
+                if job is not None and job.future is future:
+                    del self._jobs[key]
+        return checklist
+
+    def cancel(self, key, owner=None):
+        # owner의 대기를 취소하는 함수 (다른 owner가 남아 있으면 작업은 계속)
+        # 시작 전 작업은 취소하고, 이미 실행 중인 작업은 LLM 호출을 중간에 멈출 수 없으므로
+        # 끝까지 실행해 결과를 보관합니다 (같은 입력으로 다시 요청하면 바로 사용).
+        if key is None:
+            return False
+        with self._lock:
+            job = self._jobs.get(key)
+            if job is None or owner not in job.owners:
+                return False
+            job.owners.discard(owner)
+            if job.owners:
+                return False
+            if job.future.cancel():
+                del self._jobs[key]
+                return True
+            return False
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_checklist_jobs():
+    # 프로세스 공유 체크리스트 작업 관리자 반환
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = ChecklistJobManager(
+                max_workers=Config.CHECKLIST_JOB_WORKERS,
+                max_entries=Config.CHECKLIST_JOB_MAX_ENTRIES
+            )
+        return _manager
@@ -0,0 +1,63 @@
+import threading
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from config import Config
+from openai_client import OpenAIClient
+from pdf_search_client import PDFSearchClient
+
+class ClientPool:
+    """프로세스 전체에서 공유하는 클라이언트 풀
+    
+    Streamlit 재실행(rerun)이나 세션과 관계없이 HTTP 연결 풀과 클라이언트를 한 번만 생성하고,
+    Config 값이 바뀐 경우에만 다시 생성합니다.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._fingerprint = None
+        self._openai_client = None
+    
+    def get_openai_client(self):
+        # 공유 OpenAIClient를 반환하는 함수 (설정 변경 시 재생성)
+        fingerprint = Config.fingerprint()
+        with self._lock:
+            if self._openai_client is None or fingerprint != self._fingerprint:
+                self._openai_client = self._build_clients()
+                self._fingerprint = fingerprint
+            return self._openai_client
+    
+    def get_pdf_client(self):
+        # 공유 PDFSearchClient를 반환하는 함수
+        return self.get_openai_client().pdf_client
+    
+    def _build_clients(self):
+        """keep-alive 연결 풀을 공유하는 클라이언트 묶음 생성"""
+        # 이전 클라이언트는 다른 세션에서 요청 중일 수 있으므로 닫지 않고 GC에 맡깁니다.
+        http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=Config.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS
+            ),
+            timeout=Config.HTTP_TIMEOUT
+        )
+        
+        search_session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=Config.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            pool_maxsize=Config.HTTP_MAX_CONNECTIONS
+        )
+        search_session.mount("https://", adapter)
+        search_session.mount("http://", adapter)
+        
+        pdf_client = PDFSearchClient(http_client=http_client, search_session=search_session)
+        return OpenAIClient(http_client=http_client, pdf_client=pdf_client)
+
+_pool = ClientPool()
+
+def get_openai_client():
+    # 프로세스 공유 OpenAIClient 반환
+    return _pool.get_openai_client()
+
+def get_pdf_client():
+    # 프로세스 공유 PDFSearchClient 반환
+    return _pool.get_pdf_client()
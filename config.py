@@ -11,21 +11,145 @@ class Config:
     OPENAI_API_TYPE = os.getenv("OPENAI_API_TYPE")
     OPENAI_API_VERSION = os.getenv("OPENAI_API_VERSION")
     DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_LLM1")
+    FAST_DEPLOYMENT_NAME = os.getenv("AZURE_OPENAI_LLM2", "")  # 키워드/체크리스트용 저비용 배포 (선택)
     
     # Azure AI Search 설정
     AZURE_SEARCH_INDEX_NAME = os.getenv("AZURE_AI_SEARCH_INDEX_NAME")
     AZURE_SEARCH_SERVICE_NAME = os.getenv("AZURE_SEARCH_SERVICE_NAME")
     AZURE_SEARCH_ADMIN_KEY = os.getenv("AZURE_SEARCH_ADMIN_KEY")
     AZURE_SEARCH_API_VERSION = os.getenv("AZURE_SEARCH_API_VERSION", "2023-11-01")
+    AZURE_SEARCH_ENDPOINT = os.getenv("AZURE_SEARCH_ENDPOINT", "")  # 지정 시 서비스 이름 대신 사용
     
     # 앱 설정
     APP_TITLE = "🔍 사용자 요구사항 분석기"
     MAX_TEXT_LENGTH = 2000
     
     # 분석 설정
+    ANALYSIS_TYPES = ["기본 분석", "상세 분석"]
     DEFAULT_TEMPERATURE = 0.3
     CHECKLIST_TEMPERATURE = 0.1
     
+    # 분석 브랜치별 제한 시간 (초, 기본 분석과 매뉴얼 기반 분석은 동시에 실행)
+    BASIC_ANALYSIS_TIMEOUT = float(os.getenv("BASIC_ANALYSIS_TIMEOUT", "90"))
+    MANUAL_ANALYSIS_TIMEOUT = float(os.getenv("MANUAL_ANALYSIS_TIMEOUT", "90"))
+    
+    # 분석 결과 스트리밍 표시 여부
+    STREAMING_ENABLED = os.getenv("STREAMING_ENABLED", "true").lower() == "true"
+    
     # PDF 검색 설정
     PDF_SEARCH_TOP_K = 5
-    PDF_SEARCH_THRESHOLD = 0.7
\ No newline at end of file
+    PDF_SEARCH_THRESHOLD = 0.7  # 최고 점수 대비 관련도 비율
+    PDF_SEARCH_FETCH_K = int(os.getenv("PDF_SEARCH_FETCH_K", "10"))  # 필터링 전 후보 청크 수
+    PDF_SEARCH_DEDUPE_THRESHOLD = float(os.getenv("PDF_SEARCH_DEDUPE_THRESHOLD", "0.85"))
+    PDF_SEARCH_MMR_LAMBDA = float(os.getenv("PDF_SEARCH_MMR_LAMBDA", "0.7"))
+    
+    # 프롬프트 토큰 예산 (매뉴얼 청크, 체크리스트 생성 시 포함할 분석 결과)
+    MANUAL_CONTEXT_TOKEN_BUDGET = int(os.getenv("MANUAL_CONTEXT_TOKEN_BUDGET", "2000"))
+    CHECKLIST_ANALYSIS_TOKEN_BUDGET = int(os.getenv("CHECKLIST_ANALYSIS_TOKEN_BUDGET", "1500"))
+    
+    # 매뉴얼 검색 백엔드 ("azure": Azure AI Search, "local": 로컬 BM25 색인)
+    RETRIEVER_BACKEND = os.getenv("RETRIEVER_BACKEND", "azure")
+    LOCAL_INDEX_DIR = os.getenv("LOCAL_INDEX_DIR", "data/index")
+    
+    # PDF 매뉴얼 수집(ingest_manuals.py) 설정 (청크 크기/겹침은 글자 수, 워커 0이면 CPU 수)
+    INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", "1000"))
+    INGEST_CHUNK_OVERLAP = int(os.getenv("INGEST_CHUNK_OVERLAP", "200"))
+    INGEST_WORKERS = int(os.getenv("INGEST_WORKERS", "0"))
+    INGEST_UPLOAD_BATCH_SIZE = int(os.getenv("INGEST_UPLOAD_BATCH_SIZE", "1000"))
+    INGEST_UPLOAD_CONCURRENCY = int(os.getenv("INGEST_UPLOAD_CONCURRENCY", "4"))
+    INGEST_UPLOAD_RPS = float(os.getenv("INGEST_UPLOAD_RPS", "10"))
+    AZURE_SEARCH_KEY_FIELD = os.getenv("AZURE_SEARCH_KEY_FIELD", "id")  # 업로드 대상 색인의 키 필드
+    AZURE_SEARCH_UPLOAD_FIELDS = os.getenv("AZURE_SEARCH_UPLOAD_FIELDS", "title,chunk")  # 키 외에 업로드할 필드
+    
+    # LLM 응답 캐시 설정 (LLM_CACHE_ENABLED=false 로 캐시 우회)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", ".cache/llm_cache.sqlite3")
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "5000"))
+    LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+    
+    # 유사 요구사항 분석 재사용 설정 (문자 n-gram 코사인 유사도 기준)
+    SIMILARITY_STORE_ENABLED = os.getenv("SIMILARITY_STORE_ENABLED", "true").lower() == "true"
+    SIMILARITY_STORE_PATH = os.getenv("SIMILARITY_STORE_PATH", ".cache/similar_analyses.sqlite3")
+    # "추가"/"삭제"처럼 동작만 반대인 요구사항도 0.8 안팎이 나오므로 재사용 제안은 높은 기준에서만 함
+    SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0.9"))
+    SIMILARITY_STORE_MAX_ENTRIES = int(os.getenv("SIMILARITY_STORE_MAX_ENTRIES", "2000"))
+    
+    # 검색 키워드 생성 방식 ("local": 로컬 TF-IDF 추출, "llm": LLM 호출)
+    KEYWORD_EXTRACTOR = os.getenv("KEYWORD_EXTRACTOR", "local")
+    KEYWORD_STATS_PATH = os.getenv("KEYWORD_STATS_PATH", "data/index/term_stats.json")
+    LOCAL_KEYWORD_TOP_K = int(os.getenv("LOCAL_KEYWORD_TOP_K", "8"))
+    
+    # 일괄 분석(batch_runner.py) 동시 실행 워커 수
+    BATCH_WORKERS = int(os.getenv("BATCH_WORKERS", "4"))
+    
+    # HTTP API 서버(api_server.py) 설정
+    API_HOST = os.getenv("API_HOST", "0.0.0.0")
+    API_PORT = int(os.getenv("API_PORT", "8080"))
+    API_WORKERS = int(os.getenv("API_WORKERS", "8"))
+    
+    # LLM 호출 재시도/속도 제한/서킷 브레이커 설정
+    LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "0.5"))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "20"))
+    LLM_RATE_LIMIT_RPS = float(os.getenv("LLM_RATE_LIMIT_RPS", "5"))
+    LLM_RATE_LIMIT_BURST = int(os.getenv("LLM_RATE_LIMIT_BURST", "10"))
+    LLM_RATE_DECREASE_COOLDOWN = float(os.getenv("LLM_RATE_DECREASE_COOLDOWN", "10"))  # 429로 속도를 줄인 뒤 다시 줄이지 않는 시간(초)
+    CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))  # 재시도를 모두 소진하고 실패한 연속 호출 수 (시도 횟수 아님)
+    CIRCUIT_RECOVERY_SECONDS = float(os.getenv("CIRCUIT_RECOVERY_SECONDS", "30"))
+    
+    # 기본/매뉴얼 분석 사이의 비슷한 확인 질문·잠재적 이슈 병합 기준 유사도
+    # (같은 주제의 다른 질문은 0.3~0.5 정도이므로 표현만 다른 질문(0.7 이상)만 합침)
+    MERGE_SIMILARITY_THRESHOLD = float(os.getenv("MERGE_SIMILARITY_THRESHOLD", "0.7"))
+    
+    # 단계별 모델 라우팅 (keywords / basic_analysis / manual_analysis / checklist)
+    # 예: "checklist=gpt-4o-mini>gpt-4o@20000" (기본 배포>대체 배포@기본 배포 p95 기준 ms, ";"로 구분)
+    MODEL_ROUTING = os.getenv("MODEL_ROUTING", "")
+    MODEL_LATENCY_WINDOW_SECONDS = float(os.getenv("MODEL_LATENCY_WINDOW_SECONDS", "300"))
+    MODEL_LATENCY_MIN_SAMPLES = int(os.getenv("MODEL_LATENCY_MIN_SAMPLES", "5"))
+    
+    # 체크리스트 생성 방식 (incremental: 항목별 생성/캐시, full: 전체 한 번에 생성)
+    CHECKLIST_MODE = os.getenv("CHECKLIST_MODE", "incremental")
+    
+    # 분석 완료 직후 체크리스트를 백그라운드에서 미리 생성 (opt-in)
+    SPECULATIVE_CHECKLIST_ENABLED = os.getenv("SPECULATIVE_CHECKLIST_ENABLED", "false").lower() == "true"
+    CHECKLIST_JOB_WORKERS = int(os.getenv("CHECKLIST_JOB_WORKERS", "2"))
+    CHECKLIST_JOB_MAX_ENTRIES = int(os.getenv("CHECKLIST_JOB_MAX_ENTRIES", "64"))
+    
+    # 단계별 실행 추적 (TRACE_EXPORT_PATH를 지정하면 span을 JSON Lines로 기록)
+    TRACING_ENABLED = os.getenv("TRACING_ENABLED", "true").lower() == "true"
+    TRACE_EXPORT_PATH = os.getenv("TRACE_EXPORT_PATH", "")
+    TRACE_PANEL_ENABLED = os.getenv("TRACE_PANEL_ENABLED", "true").lower() == "true"
+    
+    # 구조화 출력 모드 (json_object / json_schema / off)
+    STRUCTURED_OUTPUT_MODE = os.getenv("STRUCTURED_OUTPUT_MODE", "json_object")
+    
+    # 분석 결과 화면에서 우선순위 그룹별로 한 번에 표시할 확인 필요사항 수 (0이면 모두 표시)
+    CLARIFICATION_PAGE_SIZE = int(os.getenv("CLARIFICATION_PAGE_SIZE", "10"))
+    
+    # 세션별 분석 히스토리 (최근 사용 순으로 개수/용량 제한)
+    HISTORY_MAX_ENTRIES = int(os.getenv("HISTORY_MAX_ENTRIES", "20"))
+    HISTORY_MAX_BYTES = int(os.getenv("HISTORY_MAX_BYTES", str(2 * 1024 * 1024)))
+    
+    # 토큰 사용량 예산 (0이면 제한 없음, 분석 예산은 해당 분석의 체크리스트 생성까지 포함)
+    ANALYSIS_TOKEN_BUDGET = int(os.getenv("ANALYSIS_TOKEN_BUDGET", "0"))
+    SESSION_TOKEN_BUDGET = int(os.getenv("SESSION_TOKEN_BUDGET", "0"))
+    BATCH_TOKEN_BUDGET = int(os.getenv("BATCH_TOKEN_BUDGET", "0"))
+    TOKEN_BUDGET_DOWNGRADE_RATIO = float(os.getenv("TOKEN_BUDGET_DOWNGRADE_RATIO", "0.8"))  # 이 비율부터 저비용 경로 사용
+    # 스트리밍 응답의 실제 사용량 수신 (API 버전 2024-09-01-preview 이상, 끄면 토큰 수 추정)
+    STREAM_USAGE_ENABLED = os.getenv("STREAM_USAGE_ENABLED", "false").lower() == "true"
+    
+    # HTTP 연결 풀 설정
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "60"))
+    
+    # 앱 시작 직후 백그라운드에서 클라이언트 생성, LangChain import, 연결 열기를 미리 수행 (opt-in)
+    WARMUP_ENABLED = os.getenv("WARMUP_ENABLED", "false").lower() == "true"
+    
+    @classmethod
+    def fingerprint(cls):
+        """현재 설정값의 스냅샷 (클라이언트 재생성 여부 판단용)"""
+        return tuple(sorted(
+            (key, repr(value)) for key, value in vars(cls).items() if key.isupper()
+        ))
\ No newline at end of file
@@ -0,0 +1,189 @@
+import json
+import logging
+import math
+import threading
+from analysis_schema import parse_analysis_json
+
+logger = logging.getLogger(__name__)
+
+# tiktoken은 import와 인코딩 로드(처음 한 번 BPE 파일 다운로드, TIKTOKEN_CACHE_DIR에 캐시)가 느리므로
+# 첫 화면 경로가 아니라 토큰 수를 처음 셀 때(또는 워밍업에서) 불러옵니다.
+TOKEN_ENCODING = "o200k_base"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+ELLIPSIS = "…"
+
+def load_token_encoding():
+    """tiktoken 인코더를 불러옴 (사용할 수 없으면 한 번만 로그를 남기고 None)"""
+    global _encoding
+    if _encoding is None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    import tiktoken
+                    _encoding = tiktoken.get_encoding(TOKEN_ENCODING)
+                except Exception as e:
+                    # 오프라인 환경에서 BPE 파일을 받을 수 없는 경우 등
+                    logger.warning("tiktoken 인코딩(%s)을 불러올 수 없어 문자 수 기반 토큰 추정치를 사용합니다: %s",
+                                   TOKEN_ENCODING, e)
+                    _encoding = False
+    return _encoding or None
+
+def count_tokens(text):
+    # 텍스트의 토큰 수를 로컬에서 계산하는 함수 (tiktoken이 없으면 보수적으로 추정)
+    if not text:
+        return 0
+    encoding = load_token_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text))
+    
+    # 영문/숫자는 약 4자당 1토큰, 한글 등 비ASCII 문자는 1자당 1토큰으로 추정
+    ascii_count = sum(1 for c in text if ord(c) < 128)
+    return math.ceil(ascii_count / 4) + (len(text) - ascii_count)
+
+def truncate_to_tokens(text, max_tokens):
+    # 텍스트를 최대 토큰 수 이내로 자르는 함수
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text) <= max_tokens:
+        return text
+    
+    # 말줄임표까지 포함해 한도 이하가 되는 가장 긴 앞부분을 이진 탐색
+    limit = max_tokens - count_tokens(ELLIPSIS)
+    low, high = 0, len(text)
+    while low < high:
+        mid = (low + high + 1) // 2
+        if count_tokens(text[:mid]) <= limit:
+            low = mid
+        else:
+            high = mid - 1
+    return text[:low].rstrip() + ELLIPSIS if low else ""
+
+def compact_json(data):
+    # 공백 없이 직렬화한 JSON 문자열
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":"))
+
+class ContextPacker:
+    """프롬프트에 넣을 내용을 토큰 예산에 맞게 채우는 컴포넌트
+    
+    검색 청크는 순위가 높은 것부터, 분석 결과는 우선순위가 높은 확인사항부터 채우고
+    예산을 넘는 부분은 잘라냅니다.
+    """
+    PRIORITY_ORDER = {"높음": 0, "보통": 1, "낮음": 2}
+    SUMMARY_FIELD_TOKENS = 200
+    
+    def __init__(self, budget):
+        self.budget = budget
+    
+    def pack_documents(self, docs, separator="\n\n"):
+        # 검색 청크를 순위 순서대로 예산 안에서 이어 붙이는 함수 (마지막 청크는 잘릴 수 있음)
+        parts = []
+        remaining = self.budget
+        separator_tokens = count_tokens(separator)
+        for doc in docs:
+            if parts:
+                remaining -= separator_tokens
+            if remaining <= 0:
+                break
+            content = doc.page_content
+            tokens = count_tokens(content)
+            if tokens > remaining:
+                parts.append(truncate_to_tokens(content, remaining))
+                break
+            parts.append(content)
+            remaining -= tokens
+        return separator.join(parts)
+    
+    def pack_analysis(self, analysis):
+        # 분석 결과(JSON 문자열 또는 dict)를 예산 안의 compact JSON으로 만드는 함수
+        if isinstance(analysis, str):
+            parsed = parse_analysis_json(analysis)
+            if parsed is None:
+                return truncate_to_tokens(analysis, self.budget)
+            analysis = parsed
+        if not isinstance(analysis, dict):
+            return truncate_to_tokens(str(analysis), self.budget)
+        
+        clarifications = sorted(
+            analysis.get("clarification_needed", []),
+            key=lambda item: self.PRIORITY_ORDER.get(item.get("priority"), 1) if isinstance(item, dict) else 1
+        )
+        data = {
+            "analysis_summary": analysis.get("analysis_summary", ""),
+            "clarification_needed": clarifications,
+            "potential_issues": list(analysis.get("potential_issues", [])),
+            "manual_references": list(analysis.get("manual_references", [])),
+            "business_impact": analysis.get("business_impact", ""),
+        }
+        data = {key: value for key, value in data.items() if value}
+        
+        packed = compact_json(data)
+        if count_tokens(packed) <= self.budget:
+            return packed
+        
+        # 덜 중요한 내용부터 제거하면서 예산에 맞춤
+        for step in self._reduction_steps(data):
+            while step():
+                packed = compact_json(data)
+                if count_tokens(packed) <= self.budget:
+                    return packed
+        
+        # 마지막 수단: 남은 요약/영향도 문자열을 넘친 토큰만큼 더 자르고, 그래도 넘으면 JSON 문자열 자체를 자름
+        for key in ["business_impact", "analysis_summary"]:
+            value = data.get(key)
+            if not isinstance(value, str) or not value:
+                continue
+            overflow = count_tokens(packed) - self.budget
+            value = truncate_to_tokens(value, count_tokens(value) - overflow)
+            if value:
+                data[key] = value
+            else:
+                del data[key]
+            packed = compact_json(data)
+            if count_tokens(packed) <= self.budget:
+                return packed
+        return truncate_to_tokens(packed, self.budget)
+    
+    def _reduction_steps(self, data):
+        """예산 초과 시 적용할 축소 단계 (중요도 낮은 순서)"""
+        def drop_clarification(priority):
+            def step():
+                items = data.get("clarification_needed", [])
+                for i in range(len(items) - 1, -1, -1):
+                    item_priority = items[i].get("priority") if isinstance(items[i], dict) else None
+                    if self.PRIORITY_ORDER.get(item_priority, 1) == self.PRIORITY_ORDER[priority]:
+                        del items[i]
+                        return True
+                return False
+            return step
+        
+        def drop_last(key):
+            def step():
+                if data.get(key):
+                    data[key].pop()
+                    return True
+                return False
+            return step
+        
+        def shorten_text_fields(max_tokens):
+            def step():
+                changed = False
+                for key in ["analysis_summary", "business_impact"]:
+                    value = data.get(key)
+                    if isinstance(value, str) and count_tokens(value) > max_tokens:
+                        data[key] = truncate_to_tokens(value, max_tokens)
+                        changed = True
+                return changed
+            return step
+        
+        return [
+            drop_clarification("낮음"),
+            drop_last("manual_references"),
+            drop_last("potential_issues"),
+            drop_clarification("보통"),
+            shorten_text_fields(self.SUMMARY_FIELD_TOKENS),
+            drop_clarification("높음"),
+            shorten_text_fields(max(1, self.budget // 4)),
+        ]
@@ -0,0 +1,169 @@
+import argparse
+import ast
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+# python -X importtime 으로 앱 첫 화면(main.py가 import 하는 모듈)과 지연 import 하는 매뉴얼 검색 경로의
+# import 시간을 측정합니다. 무거운 패키지가 첫 화면 경로에 다시 들어오면 실패 코드로 종료합니다.
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# 매뉴얼 검색 경로를 처음 사용할 때 import 하는 모듈 (pdf_search_client, openai_client, context_packer 참고)
+DEFERRED_MODULES = ("openai", "langchain_openai", "langchain_community.retrievers", "langchain_core.prompts",
+                    "langchain_core.output_parsers", "tiktoken")
+
+# 첫 화면 경로에서 import 되면 안 되는 패키지
+FORBIDDEN_PACKAGES = ("openai", "langchain", "langchain_core", "langchain_community", "langchain_openai", "tiktoken")
+
+PHASE_MARKER = "#import-report-phase"
+
+def startup_modules(main_path=os.path.join(ROOT, "main.py")):
+    """main.py가 최상위에서 import 하는 모듈 목록"""
+    with open(main_path, encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+    modules = []
+    for node in tree.body:
+        if isinstance(node, ast.Import):
+            modules.extend(alias.name for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            modules.append(node.module)
+    return list(dict.fromkeys(modules))
+
+def parse_importtime(stderr):
+    """-X importtime 출력을 단계별 [(모듈명, 깊이, self us, cumulative us)] 목록으로 변환"""
+    phases = [[]]
+    for line in stderr.splitlines():
+        if line.strip() == PHASE_MARKER:
+            phases.append([])
+            continue
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        if not self_us.strip().isdigit():
+            continue  # 헤더 줄
+        depth = (len(name) - len(name.lstrip())) // 2
+        phases[-1].append((name.strip(), depth, int(self_us), int(cumulative_us)))
+    return phases
+
+def measure_once(startup, deferred):
+    """새 인터프리터에서 첫 화면 모듈과 지연 import 모듈을 차례로 import 하며 측정"""
+    code = "; ".join([
+        f"import {', '.join(startup)}",
+        "import sys",
+        f"sys.stderr.write({PHASE_MARKER!r} + '\\n')",
+        f"import {', '.join(deferred)}"
+    ])
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=ROOT, capture_output=True, text=True
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "import 실패")
+    return parse_importtime(completed.stderr)
+
+def summarize_phase(entries, top=10):
+    """단계 하나의 총 import 시간과 패키지별 self 시간 합계"""
+    total_us = sum(cumulative for _, depth, _, cumulative in entries if depth == 0)
+    packages = {}
+    for name, _, self_us, _ in entries:
+        package = name.split(".")[0]
+        packages[package] = packages.get(package, 0) + self_us
+    slowest = sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top]
+    return {
+        "total_ms": round(total_us / 1000, 1),
+        "module_count": len(entries),
+        "top_packages": [{"package": package, "self_ms": round(us / 1000, 1)} for package, us in slowest],
+        "packages": sorted(packages)
+    }
+
+def build_report(repeat=3, top=10):
+    """repeat회 측정한 결과 중 첫 화면 시간이 중앙값인 실행으로 보고서 생성"""
+    startup = startup_modules()
+    runs = []
+    for _ in range(max(1, repeat)):
+        startup_entries, deferred_entries = measure_once(startup, DEFERRED_MODULES)
+        runs.append((summarize_phase(startup_entries, top), summarize_phase(deferred_entries, top)))
+    runs.sort(key=lambda run: run[0]["total_ms"])
+    startup_summary, deferred_summary = runs[len(runs) // 2]
+    return {
+        "python": sys.version.split()[0],
+        "repeat": len(runs),
+        "startup_modules": startup,
+        "deferred_modules": list(DEFERRED_MODULES),
+        "startup": startup_summary,
+        "deferred": deferred_summary,
+        "startup_total_ms_samples": [run[0]["total_ms"] for run in runs],
+        "startup_median_ms": statistics.median(run[0]["total_ms"] for run in runs)
+    }
+
+def find_violations(report, max_startup_ms=0):
+    """첫 화면 경로에 들어온 금지 패키지와 시간 초과 항목"""
+    violations = [
+        f"첫 화면 경로에서 {package} 패키지를 import 합니다. (매뉴얼 검색/분석 경로에서 지연 import 필요)"
+        for package in report["startup"]["packages"] if package in FORBIDDEN_PACKAGES
+    ]
+    if max_startup_ms and report["startup_median_ms"] > max_startup_ms:
+        violations.append(
+            f"첫 화면 import 시간 {report['startup_median_ms']:,.0f}ms가 기준 {max_startup_ms:,.0f}ms를 넘었습니다."
+        )
+    return violations
+
+def format_markdown(report, violations):
+    """GitHub Actions 작업 요약 등에 쓸 Markdown 보고서"""
+    lines = [
+        "### Import 시간 보고서",
+        "",
+        f"Python {report['python']}, {report['repeat']}회 측정 중앙값",
+        "",
+        "| 경로 | 시간 | 모듈 수 |",
+        "| --- | ---: | ---: |",
+        f"| 첫 화면 (main.py import) | {report['startup']['total_ms']:,.0f}ms | {report['startup']['module_count']} |",
+        f"| 매뉴얼 검색/분석 (지연 import) | {report['deferred']['total_ms']:,.0f}ms | {report['deferred']['module_count']} |",
+        ""
+    ]
+    for title, key in (("첫 화면", "startup"), ("지연 import", "deferred")):
+        lines.append(f"**{title} 상위 패키지 (self 시간 합계)**: " + ", ".join(
+            f"{item['package']} {item['self_ms']:,.0f}ms" for item in report[key]["top_packages"]
+        ))
+        lines.append("")
+    for violation in violations:
+        lines.append(f"- ❌ {violation}")
+    return "\n".join(lines) + "\n"
+
+def print_report(report, violations):
+    print(f"Python {report['python']} · {report['repeat']}회 측정 (첫 화면 {report['startup_total_ms_samples']}ms)")
+    for title, key in (("첫 화면 (main.py import)", "startup"), ("매뉴얼 검색/분석 (지연 import)", "deferred")):
+        summary = report[key]
+        print(f"\n{title}: {summary['total_ms']:,.0f}ms, 모듈 {summary['module_count']}개")
+        for item in summary["top_packages"]:
+            print(f"  {item['self_ms']:>8,.1f}ms  {item['package']}")
+    for violation in violations:
+        print(f"\n[실패] {violation}")
+
+def main():
+    parser = argparse.ArgumentParser(description="앱 첫 화면과 지연 import 경로의 import 시간 보고서")
+    parser.add_argument("--repeat", type=int, default=3, help="측정 횟수 (중앙값 사용)")
+    parser.add_argument("--top", type=int, default=10, help="표시할 상위 패키지 수")
+    parser.add_argument("--max-startup-ms", type=float, default=0, help="첫 화면 import 시간 기준 (0이면 검사 안 함)")
+    parser.add_argument("--json", help="보고서를 JSON으로 저장할 경로")
+    parser.add_argument("--markdown", help="Markdown 보고서를 덧붙일 경로 (예: $GITHUB_STEP_SUMMARY)")
+    args = parser.parse_args()
+
+    report = build_report(args.repeat, args.top)
+    violations = find_violations(report, args.max_startup_ms)
+    print_report(report, violations)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({**report, "violations": violations}, f, ensure_ascii=False, indent=2)
+    if args.markdown:
+        with open(args.markdown, "a", encoding="utf-8") as f:
+            f.write(format_markdown(report, violations))
+
+    sys.exit(1 if violations else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,445 @@
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from config import Config
+from resilience import ResilientCaller
+
+MANIFEST_VERSION = 1
+
+# 프로세스 풀 작업 하나가 추출할 페이지 수 (큰 매뉴얼 하나도 여러 프로세스로 나눠 처리)
+PAGES_PER_TASK = 16
+
+def content_hash(text):
+    """텍스트 내용 해시 (sha256 hex)"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+def file_hash(path):
+    """파일 내용 해시 (sha256 hex, 1MB 단위로 읽음)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def normalize_page_text(text):
+    """PDF 추출 텍스트의 연속 공백과 빈 줄 정리"""
+    text = re.sub(r"[ \t\u00a0\u3000]+", " ", text)
+    text = re.sub(r" ?\n ?", "\n", text)
+    return re.sub(r"\n{3,}", "\n\n", text).strip()
+
+def chunk_text(text, chunk_size=1000, chunk_overlap=200):
+    """텍스트를 chunk_size 글자 이하, 앞 청크와 chunk_overlap 글자가 겹치는 청크 목록으로 나눔
+
+    청크 뒤쪽 절반 안에 줄바꿈/문장 끝/공백이 있으면 그 위치에서 자릅니다.
+    """
+    if chunk_overlap >= chunk_size:
+        raise ValueError("chunk_overlap은 chunk_size보다 작아야 합니다.")
+    chunks = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_size, len(text))
+        if end < len(text):
+            for separator in ("\n", ". ", " "):
+                cut = text.rfind(separator, start + chunk_size // 2, end)
+                if cut != -1:
+                    end = cut + len(separator)
+                    break
+        chunk = text[start:end].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end >= len(text):
+            break
+        # 겹치는 구간은 단어 중간에서 시작하지 않도록 다음 공백 뒤로 맞춤
+        next_start = max(end - chunk_overlap, start + 1)
+        space = text.find(" ", next_start, end)
+        start = space + 1 if space != -1 and chunk_overlap else next_start
+    return chunks
+
+def _page_count(path):
+    """PDF 페이지 수 (프로세스 풀 작업)"""
+    from pypdf import PdfReader
+    return len(PdfReader(path).pages)
+
+def _extract_pages(path, start, stop, chunk_size, chunk_overlap):
+    """PDF의 [start, stop) 페이지를 (페이지 번호, 페이지 해시, 청크 목록) 목록으로 추출 (프로세스 풀 작업)"""
+    from pypdf import PdfReader
+    reader = PdfReader(path)
+    pages = []
+    for page_index in range(start, stop):
+        text = normalize_page_text(reader.pages[page_index].extract_text() or "")
+        pages.append((page_index + 1, content_hash(text), chunk_text(text, chunk_size, chunk_overlap)))
+    return pages
+
+def _read_jsonl(path):
+    """JSONL 파일의 레코드 목록 (파일이 없으면 빈 목록, 잘린 줄은 건너뜀)"""
+    if not os.path.exists(path):
+        return []
+    records = []
+    with open(path, encoding="utf-8", errors="replace") as f:
+        for line in f:
+            try:
+                record = json.loads(line) if line.strip() else None
+            except json.JSONDecodeError:
+                continue
+            if isinstance(record, dict) and record.get("id") and record.get("source"):
+                records.append(record)
+    return records
+
+def _write_atomic(path, write):
+    """임시 파일에 기록한 뒤 교체 (중간에 실패해도 이전 파일 유지)"""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        write(f)
+    os.replace(tmp_path, path)
+
+class LocalIndexSink:
+    """로컬 BM25 색인과 키워드 용어 통계를 다시 만드는 싱크 (RETRIEVER_BACKEND=local)"""
+    name = "local"
+
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+
+    def apply(self, docs, added, removed_ids):
+        # 전체 청크로 색인을 다시 생성하는 함수 (BM25 색인은 통째로 만드는 편이 빠름)
+        from local_retriever import BM25Index
+        from keyword_extractor import LocalKeywordExtractor
+        BM25Index.build(docs, self.index_dir)
+        LocalKeywordExtractor.build_term_stats(
+            (doc.get("chunk", "") for doc in docs),
+            os.path.join(self.index_dir, "term_stats.json")
+        )
+
+class SearchIndexingError(Exception):
+    """Azure AI Search 일괄 색인 요청에서 일부 문서가 실패한 경우 (status_code로 재시도 여부 판단)"""
+    def __init__(self, message, status_code):
+        super().__init__(message)
+        self.status_code = status_code
+
+class AzureSearchUploader:
+    """Azure AI Search 색인에 바뀐 청크만 일괄(batch) 업로드/삭제하는 싱크
+
+    문서 수(batch_size)와 요청 크기 제한에 맞춰 배치를 나누고, 여러 배치를 동시에 전송합니다.
+    배치는 mergeOrUpload/delete 동작이라 다시 보내도 결과가 같으므로, 429/503과 일부 문서 실패는
+    배치 단위로 재시도합니다.
+    """
+    name = "azure"
+    MAX_BATCH_BYTES = 15 * 1024 * 1024
+    RETRYABLE_ITEM_STATUS = {409, 422, 503}
+
+    def __init__(self, endpoint, index_name, api_key, api_version, key_field="id", fields=("title", "chunk"),
+                 batch_size=1000, concurrency=4, session=None):
+        import requests
+        from requests.adapters import HTTPAdapter
+        self.url = f"{endpoint.rstrip('/')}/indexes/{index_name}/docs/index?api-version={api_version}"
+        self.headers = {"Content-Type": "application/json", "api-key": api_key or ""}
+        self.key_field = key_field
+        self.fields = tuple(fields)
+        self.batch_size = max(1, min(batch_size, 1000))
+        self.concurrency = max(1, concurrency)
+        if session is None:
+            session = requests.Session()
+            session.mount("https://", HTTPAdapter(pool_maxsize=self.concurrency))
+            session.mount("http://", HTTPAdapter(pool_maxsize=self.concurrency))
+        self.session = session
+        self.caller = ResilientCaller(
+            max_retries=Config.LLM_MAX_RETRIES,
+            base_delay=Config.LLM_RETRY_BASE_DELAY,
+            max_delay=Config.LLM_RETRY_MAX_DELAY,
+            rate=Config.INGEST_UPLOAD_RPS,
+            burst=self.concurrency,
+            failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+            recovery_timeout=Config.CIRCUIT_RECOVERY_SECONDS,
+            decrease_cooldown=Config.LLM_RATE_DECREASE_COOLDOWN
+        )
+        self.uploaded = 0
+        self.deleted = 0
+
+    @classmethod
+    def from_config(cls, **kwargs):
+        # Config의 Azure AI Search 설정으로 업로더를 만드는 함수
+        endpoint = Config.AZURE_SEARCH_ENDPOINT or f"https://{Config.AZURE_SEARCH_SERVICE_NAME}.search.windows.net"
+        return cls(
+            endpoint, Config.AZURE_SEARCH_INDEX_NAME, Config.AZURE_SEARCH_ADMIN_KEY, Config.AZURE_SEARCH_API_VERSION,
+            key_field=Config.AZURE_SEARCH_KEY_FIELD,
+            fields=[field.strip() for field in Config.AZURE_SEARCH_UPLOAD_FIELDS.split(",") if field.strip()],
+            **kwargs
+        )
+
+    def _batches(self, actions):
+        """문서 수와 요청 크기 제한에 맞춘 (직렬화된 요청 본문, 업로드 수, 삭제 수) 목록"""
+        batches = []
+        batch, size = [], 0
+        for action in actions:
+            data = json.dumps(action, ensure_ascii=False)
+            data_size = len(data.encode("utf-8")) + 1
+            if batch and (len(batch) >= self.batch_size or size + data_size > self.MAX_BATCH_BYTES):
+                batches.append(batch)
+                batch, size = [], 0
+            batch.append((action["@search.action"], data))
+            size += data_size
+        if batch:
+            batches.append(batch)
+        return [
+            ('{"value":[' + ",".join(data for _, data in batch) + "]}",
+             sum(1 for action, _ in batch if action != "delete"),
+             sum(1 for action, _ in batch if action == "delete"))
+            for batch in batches
+        ]
+
+    def _post(self, body):
+        """배치 하나를 전송 (일부 문서가 실패하면 SearchIndexingError)"""
+        response = self.session.post(self.url, headers=self.headers, data=body.encode("utf-8"), timeout=Config.HTTP_TIMEOUT)
+        if response.status_code not in (200, 207):
+            response.raise_for_status()
+        failed = [item for item in response.json().get("value", []) if not item.get("status")]
+        if failed:
+            retryable = all(item.get("statusCode") in self.RETRYABLE_ITEM_STATUS for item in failed)
+            first = failed[0]
+            raise SearchIndexingError(
+                f"{len(failed)}개 문서 색인 실패 (예: {first.get('key')} {first.get('statusCode')} {first.get('errorMessage')})",
+                503 if retryable else 400
+            )
+
+    def apply(self, docs, added, removed_ids):
+        # 새로 생기거나 바뀐 청크는 업로드, 없어진 청크는 삭제하는 함수
+        actions = [
+            {"@search.action": "mergeOrUpload", self.key_field: doc["id"], **{field: doc.get(field) for field in self.fields}}
+            for doc in added
+        ]
+        actions.extend({"@search.action": "delete", self.key_field: doc_id} for doc_id in sorted(removed_ids))
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="search-upload") as executor:
+            futures = {
+                executor.submit(self.caller.call, "azure-search-upload", lambda body=body: self._post(body)): (uploads, deletes)
+                for body, uploads, deletes in self._batches(actions)
+            }
+            for future in as_completed(futures):
+                future.result()
+                uploads, deletes = futures[future]
+                self.uploaded += uploads
+                self.deleted += deletes
+
+class ManualIngestor:
+    """PDF 매뉴얼 디렉터리를 청크로 나눠 매뉴얼 색인에 반영하는 증분 수집기
+
+    파일 크기/수정 시각이 그대로면 건너뛰고, 바뀌었으면 파일 해시를 비교해 내용이 바뀐 파일만
+    프로세스 풀에서 페이지 범위 단위로 나눠 텍스트를 추출합니다.
+    청크 ID는 파일 경로, 페이지 번호, 페이지 안의 청크 순번, 청크 내용의 해시라서 내용이 같은 청크는 다시 올리지 않고
+    같은 페이지에 내용이 똑같은 청크가 여러 개 있어도 서로 덮어쓰지 않으며,
+    수집 상태(매니페스트, 청크 목록)는 싱크에 반영한 뒤에만 저장하며, 청크 목록이 없어지거나 잘려
+    매니페스트의 청크 수만큼 읽을 수 없는 파일은 바뀌지 않았더라도 다시 추출합니다.
+    """
+    def __init__(self, source_dir, state_dir, sink, chunk_size=1000, chunk_overlap=200, workers=0):
+        if chunk_overlap >= chunk_size:
+            raise ValueError("chunk_overlap은 chunk_size보다 작아야 합니다.")
+        self.source_dir = source_dir
+        self.sink = sink
+        self.chunk_size = chunk_size
+        self.chunk_overlap = chunk_overlap
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest_path = os.path.join(state_dir, f"ingest_manifest.{sink.name}.json")
+        self.chunks_path = os.path.join(state_dir, f"ingest_chunks.{sink.name}.jsonl")
+
+    def scan(self):
+        # 원본 디렉터리의 PDF 상대 경로 목록 (정렬)
+        paths = []
+        for root, _, names in os.walk(self.source_dir):
+            for name in names:
+                if name.lower().endswith(".pdf"):
+                    paths.append(os.path.relpath(os.path.join(root, name), self.source_dir).replace(os.sep, "/"))
+        return sorted(paths)
+
+    def _load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {"files": {}}
+        with open(self.manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        if manifest.get("version") != MANIFEST_VERSION:
+            return {"files": {}}
+        return manifest
+
+    def _chunk_id(self, source, page, ordinal, chunk):
+        return content_hash(f"{source}\0{page}\0{ordinal}\0{chunk}")[:32]
+
+    def _documents(self, source, pages):
+        """추출한 페이지로 색인 문서(dict) 목록 생성"""
+        title = os.path.splitext(os.path.basename(source))[0]
+        return [
+            {"id": self._chunk_id(source, page, ordinal, chunk), "title": f"{title} p.{page}", "chunk": chunk,
+             "source": source, "page": page}
+            for page, _, chunks in pages for ordinal, chunk in enumerate(chunks)
+        ]
+
+    def _extract(self, executor, paths):
+        """바뀐 파일들을 페이지 범위 작업으로 나눠 추출 ({경로: 페이지 목록}, {경로: 오류})"""
+        errors = {}
+        page_counts = {}
+        futures = {executor.submit(_page_count, os.path.join(self.source_dir, path)): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                page_counts[futures[future]] = future.result()
+            except Exception as e:
+                errors[futures[future]] = str(e)
+
+        futures = {}
+        for path, page_count in page_counts.items():
+            for start in range(0, page_count, PAGES_PER_TASK):
+                future = executor.submit(_extract_pages, os.path.join(self.source_dir, path), start,
+                                         min(start + PAGES_PER_TASK, page_count), self.chunk_size, self.chunk_overlap)
+                futures[future] = path
+        extracted = {path: [] for path in page_counts}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                extracted[path].extend(future.result())
+            except Exception as e:
+                errors.setdefault(path, str(e))
+        for path in errors:
+            extracted.pop(path, None)
+        return {path: sorted(pages) for path, pages in extracted.items()}, errors
+
+    def run(self, force=False):
+        # 수집을 실행하고 통계를 반환하는 함수
+        started = time.perf_counter()
+        manifest = self._load_manifest()
+        old_files = manifest["files"]
+        if (manifest.get("chunk_size"), manifest.get("chunk_overlap")) != (self.chunk_size, self.chunk_overlap):
+            force = True  # 청크 설정이 바뀌면 모든 파일을 다시 청크로 나눔
+        old_docs = _read_jsonl(self.chunks_path)
+        docs_by_source = {}
+        for doc in old_docs:
+            docs_by_source.setdefault(doc["source"], []).append(doc)
+
+        paths = self.scan()
+        files = {}
+        candidates = []
+        # 매니페스트에는 있지만 청크 목록에서 청크를 다시 읽을 수 없는 파일 (청크 파일 삭제/잘림)
+        stale = set()
+        for path in paths:
+            stat = os.stat(os.path.join(self.source_dir, path))
+            entry = old_files.get(path)
+            if entry and len(docs_by_source.get(path, [])) != entry.get("chunk_count"):
+                stale.add(path)
+            if (not force and entry and path not in stale
+                    and entry["size"] == stat.st_size and entry["mtime_ns"] == stat.st_mtime_ns):
+                files[path] = entry
+            else:
+                candidates.append((path, stat))
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            hashes = dict(zip(
+                (path for path, _ in candidates),
+                executor.map(file_hash, [os.path.join(self.source_dir, path) for path, _ in candidates])
+            ))
+            changed = []
+            for path, stat in candidates:
+                entry = old_files.get(path)
+                if not force and entry and path not in stale and entry["sha256"] == hashes[path]:
+                    # 수정 시각만 바뀐 파일
+                    files[path] = {**entry, "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+                else:
+                    changed.append(path)
+            if stale:
+                print(f"저장된 청크를 읽을 수 없는 PDF {len(stale)}개를 다시 추출합니다.")
+            print(f"PDF {len(paths)}개 중 {len(changed)}개 변경, 워커 {self.workers}개로 추출합니다.")
+            extracted, errors = self._extract(executor, changed)
+
+        docs = []
+        changed_pages = 0
+        page_total = 0
+        for path in paths:
+            if path in extracted:
+                pages = extracted[path]
+                old_page_hashes = old_files.get(path, {}).get("page_hashes", [])
+                page_hashes = [page_hash for _, page_hash, _ in pages]
+                changed_pages += sum(
+                    1 for i, page_hash in enumerate(page_hashes)
+                    if force or i >= len(old_page_hashes) or old_page_hashes[i] != page_hash
+                )
+                page_total += len(pages)
+                source_docs = self._documents(path, pages)
+                stat = os.stat(os.path.join(self.source_dir, path))
+                files[path] = {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "sha256": hashes[path],
+                               "page_hashes": page_hashes, "chunk_count": len(source_docs)}
+            elif path in files:
+                source_docs = docs_by_source.get(path, [])
+            elif path in old_files:
+                # 추출에 실패한 파일은 이전에 수집한 청크를 유지
+                files[path] = old_files[path]
+                source_docs = docs_by_source.get(path, [])
+            else:
+                continue
+            docs.extend(source_docs)
+
+        old_ids = {doc["id"] for doc in old_docs}
+        new_ids = {doc["id"] for doc in docs}
+        added = [doc for doc in docs if doc["id"] not in old_ids]
+        removed_ids = old_ids - new_ids
+        if added or removed_ids or not os.path.exists(self.chunks_path):
+            self.sink.apply(docs, added, removed_ids)
+
+        _write_atomic(self.chunks_path, lambda f: f.writelines(
+            json.dumps(doc, ensure_ascii=False) + "\n" for doc in docs
+        ))
+        _write_atomic(self.manifest_path, lambda f: json.dump({
+            "version": MANIFEST_VERSION,
+            "chunk_size": self.chunk_size,
+            "chunk_overlap": self.chunk_overlap,
+            "files": files
+        }, f, ensure_ascii=False, indent=1))
+
+        elapsed = time.perf_counter() - started
+        return {
+            "files": len(paths),
+            "changed_files": len(changed) - len(errors),
+            "failed_files": errors,
+            "removed_files": len(set(old_files) - set(paths)),
+            "pages": page_total,
+            "changed_pages": changed_pages,
+            "chunks": len(docs),
+            "added_chunks": len(added),
+            "removed_chunks": len(removed_ids),
+            "elapsed_seconds": round(elapsed, 2),
+            "pages_per_second": round(page_total / elapsed, 1) if elapsed else 0.0
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 매뉴얼 증분 수집 (청크 분할 후 로컬 BM25 색인 또는 Azure AI Search에 반영)")
+    parser.add_argument("source_dir", help="PDF 매뉴얼 디렉터리 (하위 디렉터리 포함)")
+    parser.add_argument("--sink", choices=["local", "azure"], default=Config.RETRIEVER_BACKEND,
+                        help="반영할 색인 (기본: RETRIEVER_BACKEND)")
+    parser.add_argument("--index-dir", default=Config.LOCAL_INDEX_DIR, help="로컬 색인 디렉터리")
+    parser.add_argument("--state-dir", default=None, help="매니페스트/청크 목록 저장 위치 (기본: --index-dir)")
+    parser.add_argument("--chunk-size", type=int, default=Config.INGEST_CHUNK_SIZE, help="청크 최대 글자 수")
+    parser.add_argument("--chunk-overlap", type=int, default=Config.INGEST_CHUNK_OVERLAP, help="앞 청크와 겹치는 글자 수")
+    parser.add_argument("--workers", type=int, default=Config.INGEST_WORKERS, help="추출 프로세스 수 (0이면 CPU 수)")
+    parser.add_argument("--batch-size", type=int, default=Config.INGEST_UPLOAD_BATCH_SIZE, help="Azure 업로드 배치당 문서 수")
+    parser.add_argument("--concurrency", type=int, default=Config.INGEST_UPLOAD_CONCURRENCY, help="동시에 전송할 업로드 배치 수")
+    parser.add_argument("--force", action="store_true", help="변경 여부와 관계없이 모든 파일을 다시 추출")
+    args = parser.parse_args()
+
+    if args.sink == "azure":
+        sink = AzureSearchUploader.from_config(batch_size=args.batch_size, concurrency=args.concurrency)
+    else:
+        sink = LocalIndexSink(args.index_dir)
+    ingestor = ManualIngestor(args.source_dir, args.state_dir or args.index_dir, sink,
+                              chunk_size=args.chunk_size, chunk_overlap=args.chunk_overlap, workers=args.workers)
+    stats = ingestor.run(force=args.force)
+
+    print(f"[완료] PDF {stats['files']}개 (변경 {stats['changed_files']}, 삭제 {stats['removed_files']}, "
+          f"실패 {len(stats['failed_files'])}) | 페이지 {stats['pages']}개 추출 (변경 {stats['changed_pages']}) | "
+          f"청크 {stats['chunks']}개 (추가 {stats['added_chunks']}, 삭제 {stats['removed_chunks']}) | "
+          f"{stats['elapsed_seconds']}s, {stats['pages_per_second']} pages/s")
+    if isinstance(sink, AzureSearchUploader):
+        print(f"Azure AI Search: 업로드 {sink.uploaded}건, 삭제 {sink.deleted}건")
+    for path, error in stats["failed_files"].items():
+        print(f"[실패] {path}: {error}", file=sys.stderr)
+    sys.exit(1 if stats["failed_files"] else 0)
+
+if __name__ == "__main__":
+    main()
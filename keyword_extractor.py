@@ -0,0 +1,146 @@
+import argparse
+import json
+import math
+import os
+import time
+from collections import Counter
+from config import Config
+from text_utils import tokenize_korean
+
+class LocalKeywordExtractor:
+    """매뉴얼 코퍼스의 용어 통계를 이용한 로컬 검색 키워드 추출기
+    
+    요구사항을 조사/어미를 제거한 토큰으로 나눈 뒤 TF-IDF로 점수를 매깁니다.
+    매뉴얼에 한 번도 나오지 않는 용어는 검색에 도움이 되지 않으므로 점수를 낮춥니다.
+    용어 통계 파일이 없으면 불용어만 제거한 TF 순으로 키워드를 고릅니다.
+    """
+    UNSEEN_TERM_WEIGHT = 0.3
+    
+    def __init__(self, stats_path=None, top_k=8):
+        self.top_k = top_k
+        self.doc_count = 0
+        self.doc_freq = {}
+        
+        if stats_path and os.path.exists(stats_path):
+            with open(stats_path, encoding="utf-8") as f:
+                stats = json.load(f)
+            self.doc_count = stats.get("doc_count", 0)
+            self.doc_freq = stats.get("doc_freq", {})
+    
+    def score_terms(self, text):
+        # 요구사항 토큰별 TF-IDF 점수를 높은 순으로 반환하는 함수
+        tokens = tokenize_korean(text)
+        term_freq = Counter(tokens)
+        first_seen = {token: i for i, token in reversed(list(enumerate(tokens)))}
+        
+        scores = []
+        for term, tf in term_freq.items():
+            score = float(tf)
+            if self.doc_count:
+                df = self.doc_freq.get(term, 0)
+                score *= math.log((self.doc_count + 1) / (df + 1)) + 1.0
+                if df == 0:
+                    score *= self.UNSEEN_TERM_WEIGHT
+            scores.append((term, score, first_seen[term]))
+        
+        # 점수가 같으면 요구사항에 먼저 나온 용어를 우선
+        scores.sort(key=lambda item: (-item[1], item[2]))
+        return [(term, score) for term, score, _ in scores]
+    
+    def extract(self, text):
+        # 검색 키워드 문자열(공백 구분)을 반환하는 함수
+        terms = [term for term, _ in self.score_terms(text)[:self.top_k]]
+        return " ".join(terms) if terms else text.strip()
+    
+    @staticmethod
+    def build_term_stats(texts, stats_path):
+        # 매뉴얼 청크 텍스트들로 문서 빈도 통계 파일을 만드는 함수
+        doc_freq = Counter()
+        doc_count = 0
+        for text in texts:
+            doc_count += 1
+            doc_freq.update(set(tokenize_korean(text)))
+        
+        directory = os.path.dirname(stats_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(stats_path, "w", encoding="utf-8") as f:
+            json.dump({"doc_count": doc_count, "doc_freq": doc_freq}, f, ensure_ascii=False)
+        return doc_count
+
+def keyword_overlap(keywords, reference_keywords):
+    # 두 키워드 문자열의 토큰 겹침 정도 (참조 키워드 재현율, 자카드 유사도)
+    tokens = set(tokenize_korean(keywords))
+    reference = set(tokenize_korean(reference_keywords))
+    if not reference:
+        return {"recall": 0.0, "jaccard": 0.0}
+    common = tokens & reference
+    return {
+        "recall": len(common) / len(reference),
+        "jaccard": len(common) / len(tokens | reference)
+    }
+
+def _read_texts(path, fields):
+    """JSONL 파일에서 지정한 필드 중 처음 발견되는 텍스트를 읽음"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            for field in fields:
+                if record.get(field):
+                    yield record[field]
+                    break
+
+def evaluate(path, limit=None):
+    # 요구사항 JSONL에 대해 로컬 키워드와 LLM 키워드를 비교하는 함수
+    from client_pool import get_pdf_client
+    
+    pdf_client = get_pdf_client()
+    extractor = LocalKeywordExtractor(Config.KEYWORD_STATS_PATH, Config.LOCAL_KEYWORD_TOP_K)
+    rows = []
+    for i, text in enumerate(_read_texts(path, ["requirement", "body", "text", "title"])):
+        if limit and i >= limit:
+            break
+        started = time.perf_counter()
+        local_keywords = extractor.extract(text)
+        local_ms = (time.perf_counter() - started) * 1000
+        
+        started = time.perf_counter()
+        llm_keywords = pdf_client.generate_keywords_with_llm(text) or ""
+        llm_ms = (time.perf_counter() - started) * 1000
+        
+        overlap = keyword_overlap(local_keywords, llm_keywords)
+        rows.append({"local_ms": local_ms, "llm_ms": llm_ms, **overlap})
+        print(f"[{i + 1}] recall={overlap['recall']:.2f} local={local_ms:.1f}ms llm={llm_ms:.0f}ms")
+        print(f"    local: {local_keywords}")
+        print(f"    llm:   {llm_keywords.strip()}")
+    
+    if rows:
+        count = len(rows)
+        print(f"\n평균 재현율 {sum(r['recall'] for r in rows) / count:.2f}, "
+              f"평균 자카드 {sum(r['jaccard'] for r in rows) / count:.2f}, "
+              f"로컬 {sum(r['local_ms'] for r in rows) / count:.1f}ms, "
+              f"LLM {sum(r['llm_ms'] for r in rows) / count:.0f}ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 검색 키워드 추출기 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    stats_parser = subparsers.add_parser("build-stats", help="매뉴얼 청크 JSONL로 용어 통계 생성")
+    stats_parser.add_argument("chunks", help="'chunk' 필드를 가진 JSONL 파일")
+    stats_parser.add_argument("--output", default=Config.KEYWORD_STATS_PATH)
+    
+    eval_parser = subparsers.add_parser("evaluate", help="로컬 키워드와 LLM 키워드 비교")
+    eval_parser.add_argument("requirements", help="요구사항 JSONL 파일")
+    eval_parser.add_argument("--limit", type=int, default=None)
+    
+    args = parser.parse_args()
+    if args.command == "build-stats":
+        doc_count = LocalKeywordExtractor.build_term_stats(_read_texts(args.chunks, ["chunk"]), args.output)
+        print(f"{doc_count}개 청크로 용어 통계를 생성했습니다: {args.output}")
+    else:
+        evaluate(args.requirements, args.limit)
+
+if __name__ == "__main__":
+    main()
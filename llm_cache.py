@@ -0,0 +1,164 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from config import Config
+
+class LLMCache:
+    """SQLite 기반 LLM 응답 캐시
+    
+    모델, 메시지, temperature의 해시를 키로 응답 텍스트를 저장합니다.
+    TTL이 지난 항목은 만료되고, 항목 수/전체 크기 한도를 넘으면 가장 오래 사용되지 않은 항목부터 제거합니다.
+    """
+    def __init__(self, path, ttl_seconds, max_entries, max_bytes, enabled=True):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        
+        if self.enabled:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS llm_cache (
+                    key TEXT PRIMARY KEY,
+                    value TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL,
+                    size INTEGER NOT NULL
+                )"""
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+    
+    @staticmethod
+    def make_key(model, messages, temperature, **extra):
+        # 모델/메시지/temperature(및 추가 옵션)로 캐시 키를 만드는 함수
+        payload = json.dumps(
+            {"model": model, "messages": messages, "temperature": temperature, **extra},
+            ensure_ascii=False,
+            sort_keys=True
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
+    def get(self, key):
+        # 캐시된 응답을 반환하는 함수 (없거나 만료되면 None)
+        if not self.enabled:
+            return None
+        
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            
+            value, created_at = row
+            if now - created_at > self.ttl_seconds:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self.misses += 1
+                return None
+            
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits += 1
+            return value
+    
+    def set(self, key, value):
+        # 응답을 캐시에 저장하고 한도를 넘으면 오래된 항목을 제거하는 함수
+        if not self.enabled or not value:
+            return
+        
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at, size) VALUES (?, ?, ?, ?, ?)",
+                (key, value, now, now, len(value.encode("utf-8")))
+            )
+            self._evict(now)
+    
+    def _evict(self, now):
+        """만료 항목 삭제 후 항목 수/용량 한도를 넘으면 LRU 순으로 제거"""
+        self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl_seconds,))
+        
+        count, total_bytes = self._conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+        ).fetchone()
+        if count <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        
+        to_delete = []
+        for key, size in self._conn.execute("SELECT key, size FROM llm_cache ORDER BY accessed_at ASC"):
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            to_delete.append((key,))
+            count -= 1
+            total_bytes -= size
+        
+        self._conn.executemany("DELETE FROM llm_cache WHERE key = ?", to_delete)
+        self.evictions += len(to_delete)
+    
+    def clear(self):
+        # 캐시 전체 삭제
+        if not self.enabled:
+            return
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+    
+    def stats(self):
+        # 캐시 적중/미적중 통계를 반환하는 함수
+        entries, total_bytes = 0, 0
+        if self.enabled:
+            with self._lock:
+                entries, total_bytes = self._conn.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_cache"
+                ).fetchone()
+        
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "entries": entries,
+            "bytes": total_bytes
+        }
+
+def is_cacheable(content, finish_reason=None, validate=None):
+    """캐시에 저장해도 되는 응답인지 판단
+    
+    비어 있거나 출력 길이 제한으로 잘린 응답(finish_reason="length"), validate를 통과하지 못한 응답은
+    저장하지 않습니다. 저장하면 TTL이 끝날 때까지 같은 요청에 깨진 응답을 계속 돌려주게 됩니다.
+    """
+    if not content or finish_reason == "length":
+        return False
+    return validate is None or bool(validate(content))
+
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_llm_cache():
+    # 프로세스 공유 LLM 캐시 반환
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = LLMCache(
+                path=Config.LLM_CACHE_PATH,
+                ttl_seconds=Config.LLM_CACHE_TTL_SECONDS,
+                max_entries=Config.LLM_CACHE_MAX_ENTRIES,
+                max_bytes=Config.LLM_CACHE_MAX_BYTES,
+                enabled=Config.LLM_CACHE_ENABLED
+            )
+        return _cache
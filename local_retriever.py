@@ -0,0 +1,282 @@
+import argparse
+import heapq
+import json
+import math
+import mmap
+import os
+import threading
+from array import array
+from collections import Counter, defaultdict
+from functools import lru_cache
+from typing import Any, List, Optional
+from pydantic import PrivateAttr
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from config import Config
+from keyword_extractor import LocalKeywordExtractor
+from text_utils import tokenize_korean
+
+INDEX_VERSION = 1
+
+@lru_cache(maxsize=65536)
+def _token_terms(token):
+    """토큰과 토큰 내부 2글자 조각 (색인 시 같은 토큰이 반복되므로 결과 캐시)"""
+    if len(token) > 2:
+        return (token,) + tuple(token[i:i + 2] for i in range(len(token) - 1))
+    return (token,)
+
+def bm25_terms(text):
+    # BM25 색인/검색용 용어 목록 (토큰 + 붙여 쓴 복합어 매칭을 위한 2글자 조각)
+    terms = []
+    for token in tokenize_korean(text):
+        terms.extend(_token_terms(token))
+    return terms
+
+class BM25Index:
+    """디스크에 저장되고 mmap으로 읽는 BM25 역색인
+    
+    색인 디렉터리 구성:
+    - meta.json: 문서 수, 평균 문서 길이, k1/b 파라미터
+    - vocab.json: 용어 → [postings 시작 위치, 문서 빈도]
+    - postings.bin: (문서 번호, 용어 빈도) uint32 쌍
+    - doclens.bin: 문서별 용어 수 (uint32)
+    - docs.bin / docs.idx: 문서 JSON과 uint64 시작 위치
+    
+    파일 핸들과 mmap은 close()(또는 with 블록)로 닫습니다.
+    """
+    MIN_IDF = 0.05
+    
+    def __init__(self, index_dir):
+        self.index_dir = index_dir
+        with open(os.path.join(index_dir, "meta.json"), encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta.get("version") != INDEX_VERSION:
+            raise ValueError(f"지원하지 않는 색인 버전입니다: {meta.get('version')}")
+        
+        self.doc_count = meta["doc_count"]
+        self.avgdl = meta["avgdl"] or 1.0
+        self.k1 = meta["k1"]
+        self.b = meta["b"]
+        with open(os.path.join(index_dir, "vocab.json"), encoding="utf-8") as f:
+            self.vocab = json.load(f)
+        
+        self._files = []
+        self._maps = []
+        self._views = []
+        self._postings = self._map("postings.bin", "I")
+        self._doclens = self._map("doclens.bin", "I")
+        self._doc_offsets = self._map("docs.idx", "Q")
+        self._docs = self._map("docs.bin", None)
+        
+        # 문서 길이 정규화 항은 질의와 무관하므로 미리 계산
+        self._doc_norms = [
+            self.k1 * (1 - self.b + self.b * doclen / self.avgdl) for doclen in self._doclens
+        ]
+    
+    def _map(self, name, typecode):
+        """색인 파일을 읽기 전용 mmap으로 열고 필요하면 정수 배열 뷰로 변환"""
+        path = os.path.join(self.index_dir, name)
+        f = open(path, "rb")
+        self._files.append(f)
+        if os.path.getsize(path) == 0:
+            return memoryview(b"").cast(typecode) if typecode else b""
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(mapped)
+        self._maps.append((mapped, view))
+        if not typecode:
+            return view
+        view = view.cast(typecode)
+        self._views.append(view)
+        return view
+    
+    def close(self):
+        # mmap과 파일 핸들을 닫는 함수 (닫은 뒤에는 검색할 수 없음)
+        for view in self._views:
+            view.release()
+        for mapped, view in self._maps:
+            view.release()
+            mapped.close()
+        for f in self._files:
+            f.close()
+        self._views, self._maps, self._files = [], [], []
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
+    
+    def search(self, query, top_k=5):
+        # 질의와 BM25 점수가 높은 문서를 (문서, 점수) 목록으로 반환하는 함수
+        terms = []
+        for term in set(bm25_terms(query)):
+            entry = self.vocab.get(term)
+            if entry is not None:
+                offset, df = entry
+                terms.append((offset, df, math.log(1 + (self.doc_count - df + 0.5) / (df + 0.5))))
+        # 거의 모든 문서에 나오는 용어는 순위에 영향이 적으므로 건너뜀
+        # (질의가 그런 용어로만 되어 있으면 결과가 비지 않도록 모두 사용)
+        if any(idf >= self.MIN_IDF for _, _, idf in terms):
+            terms = [term for term in terms if term[2] >= self.MIN_IDF]
+        
+        scores = defaultdict(float)
+        k1_plus_1 = self.k1 + 1
+        for offset, df, idf in terms:
+            postings = self._postings[offset * 2:(offset + df) * 2].tolist()
+            norms = self._doc_norms
+            for doc_id, tf in zip(postings[0::2], postings[1::2]):
+                scores[doc_id] += idf * tf * k1_plus_1 / (tf + norms[doc_id])
+        
+        top = heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+        return [(self.get_document(doc_id), score) for doc_id, score in top if score > 0]
+    
+    def get_document(self, doc_id):
+        # 문서 번호로 저장된 문서(JSON)를 읽는 함수
+        start, end = self._doc_offsets[doc_id], self._doc_offsets[doc_id + 1]
+        return json.loads(bytes(self._docs[start:end]).decode("utf-8"))
+    
+    @staticmethod
+    def build(docs, index_dir, k1=1.2, b=0.75, content_key="chunk"):
+        # 문서(dict) 목록으로 색인을 만들어 index_dir에 저장하는 함수
+        # 파일은 임시 파일에 쓴 뒤 교체하므로 기존 색인을 mmap으로 열어 둔 프로세스는 이전 파일을 계속 읽음
+        os.makedirs(index_dir, exist_ok=True)
+        postings = defaultdict(list)
+        doclens = array("I")
+        doc_offsets = array("Q", [0])
+        
+        with open(os.path.join(index_dir, "docs.bin.tmp"), "wb") as docs_file:
+            for doc_id, doc in enumerate(docs):
+                term_freq = Counter(bm25_terms(doc.get(content_key, "")))
+                for term, tf in term_freq.items():
+                    postings[term].append((doc_id, tf))
+                doclens.append(sum(term_freq.values()))
+                
+                data = json.dumps(doc, ensure_ascii=False).encode("utf-8")
+                docs_file.write(data)
+                doc_offsets.append(doc_offsets[-1] + len(data))
+        
+        vocab = {}
+        flat_postings = array("I")
+        for term in sorted(postings):
+            vocab[term] = [len(flat_postings) // 2, len(postings[term])]
+            for doc_id, tf in postings[term]:
+                flat_postings.append(doc_id)
+                flat_postings.append(tf)
+        
+        for name, data in [("postings.bin", flat_postings), ("doclens.bin", doclens), ("docs.idx", doc_offsets)]:
+            with open(os.path.join(index_dir, f"{name}.tmp"), "wb") as f:
+                data.tofile(f)
+        with open(os.path.join(index_dir, "vocab.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump(vocab, f, ensure_ascii=False, separators=(",", ":"))
+        for name in ["docs.bin", "postings.bin", "doclens.bin", "docs.idx", "vocab.json"]:
+            os.replace(os.path.join(index_dir, f"{name}.tmp"), os.path.join(index_dir, name))
+        # meta.json은 마지막에 기록 (색인이 완성되었다는 표시)
+        with open(os.path.join(index_dir, "meta.json.tmp"), "w", encoding="utf-8") as f:
+            json.dump({
+                "version": INDEX_VERSION,
+                "doc_count": len(doclens),
+                "avgdl": sum(doclens) / len(doclens) if doclens else 0.0,
+                "k1": k1,
+                "b": b
+            }, f)
+        os.replace(os.path.join(index_dir, "meta.json.tmp"), os.path.join(index_dir, "meta.json"))
+        return len(doclens)
+
+class LocalBM25Retriever(BaseRetriever):
+    """로컬 BM25 색인을 사용하는 LangChain Retriever (AzureAISearchRetriever 대체용)
+    
+    index_dir이 있으면 수집(ingest_manuals.py)으로 meta.json이 바뀌었을 때 색인을 다시 열고 이전 색인은 닫습니다.
+    """
+    index: Any
+    top_k: int = 5
+    content_key: str = "chunk"
+    index_dir: Optional[str] = None
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+    _index_version: Any = PrivateAttr(default=None)
+    
+    @classmethod
+    def from_index_dir(cls, index_dir, top_k=5, content_key="chunk"):
+        # 색인 디렉터리로부터 Retriever를 만드는 함수
+        version = _index_version(index_dir)
+        retriever = cls(index=BM25Index(index_dir), top_k=top_k, content_key=content_key, index_dir=index_dir)
+        retriever._index_version = version
+        return retriever
+    
+    def _refresh_index(self):
+        """색인이 다시 만들어졌으면 새로 열고 이전 색인을 닫음 (_lock 안에서 호출)"""
+        if self.index_dir is None:
+            return
+        version = _index_version(self.index_dir)
+        if version is None or version == self._index_version:
+            return
+        index = BM25Index(self.index_dir)
+        previous, self.index = self.index, index
+        self._index_version = version
+        previous.close()
+    
+    def close(self):
+        # 색인의 mmap과 파일 핸들을 닫는 함수
+        with self._lock:
+            self.index.close()
+    
+    def _get_relevant_documents(
+        self, query: str, *, run_manager: CallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        # 검색 중인 색인을 닫지 않도록 색인 교체와 검색을 같은 잠금 안에서 수행
+        with self._lock:
+            self._refresh_index()
+            results = self.index.search(query, self.top_k)
+        documents = []
+        for doc, score in results:
+            content = doc.pop(self.content_key, "")
+            # Azure AI Search 결과와 같은 키로 점수 제공
+            doc["@search.score"] = score
+            documents.append(Document(page_content=content, metadata=doc))
+        return documents
+
+def _index_version(index_dir):
+    """색인 버전 표시 (meta.json은 빌드마다 새 파일로 교체되므로 inode와 수정 시각, 색인이 없으면 None)"""
+    try:
+        stat = os.stat(os.path.join(index_dir, "meta.json"))
+    except OSError:
+        return None
+    return stat.st_ino, stat.st_mtime_ns
+
+def _read_chunks(path):
+    """'chunk' 필드를 가진 JSONL 파일에서 문서 읽기"""
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 BM25 매뉴얼 색인 도구")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    
+    build_parser = subparsers.add_parser("build", help="청크 JSONL로 색인 생성")
+    build_parser.add_argument("chunks", help="'chunk' 필드를 가진 JSONL 파일")
+    build_parser.add_argument("--index-dir", default=Config.LOCAL_INDEX_DIR)
+    
+    search_parser = subparsers.add_parser("search", help="색인 검색")
+    search_parser.add_argument("query")
+    search_parser.add_argument("--index-dir", default=Config.LOCAL_INDEX_DIR)
+    search_parser.add_argument("--top-k", type=int, default=Config.PDF_SEARCH_TOP_K)
+    
+    args = parser.parse_args()
+    if args.command == "build":
+        docs = list(_read_chunks(args.chunks))
+        doc_count = BM25Index.build(docs, args.index_dir)
+        # 로컬 키워드 추출기가 사용하는 용어 통계도 함께 생성
+        LocalKeywordExtractor.build_term_stats(
+            (doc.get("chunk", "") for doc in docs),
+            os.path.join(args.index_dir, "term_stats.json")
+        )
+        print(f"{doc_count}개 청크로 색인을 생성했습니다: {args.index_dir}")
+    else:
+        with BM25Index(args.index_dir) as index:
+            for doc, score in index.search(args.query, args.top_k):
+                print(f"{score:.3f}\t{doc.get('chunk', '')[:80]}")
+
+if __name__ == "__main__":
+    main()
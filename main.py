@@ -1,6 +1,15 @@
+import uuid
 import streamlit as st
 from config import Config
-from openai_client import OpenAIClient
+from client_pool import get_openai_client
+from analysis_context import AnalysisContext
+from similarity_store import get_similarity_store
+from checklist_jobs import get_checklist_jobs
+from analysis_history import AnalysisHistory
+from tracing import span, bind_context
+from warmup import get_warmup, start_warmup
+from usage_tracker import UsageMeter, BudgetExceededError, budget_state, check_budget, usage_scope
+from model_router import RouteReport, route_scope
 from result_processor import ResultProcessor
 from ui_components import UIComponents
 
@@ -45,10 +54,11 @@ st.markdown("""
 
 def initialize_session_state():
     """세션 상태 초기화"""
-    if 'analysis_result' not in st.session_state:
-        st.session_state.analysis_result = None
-    if 'result_data' not in st.session_state:
-        st.session_state.result_data = None
+    if 'history' not in st.session_state:
+        # 이번 세션의 분석 히스토리 (새로운 분석을 시작해도 유지)
+        st.session_state.history = AnalysisHistory(Config.HISTORY_MAX_ENTRIES, Config.HISTORY_MAX_BYTES)
+    if 'current_analysis_id' not in st.session_state:
+        st.session_state.current_analysis_id = None
     if 'requirement_input' not in st.session_state:
         st.session_state.requirement_input = ""
     if 'analysis_type' not in st.session_state:
@@ -57,19 +67,254 @@ def initialize_session_state():
         st.session_state.priority_level = ""
     if 'focus_areas' not in st.session_state:
         st.session_state.focus_areas = []
-    if 'checklist' not in st.session_state:
-        st.session_state.checklist = None
-    if 'stats' not in st.session_state:
-        st.session_state.stats = None
+    if 'similar_match' not in st.session_state:
+        st.session_state.similar_match = None
+    if 'checklist_job_key' not in st.session_state:
+        st.session_state.checklist_job_key = None
+    if 'session_id' not in st.session_state:
+        # 프로세스 공유 체크리스트 작업의 owner 구분용
+        st.session_state.session_id = uuid.uuid4().hex
+    if 'traces' not in st.session_state:
+        st.session_state.traces = {}
+    if 'session_usage' not in st.session_state:
+        # 세션 누적 토큰 사용량 (새로운 분석을 시작해도 유지)
+        st.session_state.session_usage = UsageMeter("세션", Config.SESSION_TOKEN_BUDGET)
+
+def start_checklist_job(openai_client, requirement_input, analysis_result):
+    """설정된 경우 분석 결과에 대한 체크리스트를 백그라운드에서 미리 생성
+    
+    토큰 예산이 얼마 남지 않았으면 미리 생성하지 않고, 사용량은 현재 분석/세션에 합산합니다.
+    """
+    if not Config.SPECULATIVE_CHECKLIST_ENABLED or budget_state() != "normal":
+        return
+    checklist_jobs = get_checklist_jobs()
+    key = checklist_jobs.job_key(requirement_input, analysis_result)
+    checklist_jobs.submit(key, bind_context(openai_client.generate_checklist), requirement_input, analysis_result,
+                          owner=st.session_state.session_id)
+    st.session_state.checklist_job_key = key
+
+def cancel_checklist_job():
+    """진행 중인 체크리스트 백그라운드 생성 취소"""
+    get_checklist_jobs().cancel(st.session_state.get('checklist_job_key'), owner=st.session_state.get('session_id'))
+    st.session_state.checklist_job_key = None
+
+def current_entry():
+    """현재 표시 중인 히스토리 항목 (없으면 None)"""
+    return st.session_state.history.get(st.session_state.current_analysis_id)
+
+def select_analysis(entry_id):
+    """히스토리의 다른 분석으로 전환 (모델 호출 없음)"""
+    st.session_state.current_analysis_id = entry_id
+    entry = current_entry()
+    if entry is not None:
+        st.session_state.checklist_job_key = get_checklist_jobs().job_key(entry.requirement_text, entry.analysis_result)
+
+def save_analysis_to_session(result_processor, requirement_input, analysis_result, manual_context, usage=None, routes=None):
+    """분석 결과를 세션 히스토리에 추가하고 현재 분석으로 선택
+    
+    히스토리에는 압축한 분석 결과 하나만 저장하고, 파싱 결과와 요약 통계는 표시할 때 만듭니다.
+    """
+    # 분석 결과 파싱
+    result_data = result_processor.parse_analysis_result(analysis_result)
+    if result_data:
+        st.session_state.current_analysis_id = st.session_state.history.add(
+            requirement_input,
+            st.session_state.analysis_type,
+            st.session_state.focus_areas,
+            analysis_result,
+            manual_context,
+            usage=usage,
+            result_data=result_data,
+            routes=routes
+        )
+    return result_data
+
+def run_analysis(openai_client, result_processor, ui, similarity_store, requirement_input, analysis_type, focus_areas):
+    """토큰 사용량과 단계별 선택 모델을 기록하면서 요구사항 분석 실행 (예산을 모두 사용했으면 거부)"""
+    analysis_usage = UsageMeter("분석", Config.ANALYSIS_TOKEN_BUDGET)
+    routes = RouteReport()
+    try:
+        with usage_scope(st.session_state.session_usage, analysis_usage), route_scope(routes):
+            check_budget("요구사항을 분석")
+            execute_analysis(openai_client, result_processor, ui, similarity_store,
+                             requirement_input, analysis_type, focus_areas, analysis_usage, routes)
+    except BudgetExceededError as e:
+        ui.show_error_message(str(e))
+
+def execute_analysis(openai_client, result_processor, ui, similarity_store, requirement_input, analysis_type, focus_areas,
+                     analysis_usage=None, routes=None):
+    """요구사항 분석을 실행하고 결과를 세션에 저장"""
+    with span("analysis_run", {"analysis.type": analysis_type}) as run_span:
+        # 분석 실행 (매뉴얼 검색 결과는 context에 한 번만 저장되어 재사용)
+        context = AnalysisContext(requirement_input, analysis_type, focus_areas)
+        if Config.STREAMING_ENABLED:
+            # 완성된 항목부터 바로 표시하고, 완료되면 최종 결과 화면으로 교체
+            stream_placeholder = st.empty()
+            with stream_placeholder.container():
+                st.header("📋 분석 결과 (생성 중...)")
+                with ui.show_loading_message("요구사항을 분석하고 있습니다..."):
+                    result_processor.display_analysis_stream(
+                        openai_client.analyze_requirements_stream(
+                            requirement_input,
+                            analysis_type,
+                            focus_areas,
+                            context=context
+                        )
+                    )
+            stream_placeholder.empty()
+            analysis_result = context.analysis_result
+        else:
+            with ui.show_loading_message("요구사항을 분석하고 있습니다..."):
+                analysis_result = openai_client.analyze_requirements(
+                    requirement_input, 
+                    analysis_type, 
+                    focus_areas,
+                    context=context
+                )
+    
+        if analysis_result:
+            # 매뉴얼 컨텍스트 정보 (추가 검색 없음)
+            manual_context = openai_client.get_manual_context(requirement_input, context=context)
+            result_data = save_analysis_to_session(
+                result_processor, requirement_input, analysis_result, manual_context, usage=analysis_usage, routes=routes
+            )
+        
+            # 정상적으로 파싱된 분석만 유사 분석 저장소에 저장
+            if result_data and "raw_text" not in result_data:
+                similarity_store.add(requirement_input, analysis_type, focus_areas, analysis_result, manual_context)
+                start_checklist_job(openai_client, requirement_input, analysis_result)
+        else:
+            ui.show_error_message("분석 결과를 생성할 수 없습니다. OpenAI API 설정을 확인해주세요.")
+    
+    # 디버그 패널에 표시할 이번 실행의 추적 정보
+    if run_span.trace is not None:
+        st.session_state.traces = {"분석": run_span.trace}
+
+@st.fragment
+def input_panel(ui):
+    """요구사항 입력 패널 (입력과 분석 옵션 변경은 이 영역만 다시 실행)
+    
+    분석 버튼을 누르면 입력값을 세션에 남기고 앱 전체를 다시 실행해 분석을 시작합니다.
+    """
+    requirement_input, analysis_type, focus_areas = ui.render_input_section()
+    
+    # 분석 버튼 및 유효성 검사
+    if ui.render_analysis_button(requirement_input):
+        st.session_state.pending_analysis = (requirement_input, analysis_type, focus_areas)
+        st.rerun()
+
+@st.fragment
+def results_section(result_processor):
+    """선택된 분석 결과 표시 (확인 필요사항 페이지 이동은 이 영역만 다시 실행)
+    
+    파싱 결과와 요약 통계는 히스토리 항목에서 계산합니다.
+    """
+    entry = current_entry()
+    if entry is None:
+        return
+    
+    st.header("📋 분석 결과")
+    result_data = entry.result_data
+    stats = result_processor.create_summary_stats(entry.requirement_text, result_data)
+
+    # 매뉴얼 검색 정보 표시 (새로 추가)
+    if entry.manual_context:
+        with st.expander("📚 시스템 매뉴얼 참고 정보"):
+            st.write(f"**검색 키워드:** {entry.manual_context['search_keywords']}")
+    
+    # 요약 통계 표시
+    result_processor.display_summary_stats(
+        stats,
+        analysis_usage=entry.usage.to_dict() if entry.usage else None,
+        session_usage=st.session_state.session_usage.to_dict()
+    )
+    
+    # 단계별 사용 모델 (체크리스트 모델은 체크리스트 영역에 표시)
+    if entry.routes:
+        result_processor.display_model_routes(entry.routes.to_dict(), stages=("keywords", "basic_analysis", "manual_analysis"))
+    
+    st.markdown("---")
+    
+    # 분석 결과 표시
+    result_processor.display_analysis_result(result_data, key_prefix=entry.entry_id)
+    
+    # 분석 인사이트 표시
+    insights = result_processor.get_analysis_insights(stats)
+    if insights:
+        result_processor.display_insights(insights)
+
+@st.fragment
+def checklist_section(ui, result_processor):
+    """체크리스트 생성/표시와 실행 추적 패널 (체크리스트 생성은 이 영역만 다시 실행)"""
+    entry = current_entry()
+    if entry is None:
+        return
+    
+    st.markdown("---")
+    st.subheader("📝 체크리스트 생성")
+    
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        st.write("분석 결과를 바탕으로 실행 가능한 체크리스트를 생성합니다.")
+        if not entry.checklist and get_checklist_jobs().is_ready(st.session_state.checklist_job_key):
+            st.caption("⚡ 체크리스트가 미리 준비되어 있습니다.")
+    with col2:
+        generate_checklist = st.button(
+            "✅ 체크리스트 생성", 
+            type="secondary", 
+            use_container_width=True,
+            key="generate_checklist_btn"
+        )
+    
+    # 체크리스트 생성 버튼이 클릭된 경우
+    if generate_checklist:
+        with ui.show_loading_message("체크리스트를 생성하고 있습니다..."), span("checklist_run") as run_span, \
+                usage_scope(st.session_state.session_usage, entry.usage), route_scope(entry.routes):
+            # 백그라운드 작업이 있으면 완료된 결과를 쓰거나 진행 중인 작업을 기다림
+            checklist = get_checklist_jobs().result(st.session_state.checklist_job_key)
+            run_span.set_attribute("checklist.speculative_hit", bool(checklist))
+            if not checklist:
+                try:
+                    checklist = get_openai_client().generate_checklist(
+                        entry.requirement_text, 
+                        entry.analysis_result, 
+                    )
+                except BudgetExceededError as e:
+                    ui.show_error_message(str(e))
+        if run_span.trace is not None:
+            st.session_state.traces["체크리스트"] = run_span.trace
+        
+        if checklist:
+            st.session_state.history.set_checklist(entry.entry_id, checklist)
+    
+    # 저장된 체크리스트가 있으면 표시
+    checklist = entry.checklist
+    if checklist:
+        st.markdown("---")
+        result_processor.display_checklist(checklist)
+        if entry.routes:
+            result_processor.display_model_routes(entry.routes.to_dict(), stages=("checklist",))
+    
+    # 단계별 실행 추적 디버그 패널
+    if Config.TRACE_PANEL_ENABLED:
+        traces = dict(st.session_state.traces)
+        warmup = get_warmup()
+        if warmup.done and warmup.trace is not None:
+            traces["워밍업"] = warmup.trace
+        ui.render_trace_panel(traces)
 
 def main():
     # 세션 상태 초기화
     initialize_session_state()
     
+    # 설정된 경우 클라이언트 생성과 연결을 백그라운드에서 미리 준비
+    # (OpenAI 클라이언트는 분석/체크리스트 요청 시에 가져오므로 첫 화면은 무거운 import 없이 렌더링)
+    start_warmup()
+    
     # 컴포넌트 초기화
     ui = UIComponents()
-    openai_client = OpenAIClient()
     result_processor = ResultProcessor()
+    similarity_store = get_similarity_store()
     
     # 헤더 렌더링
     ui.render_header()
@@ -81,113 +326,72 @@ def main():
     with col2:
         ui.render_tips()
     
-    # 메인 입력 섹션 렌더링
-    requirement_input, analysis_type, focus_areas = ui.render_input_section()
+    # 메인 입력 섹션 렌더링 (입력/옵션 변경은 입력 패널만 다시 실행)
+    input_panel(ui)
     
-    # 분석 버튼 및 유효성 검사
-    should_analyze = ui.render_analysis_button(requirement_input)
-    
-    # 새로운 분석이 요청된 경우
-    if should_analyze:
-        # 이전 결과 초기화
-        st.session_state.analysis_result = None
-        st.session_state.result_data = None
-        st.session_state.checklist = None
-        st.session_state.stats = None
+    # 새로운 분석이 요청된 경우 (입력 패널의 분석 버튼이 앱 전체를 다시 실행)
+    pending_analysis = st.session_state.pop('pending_analysis', None)
+    if pending_analysis:
+        requirement_input, analysis_type, focus_areas = pending_analysis
+        
+        # 이전 결과 선택 해제 (히스토리에는 남아 있음)
+        cancel_checklist_job()
+        st.session_state.current_analysis_id = None
+        st.session_state.similar_match = None
+        st.session_state.traces = {}
         
         # 현재 입력값들을 세션에 저장
         st.session_state.requirement_input = requirement_input
         st.session_state.analysis_type = analysis_type
         st.session_state.focus_areas = focus_areas
         
-        # 분석 실행
-        with ui.show_loading_message("요구사항을 분석하고 있습니다..."):
-            analysis_result = openai_client.analyze_requirements(
-                requirement_input, 
-                analysis_type, 
-                focus_areas
-            )
-        
-        if analysis_result:
-            # 분석 결과를 세션에 저장
-            st.session_state.analysis_result = analysis_result
-            
-            # 매뉴얼 컨텍스트 정보도 저장
-            manual_context = openai_client.get_manual_context(requirement_input)
-            st.session_state.manual_context = manual_context
-        
-            # 분석 결과 파싱
-            result_data = result_processor.parse_analysis_result(analysis_result)
-            if result_data:
-                st.session_state.result_data = result_data
-                
-                # 요약 통계 생성 및 저장
-                stats = result_processor.create_summary_stats(requirement_input, result_data)
-                st.session_state.stats = stats
+        # 비슷한 요구사항의 이전 분석이 있으면 재사용을 제안하고, 없으면 바로 분석 실행
+        similar_match = similarity_store.find_similar(requirement_input, analysis_type, focus_areas)
+        if similar_match:
+            st.session_state.similar_match = similar_match
         else:
-            ui.show_error_message("분석 결과를 생성할 수 없습니다. OpenAI API 설정을 확인해주세요.")
+            run_analysis(get_openai_client(), result_processor, ui, similarity_store,
+                         requirement_input, analysis_type, focus_areas)
     
-    # 저장된 분석 결과가 있으면 표시
-    if st.session_state.analysis_result and st.session_state.result_data:
-        st.header("📋 분석 결과")
-
-        # 매뉴얼 검색 정보 표시 (새로 추가)
-        if hasattr(st.session_state, 'manual_context') and st.session_state.manual_context:
-            with st.expander("📚 시스템 매뉴얼 참고 정보"):
-                st.write(f"**검색 키워드:** {st.session_state.manual_context['search_keywords']}")
-        
-        # 요약 통계 표시
-        if st.session_state.stats:
-            result_processor.display_summary_stats(st.session_state.stats)
-        
-        st.markdown("---")
-        
-        # 분석 결과 표시
-        result_processor.display_analysis_result(st.session_state.result_data)
-        
-        # 분석 인사이트 표시
-        if st.session_state.stats:
-            insights = result_processor.get_analysis_insights(st.session_state.stats)
-            if insights:
-                result_processor.display_insights(insights)
-        
-        # 체크리스트 생성 섹션
-        st.markdown("---")
-        st.subheader("📝 체크리스트 생성")
-        
-        col1, col2 = st.columns([3, 1])
-        with col1:
-            st.write("분석 결과를 바탕으로 실행 가능한 체크리스트를 생성합니다.")
-        with col2:
-            generate_checklist = st.button(
-                "✅ 체크리스트 생성", 
-                type="secondary", 
-                use_container_width=True,
-                key="generate_checklist_btn"
+    # 유사 분석 재사용 제안 처리
+    if st.session_state.similar_match:
+        choice = ui.render_similar_match(st.session_state.similar_match, st.session_state.requirement_input)
+        if choice == "reuse":
+            match = st.session_state.similar_match
+            st.session_state.similar_match = None
+            analysis_usage = UsageMeter("분석", Config.ANALYSIS_TOKEN_BUDGET)
+            routes = RouteReport()
+            save_analysis_to_session(
+                result_processor, st.session_state.requirement_input,
+                match["analysis_result"], match["manual_context"], usage=analysis_usage, routes=routes
             )
-        
-        # 체크리스트 생성 버튼이 클릭된 경우
-        if generate_checklist:
-            with ui.show_loading_message("체크리스트를 생성하고 있습니다..."):
-                checklist = openai_client.generate_checklist(
-                    st.session_state.requirement_input, 
-                    st.session_state.analysis_result, 
-                )
-            
-            if checklist:
-                st.session_state.checklist = checklist
-        
-        # 저장된 체크리스트가 있으면 표시
-        if st.session_state.checklist:
-            st.markdown("---")
-            result_processor.display_checklist(st.session_state.checklist)
+            with usage_scope(st.session_state.session_usage, analysis_usage), route_scope(routes):
+                start_checklist_job(get_openai_client(), st.session_state.requirement_input, match["analysis_result"])
+            ui.show_success_message(f"이전 분석 결과를 불러왔습니다. (유사도 {match['similarity']:.0%})")
+        elif choice == "new":
+            st.session_state.similar_match = None
+            run_analysis(get_openai_client(), result_processor, ui, similarity_store,
+                         st.session_state.requirement_input,
+                         st.session_state.analysis_type,
+                         st.session_state.focus_areas)
+    
+    # 이번 세션의 이전 분석으로 전환
+    selected_id = ui.render_history_selector(st.session_state.history.entries(), st.session_state.current_analysis_id)
+    if selected_id != st.session_state.current_analysis_id:
+        select_analysis(selected_id)
+    
+    # 선택된 분석 결과가 있으면 표시 (결과 화면과 체크리스트 영역은 각각 따로 다시 실행)
+    if current_entry() is not None:
+        results_section(result_processor)
+        checklist_section(ui, result_processor)
         
         # 새 분석 시작 버튼
         st.markdown("---")
         if st.button("🔄 새로운 분석 시작", type="primary", use_container_width=True):
-            # 세션 상태 초기화
-            for key in ['analysis_result', 'result_data', 'checklist', 'stats', 
-                       'requirement_input', 'analysis_type', 'focus_areas']:
+            # 세션 상태 초기화 (분석 히스토리와 세션 토큰 사용량은 유지)
+            cancel_checklist_job()
+            for key in ['current_analysis_id', 'similar_match', 'requirement_input', 'analysis_type',
+                       'focus_areas', 'traces']:
                 if key in st.session_state:
                     del st.session_state[key]
             st.rerun()
@@ -0,0 +1,180 @@
+import contextvars
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from config import Config
+from resilience import get_llm_caller
+
+# 모델을 나눠 쓸 수 있는 분석 단계
+STAGES = ("keywords", "basic_analysis", "manual_analysis", "checklist")
+STAGE_LABELS = {
+    "keywords": "검색 키워드",
+    "basic_analysis": "기본 분석",
+    "manual_analysis": "매뉴얼 분석",
+    "checklist": "체크리스트"
+}
+
+# 저비용 배포(FAST_DEPLOYMENT_NAME)를 기본으로 쓰는 단계
+FAST_STAGES = ("keywords", "checklist")
+
+# 단계별 기본 배포 p95 지연 기준 (ms, 넘으면 대체 배포 사용, MODEL_ROUTING의 "@ms"로 변경)
+DEFAULT_P95_THRESHOLD_MS = {
+    "keywords": 5000,
+    "basic_analysis": 60000,
+    "manual_analysis": 60000,
+    "checklist": 30000
+}
+
+# 샘플 보관 최대 개수 (단계·배포별)
+MAX_SAMPLES = 200
+
+# 현재 실행에서 단계별 선택 모델을 기록할 report 목록
+_active_reports = contextvars.ContextVar("active_route_reports", default=())
+
+def _percentile(values, pct):
+    """nearest-rank 백분위수"""
+    values = sorted(values)
+    return values[max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))]
+
+def parse_routing(spec, default_model, fast_model=None):
+    """단계별 (기본 배포, 대체 배포, p95 기준 ms) 라우팅 표 생성
+
+    fast_model이 있으면 키워드/체크리스트는 fast_model, 분석은 default_model을 기본으로 쓰고 서로를 대체 배포로 씁니다.
+    spec은 "단계=기본배포>대체배포@p95ms" 를 ";"로 이은 문자열이며, 대체 배포와 기준은 생략할 수 있습니다.
+    (예: "checklist=gpt-4o-mini>gpt-4o@20000;keywords=gpt-4o-mini")
+    """
+    routes = {}
+    for stage in STAGES:
+        if fast_model and fast_model != default_model:
+            primary, fallback = (fast_model, default_model) if stage in FAST_STAGES else (default_model, fast_model)
+        else:
+            primary, fallback = default_model, None
+        routes[stage] = (primary, fallback, DEFAULT_P95_THRESHOLD_MS[stage])
+
+    for item in filter(None, (part.strip() for part in (spec or "").split(";"))):
+        stage, _, target = item.partition("=")
+        stage = stage.strip()
+        if stage not in routes:
+            raise ValueError(f"MODEL_ROUTING에 알 수 없는 단계가 있습니다: {stage} (사용 가능: {', '.join(STAGES)})")
+        target, _, threshold = target.partition("@")
+        primary, _, fallback = target.partition(">")
+        primary = primary.strip() or default_model
+        fallback = fallback.strip() or None
+        routes[stage] = (
+            primary,
+            fallback if fallback != primary else None,
+            float(threshold) if threshold.strip() else routes[stage][2]
+        )
+    return routes
+
+class RouteReport:
+    """분석 1건에서 단계별로 선택한 모델 기록 (체크리스트 생성까지 포함)"""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._routes = {}
+
+    def record(self, decision):
+        with self._lock:
+            self._routes[decision["stage"]] = dict(decision)
+
+    def to_dict(self):
+        # 단계 순서대로 정렬한 {단계: 선택 정보}
+        with self._lock:
+            return {stage: dict(self._routes[stage]) for stage in STAGES if stage in self._routes}
+
+@contextmanager
+def route_scope(*reports):
+    # 블록 안에서 선택한 모델을 reports에도 기록하는 컨텍스트 매니저 (상위 범위의 report는 유지)
+    token = _active_reports.set(_active_reports.get() + tuple(report for report in reports if report is not None))
+    try:
+        yield
+    finally:
+        try:
+            _active_reports.reset(token)
+        except ValueError:
+            # 스트리밍 제너레이터가 다른 컨텍스트에서 정리되는 경우
+            pass
+
+def record_route(stage, model, primary=None, fallback=False, reason="기본 배포"):
+    # 단계의 모델 선택 결과를 현재 범위의 모든 report에 기록하는 함수
+    decision = {"stage": stage, "model": model, "primary": primary or model, "fallback": fallback, "reason": reason}
+    for report in _active_reports.get():
+        report.record(decision)
+    return decision
+
+class ModelRouter:
+    """단계별 모델 라우터 (지연 시간 기반 대체 배포 전환)
+
+    단계·배포별로 최근 window_seconds 동안의 호출 지연 시간을 모아, 기본 배포의 p95가 기준을 넘거나
+    기본 배포의 서킷 브레이커가 열려 있으면 대체 배포를 선택합니다. 대체 배포로 전환한 뒤 기본 배포의
+    샘플이 시간이 지나 min_samples 미만이 되면 다시 기본 배포를 사용합니다.
+    """
+    def __init__(self, routes, window_seconds=300, min_samples=5):
+        self.routes = routes
+        self.window_seconds = window_seconds
+        self.min_samples = min_samples
+        self._samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+        self._lock = threading.Lock()
+
+    def observe(self, stage, model, duration_ms):
+        # 성공한 호출의 지연 시간을 기록하는 함수 (stage가 없으면 무시)
+        if stage is None:
+            return
+        with self._lock:
+            self._samples[(stage, model)].append((time.monotonic(), duration_ms))
+
+    def p95(self, stage, model):
+        # 최근 window_seconds 동안의 p95 지연 시간 (샘플이 min_samples 미만이면 None)
+        with self._lock:
+            samples = self._samples.get((stage, model))
+            if not samples:
+                return None
+            cutoff = time.monotonic() - self.window_seconds
+            while samples and samples[0][0] < cutoff:
+                samples.popleft()
+            if len(samples) < self.min_samples:
+                return None
+            return _percentile([duration for _, duration in samples], 95)
+
+    def select(self, stage):
+        # 단계에 사용할 배포를 고르고 현재 범위의 report에 기록하는 함수
+        primary, fallback, threshold_ms = self.routes[stage]
+        if fallback:
+            caller = get_llm_caller()
+            if caller.breaker_state(primary) == "open" and caller.breaker_state(fallback) != "open":
+                return record_route(stage, fallback, primary, True, "기본 배포 서킷 열림")["model"]
+            p95 = self.p95(stage, primary)
+            if p95 is not None and p95 > threshold_ms:
+                return record_route(stage, fallback, primary, True,
+                                    f"기본 배포 p95 {p95:,.0f}ms > 기준 {threshold_ms:,.0f}ms")["model"]
+        return record_route(stage, primary)["model"]
+
+    def snapshot(self):
+        # 단계별 라우팅 설정과 배포별 p95 (모니터링용)
+        return {
+            stage: {
+                "primary": primary,
+                "fallback": fallback,
+                "p95_threshold_ms": threshold_ms,
+                "primary_p95_ms": self.p95(stage, primary),
+                "fallback_p95_ms": self.p95(stage, fallback) if fallback else None
+            }
+            for stage, (primary, fallback, threshold_ms) in self.routes.items()
+        }
+
+_router = None
+_router_lock = threading.Lock()
+
+def get_model_router():
+    # 프로세스 공유 모델 라우터 반환
+    global _router
+    with _router_lock:
+        if _router is None:
+            _router = ModelRouter(
+                parse_routing(Config.MODEL_ROUTING, Config.DEPLOYMENT_NAME, Config.FAST_DEPLOYMENT_NAME),
+                window_seconds=Config.MODEL_LATENCY_WINDOW_SECONDS,
+                min_samples=Config.MODEL_LATENCY_MIN_SAMPLES
+            )
+        return _router
@@ -1,63 +1,325 @@
-from openai import AzureOpenAI, OpenAI
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from config import Config
 from pdf_search_client import PDFSearchClient
+from analysis_context import AnalysisContext
+from stream_parser import IncrementalJSONParser
+from llm_cache import get_llm_cache, is_cacheable
+from context_packer import ContextPacker, compact_json, count_tokens
+from resilience import get_llm_caller
+from analysis_schema import analysis_response_format, is_valid_analysis, parse_analysis_json
+from analysis_merge import merge_clarifications, merge_issues
+from checklist_builder import checklist_units, item_cache_scope, build_item_messages, parse_item_tasks, assemble_checklist
+from tracing import span, bind_context, current_span, llm_attributes
+from usage_tracker import budget_state, check_budget, record_cache_hit, record_usage, usage_from_response
+from model_router import get_model_router
 import json
+import time
+
+def _attach_script_run_ctx(ctx):
+    # 워커 스레드에서도 st.error/st.warning이 현재 세션에 표시되도록 컨텍스트 연결
+    if ctx is not None:
+        add_script_run_ctx(ctx=ctx)
 
 class OpenAIClient:
-    def __init__(self):
-        # OpenAI 클라이언트 초기화
+    # 항목별 체크리스트 응답에서 빠진 항목을 다시 요청하는 횟수
+    CHECKLIST_ITEM_RETRIES = 1
+    
+    def __init__(self, http_client=None, pdf_client=None):
+        # OpenAI 클라이언트 초기화 (http_client를 넘기면 연결 풀을 공유)
+        # openai 패키지는 가져오는 데 오래 걸리므로 클라이언트를 처음 만들 때 import
+        from openai import AzureOpenAI, OpenAI
         if Config.OPENAI_API_TYPE == "azure":
             self.client = AzureOpenAI(
                 api_key=Config.OPENAI_API_KEY,
                 azure_endpoint=Config.AZURE_OPENAI_ENDPOINT,
-                api_version=Config.OPENAI_API_VERSION
+                api_version=Config.OPENAI_API_VERSION,
+                http_client=http_client,
+                max_retries=0  # 재시도는 공통 호출 계층(resilience)에서 처리
             )
             self.deployment_name = Config.DEPLOYMENT_NAME
         else:
             self.client = OpenAI(
-                api_key=Config.OPENAI_API_KEY
+                api_key=Config.OPENAI_API_KEY,
+                http_client=http_client,
+                max_retries=0
             )
             self.deployment_name = Config.DEPLOYMENT_NAME  # 또는 원하는 모델명
         
         # PDF 검색 클라이언트 초기화
-        self.pdf_client = PDFSearchClient()
+        self.pdf_client = pdf_client if pdf_client is not None else PDFSearchClient(http_client=http_client)
+        
+        # LLM 응답 캐시와 재시도/속도 제한 호출 계층 (프로세스 공유)
+        self.cache = get_llm_cache()
+        self.caller = get_llm_caller()
+        
+        # 단계별 모델 라우터 (키워드/체크리스트는 저비용 배포, 느려지면 대체 배포)
+        self.router = get_model_router()
+    
+    def _select_model(self, stage, model=None):
+        """호출에 사용할 배포 (model 지정 > 단계 라우팅 > 기본 배포)"""
+        if model is not None:
+            return model
+        return self.router.select(stage) if stage else self.deployment_name
     
-    def get_response(self, messages, temperature=None):
-        # OpenAI API를 통해 응답을 받는 함수
+    def warm_up(self):
+        # 모델 목록 조회로 OpenAI 엔드포인트와의 keep-alive 연결을 미리 여는 함수 (토큰 사용 없음)
+        self.client.models.list()
+    
+    def get_response(self, messages, temperature=None, use_cache=True, response_format=None, stage=None, model=None,
+                     validate=None):
+        # OpenAI API를 통해 응답을 받는 함수 (동일한 요청은 캐시에서 반환)
+        # stage를 넘기면 단계별 라우팅으로 배포를 고르고 호출 지연 시간을 라우터에 기록
+        # 잘린 응답이나 validate(content)를 통과하지 못한 응답은 캐시에 저장하지 않음
+        if temperature is None:
+            temperature = Config.DEFAULT_TEMPERATURE
+        
+        model = self._select_model(stage, model)
+        options = {"response_format": response_format} if response_format else {}
+        cache_key = self.cache.make_key(model, messages, temperature, **options)
+        attributes = dict(llm_attributes(model, temperature), **{"gen_ai.route.stage": stage or "default"})
+        with span(f"chat {model}", attributes) as llm_span:
+            if use_cache:
+                cached = self.cache.get(cache_key)
+                llm_span.set_attribute("cache.hit", cached is not None)
+                if cached is not None:
+                    record_cache_hit()
+                    return cached
+                
+            try:
+                # 라우터에는 성공한 시도의 지연 시간만 기록 (속도 제한 대기/재시도 백오프 제외)
+                response = self.caller.call(model, lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    **options
+                ), on_success=lambda latency_ms: self.router.observe(stage, model, latency_ms))
+                usage = usage_from_response(response.usage)
+                if usage:
+                    record_usage(*usage)
+                    llm_span.set_attributes({
+                        "gen_ai.usage.input_tokens": usage[0],
+                        "gen_ai.usage.output_tokens": usage[1],
+                        "gen_ai.usage.cached_input_tokens": usage[2]
+                    })
+                content = response.choices[0].message.content
+                cacheable = is_cacheable(content, response.choices[0].finish_reason, validate)
+                llm_span.set_attribute("cache.stored", cacheable)
+                if cacheable:
+                    self.cache.set(cache_key, content)
+                return content
+            except Exception as e:
+                llm_span.record_exception(e)
+                st.error(f"OpenAI API 오류: {e}")
+                return None
+    
+    def stream_response(self, messages, temperature=None, use_cache=True, response_format=None, stage=None, model=None,
+                        validate=None):
+        # OpenAI API 응답을 토큰이 도착하는 대로 내보내는 함수 (캐시 적중 시 한 번에 반환)
         if temperature is None:
             temperature = Config.DEFAULT_TEMPERATURE
+        
+        model = self._select_model(stage, model)
+        options = {"response_format": response_format} if response_format else {}
+        cache_key = self.cache.make_key(model, messages, temperature, **options)
+        attributes = dict(llm_attributes(model, temperature), **{"gen_ai.request.stream": True, "gen_ai.route.stage": stage or "default"})
+        with span(f"chat {model}", attributes) as llm_span:
+            if use_cache:
+                cached = self.cache.get(cache_key)
+                llm_span.set_attribute("cache.hit", cached is not None)
+                if cached is not None:
+                    record_cache_hit()
+                    yield cached
+                    return
             
-        try:
-            response = self.client.chat.completions.create(
-                model=self.deployment_name,
-                messages=messages,
-                temperature=temperature,
-            )
-            return response.choices[0].message.content
-        except Exception as e:
-            st.error(f"OpenAI API 오류: {e}")
-            return None
+            try:
+                if Config.STREAM_USAGE_ENABLED:
+                    # 마지막 청크로 실제 사용량을 받음
+                    options["stream_options"] = {"include_usage": True}
+                # 재시도는 스트림 연결 단계까지만 적용 (토큰을 내보낸 뒤에는 재시도하지 않음)
+                connected = []
+                stream = self.caller.call(model, lambda: self.client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    temperature=temperature,
+                    stream=True,
+                    **options
+                ), on_success=connected.append)
+                # 성공한 연결 시도의 시작 시각 (속도 제한 대기/재시도 백오프 제외)
+                started = time.monotonic() - connected[0] / 1000
+                chunks = []
+                usage = None
+                finish_reason = None
+                for chunk in stream:
+                    if getattr(chunk, "usage", None):
+                        usage = usage_from_response(chunk.usage)
+                    if chunk.choices and chunk.choices[0].finish_reason:
+                        finish_reason = chunk.choices[0].finish_reason
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        if not chunks:
+                            llm_span.set_attribute("gen_ai.response.time_to_first_token_ms", round(llm_span.duration_ms, 1))
+                        chunks.append(chunk.choices[0].delta.content)
+                        yield chunk.choices[0].delta.content
+                # 스트림이 끝까지 완료되고 잘리지 않은 경우에만 캐시에 저장 (지연 시간은 응답 완료까지)
+                self.router.observe(stage, model, (time.monotonic() - started) * 1000)
+                content = "".join(chunks)
+                cacheable = is_cacheable(content, finish_reason, validate)
+                llm_span.set_attribute("cache.stored", cacheable)
+                if cacheable:
+                    self.cache.set(cache_key, content)
+                # 사용량 정보를 받지 못한 경우 토큰 수를 추정
+                estimated = usage is None
+                if estimated:
+                    usage = (sum(count_tokens(message["content"]) for message in messages), count_tokens(content), 0)
+                record_usage(*usage, estimated=estimated)
+                llm_span.set_attributes({
+                    "gen_ai.usage.input_tokens": usage[0],
+                    "gen_ai.usage.output_tokens": usage[1],
+                    "gen_ai.usage.cached_input_tokens": usage[2],
+                    "gen_ai.usage.estimated": estimated
+                })
+            except Exception as e:
+                llm_span.record_exception(e)
+                st.error(f"OpenAI API 오류: {e}")
     
-    def analyze_requirements(self, requirement_text, analysis_type="기본 분석", focus_areas=None):
+    def analyze_requirements(self, requirement_text, analysis_type="기본 분석", focus_areas=None, context=None):
         # 사용자 요구사항을 분석하고 확인이 필요한 사항들을 찾는 함수
+        # context를 넘기면 매뉴얼 검색 결과가 context에 남아 호출자가 재사용할 수 있음
+        if context is None:
+            context = AnalysisContext(requirement_text, analysis_type, focus_areas)
+        check_budget("요구사항을 분석")
         
-        # 1. 기본 분석 실행
-        basic_analysis = self._basic_analysis(requirement_text, analysis_type, focus_areas)
-        
-        # 2. PDF 매뉴얼 기반 추가 분석 (가능한 경우)
-        manual_analysis = None
-        if self.pdf_client.retriever and self.pdf_client.llm:
-            manual_analysis = self.pdf_client.analyze_with_manual(requirement_text, focus_areas)
+        with span("analyze_requirements", {"analysis.type": analysis_type, "analysis.streaming": False}):
+            # 1. 기본 분석과 매뉴얼 기반 분석(키워드 생성 → 검색 → 분석)을 동시에 실행
+            started_at = time.monotonic()
+            executor = self._create_branch_executor(max_workers=2)
+            try:
+                basic_future = executor.submit(
+                    bind_context(self._basic_analysis), requirement_text, analysis_type, focus_areas
+                )
+                manual_future = None
+                if self._manual_branch_enabled():
+                    manual_future = executor.submit(
+                        bind_context(self._manual_analysis), requirement_text, focus_areas, context
+                    )
+                
+                # 2. 브랜치별 제한 시간 내 결과 수집 (매뉴얼 브랜치가 실패해도 기본 분석은 반환)
+                basic_analysis = self._wait_branch(
+                    basic_future, started_at + Config.BASIC_ANALYSIS_TIMEOUT, "기본 분석"
+                )
+                manual_analysis = self._wait_branch(
+                    manual_future, started_at + Config.MANUAL_ANALYSIS_TIMEOUT, "매뉴얼 기반 분석"
+                )
+            finally:
+                # 제한 시간을 넘긴 브랜치는 기다리지 않음
+                executor.shutdown(wait=False, cancel_futures=True)
+            
+            # 3. 분석 결과 통합
+            context.analysis_result = self._merge_branches(basic_analysis, manual_analysis, context)
+            return context.analysis_result
+    
+    def analyze_requirements_stream(self, requirement_text, analysis_type="기본 분석", focus_areas=None, context=None):
+        # 기본 분석을 스트리밍하면서 완성된 필드/항목을 (필드명, 값) 이벤트로 내보내는 함수
+        # 매뉴얼 기반 분석은 그동안 백그라운드에서 실행되며, 최종 통합 결과는 context.analysis_result에 저장됨
+        if context is None:
+            context = AnalysisContext(requirement_text, analysis_type, focus_areas)
+        check_budget("요구사항을 분석")
         
-        # 3. 분석 결과 통합
-        if manual_analysis:
-            return self._combine_analysis_results(basic_analysis, manual_analysis)
+        with span("analyze_requirements", {"analysis.type": analysis_type, "analysis.streaming": True}):
+            started_at = time.monotonic()
+            executor = self._create_branch_executor(max_workers=1)
+            try:
+                manual_future = None
+                if self._manual_branch_enabled():
+                    manual_future = executor.submit(
+                        bind_context(self._manual_analysis), requirement_text, focus_areas, context
+                    )
+                
+                parser = IncrementalJSONParser()
+                chunks = []
+                with span("basic_analysis"):
+                    messages = self._build_basic_messages(requirement_text, analysis_type, focus_areas)
+                    for token in self.stream_response(messages, response_format=analysis_response_format(),
+                                                      stage="basic_analysis", validate=is_valid_analysis):
+                        chunks.append(token)
+                        for event in parser.feed(token):
+                            yield event
+                basic_analysis = "".join(chunks) or None
+                
+                manual_analysis = self._wait_branch(
+                    manual_future, started_at + Config.MANUAL_ANALYSIS_TIMEOUT, "매뉴얼 기반 분석"
+                )
+            finally:
+                executor.shutdown(wait=False, cancel_futures=True)
+            
+            context.analysis_result = self._merge_branches(basic_analysis, manual_analysis, context)
+    
+    def _manual_branch_enabled(self):
+        """매뉴얼 기반 분석 실행 여부 (토큰 예산이 얼마 남지 않았으면 기본 분석만 실행)"""
+        if not (self.pdf_client.retriever and self.pdf_client.llm):
+            return False
+        if budget_state() != "normal":
+            current_span().set_attribute("budget.downgraded", True)
+            st.warning("토큰 예산이 얼마 남지 않아 매뉴얼 기반 분석을 생략하고 기본 분석만 실행합니다.")
+            return False
+        return True
+    
+    def _create_branch_executor(self, max_workers):
+        """분석 브랜치 실행용 스레드 풀 (현재 Streamlit 세션 컨텍스트 전달)"""
+        return ThreadPoolExecutor(
+            max_workers=max_workers,
+            initializer=_attach_script_run_ctx,
+            initargs=(get_script_run_ctx(suppress_warning=True),)
+        )
+    
+    def _merge_branches(self, basic_analysis, manual_analysis, context=None):
+        """브랜치 결과 통합 (한쪽만 성공한 경우 해당 결과만 반환)"""
+        if manual_analysis and basic_analysis:
+            with span("combine_analysis_results") as combine_span:
+                combined = self._combine_analysis_results(basic_analysis, manual_analysis, context)
+                if context is not None and context.merge_stats:
+                    combine_span.set_attributes({f"merge.{key}": value for key, value in context.merge_stats.items()})
+                return combined
+        elif manual_analysis:
+            return manual_analysis["analysis_result"]
         else:
             return basic_analysis
     
+    def _manual_analysis(self, requirement_text, focus_areas, context):
+        """매뉴얼 검색(분석당 1회) 후 매뉴얼 기반 분석"""
+        with span("manual_analysis"):
+            search_result = context.get_search_result(self.pdf_client)
+            if not search_result:
+                return None
+            return self.pdf_client.analyze_with_manual(
+                requirement_text, focus_areas, search_result=search_result
+            )
+    
+    def _wait_branch(self, future, deadline, branch_name):
+        """분석 브랜치 결과를 제한 시간까지 기다림 (시간 초과/오류 시 None)"""
+        if future is None:
+            return None
+        
+        try:
+            return future.result(timeout=max(0.0, deadline - time.monotonic()))
+        except FutureTimeoutError:
+            future.cancel()
+            st.warning(f"{branch_name}이(가) 제한 시간 내에 완료되지 않아 결과에서 제외합니다.")
+            return None
+        except Exception as e:
+            st.warning(f"{branch_name} 중 오류 발생: {e}")
+            return None
+    
     def _basic_analysis(self, requirement_text, analysis_type, focus_areas):
         """기본 요구사항 분석"""
+        with span("basic_analysis"):
+            messages = self._build_basic_messages(requirement_text, analysis_type, focus_areas)
+            return self.get_response(messages, response_format=analysis_response_format(), stage="basic_analysis",
+                                     validate=is_valid_analysis)
+    
+    def _build_basic_messages(self, requirement_text, analysis_type, focus_areas):
+        """기본 분석 프롬프트 메시지 생성"""
         focus_text = ""
         if focus_areas:
             focus_text = f"\n특히 다음 영역에 집중해서 분석해주세요: {', '.join(focus_areas)}\n"
@@ -108,40 +370,143 @@ class OpenAIClient:
             {"role": "user", "content": base_prompt}
         ]
         
-        return self.get_response(messages)
+        return messages
     
-    def _combine_analysis_results(self, basic_analysis, manual_analysis):
-        """기본 분석과 매뉴얼 기반 분석 결과를 통합"""
+    def _combine_analysis_results(self, basic_analysis, manual_analysis, context=None):
+        """기본 분석과 매뉴얼 기반 분석 결과를 통합 (한쪽 응답이 깨져도 나머지 분석은 유지)
+        
+        두 분석에서 비슷한 확인 질문/잠재적 이슈는 하나로 합치고, context가 있으면 병합 통계를 남깁니다.
+        """
         try:
-            basic_data = json.loads(basic_analysis) if isinstance(basic_analysis, str) else basic_analysis
-            manual_data = json.loads(manual_analysis["analysis_result"]) if isinstance(manual_analysis["analysis_result"], str) else manual_analysis["analysis_result"]
+            basic_data = parse_analysis_json(basic_analysis)
+            manual_data = parse_analysis_json(manual_analysis["analysis_result"])
+            if manual_data is None:
+                st.warning("매뉴얼 기반 분석 결과를 해석할 수 없어 기본 분석 결과만 표시합니다.")
+                return compact_json(basic_data) if basic_data else basic_analysis
+            if basic_data is None:
+                st.warning("기본 분석 결과를 해석할 수 없어 매뉴얼 기반 분석 결과만 표시합니다.")
+                return compact_json(manual_data)
+            
+            clarifications = basic_data.get('clarification_needed', []) + manual_data.get('clarification_needed', [])
+            issues = basic_data.get('potential_issues', []) + manual_data.get('potential_issues', [])
+            merged_clarifications = merge_clarifications(
+                basic_data.get('clarification_needed', []), manual_data.get('clarification_needed', [])
+            )
+            merged_issues = merge_issues(basic_data.get('potential_issues', []), manual_data.get('potential_issues', []))
             
             # 통합된 분석 결과 생성
             combined_result = {
                 "analysis_summary": f"{basic_data.get('analysis_summary', '')}\n\n[매뉴얼 기반 추가 분석]\n{manual_data.get('analysis_summary', '')}",
                 "manual_references": manual_data.get('manual_references', []),
-                "clarification_needed": basic_data.get('clarification_needed', []) + manual_data.get('clarification_needed', []),
-                "potential_issues": basic_data.get('potential_issues', []) + manual_data.get('potential_issues', []),
+                "clarification_needed": merged_clarifications,
+                "potential_issues": merged_issues,
                 "business_impact": f"{basic_data.get('business_impact', '')}\n\n[시스템 연관성]\n{manual_data.get('business_impact', '')}",
                 "manual_search_info": {
                     "search_keywords": manual_analysis["search_info"]["search_keywords"],
                     "doc_count": len(manual_analysis["search_info"]["relevant_docs"])
                 }
             }
+            combined = compact_json(combined_result)
             
-            return json.dumps(combined_result, ensure_ascii=False, indent=2)
+            if context is not None:
+                context.merge_stats = {
+                    "clarifications_before": len(clarifications),
+                    "clarifications_after": len(merged_clarifications),
+                    "issues_before": len(issues),
+                    "issues_after": len(merged_issues),
+                    "tokens_before": count_tokens(compact_json(dict(
+                        combined_result, clarification_needed=clarifications, potential_issues=issues
+                    ))),
+                    "tokens_after": count_tokens(combined)
+                }
+            return combined
             
-        except (json.JSONDecodeError, KeyError, TypeError) as e:
+        except (KeyError, TypeError) as e:
             st.warning(f"분석 결과 통합 중 오류 발생: {e}")
             return basic_analysis
     
     def generate_checklist(self, requirement_text, analysis_result):
         # 분석 결과를 바탕으로 체크리스트를 생성하는 함수
+        # incremental 모드에서는 항목별로 생성/캐시하고, 분석 결과를 해석할 수 없으면 전체 생성으로 대체
+        # (토큰 예산이 얼마 남지 않았으면 설정과 관계없이 incremental 모드 사용)
+        check_budget("체크리스트를 생성")
+        mode = Config.CHECKLIST_MODE if budget_state() == "normal" else "incremental"
+        with span("generate_checklist", {"checklist.mode": mode}):
+            if mode == "incremental":
+                analysis = parse_analysis_json(analysis_result)
+                if analysis is not None:
+                    checklist = self._generate_incremental_checklist(requirement_text, analysis)
+                    if checklist is not None:
+                        return checklist
+                    # 일부 항목의 작업을 만들지 못하면 항목이 빠지지 않도록 전체 생성으로 대체
+                    current_span().set_attribute("checklist.fallback", "full")
+            return self._generate_full_checklist(requirement_text, analysis_result)
+    
+    def _generate_incremental_checklist(self, requirement_text, analysis):
+        """확인사항/이슈별 체크리스트 작업을 내용 해시로 캐시하고, 새로 생기거나 바뀐 항목만 한 번에 생성
+        
+        응답에서 빠진 항목은 한 번 더 요청하고, 그래도 빠진 항목이 있으면 None을 반환합니다.
+        """
+        units = checklist_units(requirement_text, analysis)
+        model = self.router.select("checklist")
+        scope = item_cache_scope(requirement_text)
+        tasks_by_id = {}
+        missing = []
+        for unit in units:
+            unit["cache_key"] = self.cache.make_key(
+                model, unit["hash"], Config.CHECKLIST_TEMPERATURE, kind="checklist_item", **scope
+            )
+            cached = self.cache.get(unit["cache_key"])
+            if cached is not None:
+                tasks_by_id[unit["id"]] = json.loads(cached)
+            else:
+                missing.append(unit)
+        current_span().set_attributes({
+            "checklist.items": len(units),
+            "checklist.cached_items": len(units) - len(missing)
+        })
+        
+        response_format = {"type": "json_object"} if Config.STRUCTURED_OUTPUT_MODE != "off" else None
+        for attempt in range(1 + self.CHECKLIST_ITEM_RETRIES):
+            if not missing:
+                break
+            if attempt:
+                current_span().set_attribute("checklist.retried_items", len(missing))
+            response = self.get_response(
+                build_item_messages(requirement_text, missing),
+                temperature=Config.CHECKLIST_TEMPERATURE,
+                use_cache=False,
+                response_format=response_format,
+                stage="checklist",
+                model=model
+            )
+            generated = parse_item_tasks(response)
+            still_missing = []
+            for unit in missing:
+                tasks = generated.get(unit["id"])
+                if tasks:
+                    tasks_by_id[unit["id"]] = tasks
+                    self.cache.set(unit["cache_key"], json.dumps(tasks, ensure_ascii=False))
+                else:
+                    still_missing.append(unit)
+            missing = still_missing
+        
+        if missing:
+            current_span().set_attribute("checklist.missing_items", len(missing))
+            return None
+        return assemble_checklist(units, tasks_by_id)
+    
+    def _generate_full_checklist(self, requirement_text, analysis_result):
+        """분석 결과 전체로 체크리스트를 한 번에 생성
+        
+        분석 결과는 우선순위 높은 확인사항부터 토큰 예산 안에서 compact JSON으로 포함합니다.
+        """
+        packed_analysis = ContextPacker(Config.CHECKLIST_ANALYSIS_TOKEN_BUDGET).pack_analysis(analysis_result)
         prompt = f"""
 다음 요구사항 분석 결과를 바탕으로 개발자와 기획자가 사용할 수 있는 체크리스트를 생성해주세요.
 
 요구사항: {requirement_text}
-분석 결과: {analysis_result}
+분석 결과: {packed_analysis}
 
 체크리스트는 다음 형식으로 작성해주세요:
 - [ ] 구체적인 확인/작업 항목 (담당자: 기획/개발/디자인)
@@ -167,10 +532,13 @@ class OpenAIClient:
             {"role": "user", "content": prompt}
         ]
         
-        return self.get_response(messages, temperature=Config.CHECKLIST_TEMPERATURE)
+        return self.get_response(messages, temperature=Config.CHECKLIST_TEMPERATURE, stage="checklist",
+                                 validate=lambda content: "- [ ]" in content)
     
-    def get_manual_context(self, requirement_text):
-        """매뉴얼 컨텍스트 정보 반환"""
+    def get_manual_context(self, requirement_text, context=None):
+        """매뉴얼 컨텍스트 정보 반환 (context가 있으면 이미 수행한 검색 결과를 사용)"""
+        if context is not None:
+            return context.manual_context
         if self.pdf_client.retriever:
             return self.pdf_client.get_system_context(requirement_text)
         return None
\ No newline at end of file
@@ -1,84 +1,306 @@
-from langchain_community.retrievers import AzureAISearchRetriever
-from langchain_openai import AzureChatOpenAI
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
+from functools import lru_cache
+from typing import Any, Optional
+import json
+import threading
 import streamlit as st
 from config import Config
+from llm_cache import get_llm_cache, is_cacheable
+from keyword_extractor import LocalKeywordExtractor
+from retrieval_filter import select_documents
+from context_packer import ContextPacker
+from resilience import get_llm_caller
+from analysis_schema import analysis_response_format, is_valid_analysis
+from tracing import span, llm_attributes
+from usage_tracker import record_cache_hit, record_usage, usage_from_metadata
+from model_router import get_model_router, record_route
+
+# LangChain 모듈은 가져오는 데 오래 걸리므로 매뉴얼 검색 경로를 처음 사용할 때 import 합니다.
+
+@lru_cache(maxsize=None)
+def pooled_retriever_class():
+    """공유 requests 세션을 쓰는 AzureAISearchRetriever 하위 클래스 (처음 호출할 때 정의)"""
+    from langchain_community.retrievers import AzureAISearchRetriever
+    
+    class PooledAzureAISearchRetriever(AzureAISearchRetriever):
+        """공유 requests 세션으로 keep-alive 연결을 재사용하는 Azure AI Search Retriever
+        
+        endpoint를 지정하면 서비스 이름 대신 해당 주소(프라이빗 엔드포인트, 프록시 등)로 검색합니다.
+        """
+        session: Any = None
+        endpoint: Optional[str] = None
+        
+        def _build_search_url(self, query):
+            if not self.endpoint:
+                return super()._build_search_url(query)
+            url = f"{self.endpoint.rstrip('/')}/indexes/{self.index_name}/docs?api-version={self.api_version}&search={query}"
+            if self.top_k:
+                url += f"&$top={self.top_k}"
+            if self.filter:
+                url += f"&$filter={self.filter}"
+            return url
+        
+        def _search(self, query):
+            if self.session is None:
+                return super()._search(query)
+            
+            response = self.session.get(
+                self._build_search_url(query),
+                headers=self._headers,
+                timeout=Config.HTTP_TIMEOUT
+            )
+            if response.status_code != 200:
+                raise Exception(f"Error in search request: {response}")
+            
+            return json.loads(response.text)["value"]
+        
+        def warm_up(self):
+            # 문서 수 조회로 검색 서비스와의 keep-alive 연결을 미리 여는 함수
+            if self.session is None:
+                return
+            url = self._build_search_url("*").split("?", 1)[0] + f"/$count?api-version={self.api_version}"
+            self.session.get(url, headers=self._headers, timeout=Config.HTTP_TIMEOUT).raise_for_status()
+    
+    return PooledAzureAISearchRetriever
 
 class PDFSearchClient:
-    def __init__(self):
+    def __init__(self, http_client=None, search_session=None):
         self.config = Config()
+        self.http_client = http_client
+        self.search_session = search_session
+        
+        # Retriever와 LangChain LLM은 매뉴얼 검색 경로에서 처음 사용할 때 생성
+        self._lazy_lock = threading.Lock()
+        self._retriever = None
+        self._llm = None
+        self._retriever_ready = False
+        self._llm_ready = False
+        # 라우팅으로 기본 배포 외의 배포를 쓸 때 만든 LLM (배포 이름별)
+        self._routed_llms = {}
+        
+        # LLM 응답 캐시와 재시도/속도 제한 호출 계층 (프로세스 공유)
+        self.cache = get_llm_cache()
+        self.caller = get_llm_caller()
         
-        # Azure AI Search Retriever 초기화
+        # 단계별 모델 라우터 (키워드 생성은 저비용 배포, 느려지면 대체 배포)
+        self.router = get_model_router()
+        
+        # 검색 키워드 생성기 (local 설정이면 LLM 호출 없이 추출)
+        self.keyword_extractor = None
+        if self.config.KEYWORD_EXTRACTOR == "local":
+            self.keyword_extractor = LocalKeywordExtractor(
+                self.config.KEYWORD_STATS_PATH,
+                self.config.LOCAL_KEYWORD_TOP_K
+            )
+    
+    @property
+    def retriever(self):
+        # 매뉴얼 검색 Retriever (처음 접근할 때 생성, 실패하면 None)
+        if not self._retriever_ready:
+            with self._lazy_lock:
+                if not self._retriever_ready:
+                    self._retriever = self._create_retriever()
+                    self._retriever_ready = True
+        return self._retriever
+    
+    @property
+    def llm(self):
+        # LangChain용 LLM (처음 접근할 때 생성, 실패하면 None)
+        if not self._llm_ready:
+            with self._lazy_lock:
+                if not self._llm_ready:
+                    self._llm = self._create_llm()
+                    self._llm_ready = True
+        return self._llm
+    
+    def _create_retriever(self):
+        """매뉴얼 검색 Retriever 생성 (Azure AI Search 또는 로컬 BM25 색인)"""
         try:
-            self.retriever = AzureAISearchRetriever(
+            if self.config.RETRIEVER_BACKEND == "local":
+                from local_retriever import LocalBM25Retriever
+                return LocalBM25Retriever.from_index_dir(
+                    self.config.LOCAL_INDEX_DIR,
+                    top_k=self.config.PDF_SEARCH_FETCH_K,
+                    content_key="chunk"
+                )
+            return pooled_retriever_class()(
                 service_name=self.config.AZURE_SEARCH_SERVICE_NAME,
                 index_name=self.config.AZURE_SEARCH_INDEX_NAME,
-                top_k=self.config.PDF_SEARCH_TOP_K,
+                top_k=self.config.PDF_SEARCH_FETCH_K,
                 content_key="chunk",
-                api_key=self.config.AZURE_SEARCH_ADMIN_KEY
+                api_key=self.config.AZURE_SEARCH_ADMIN_KEY,
+                api_version=self.config.AZURE_SEARCH_API_VERSION,
+                session=self.search_session,
+                endpoint=self.config.AZURE_SEARCH_ENDPOINT or None
             )
         except Exception as e:
             st.warning(f"PDF 검색 기능을 사용할 수 없습니다: {e}")
-            self.retriever = None
-        
-        # LangChain용 LLM 초기화
+            return None
+    
+    def llm_for(self, model):
+        # 배포별 LangChain LLM (기본 배포는 llm, 다른 배포는 처음 사용할 때 생성)
+        if model == self.config.DEPLOYMENT_NAME:
+            return self.llm
+        with self._lazy_lock:
+            if model not in self._routed_llms:
+                self._routed_llms[model] = self._create_llm(model)
+            return self._routed_llms[model]
+    
+    def _create_llm(self, model=None):
+        """LangChain용 LLM 생성 (model을 지정하지 않으면 기본 배포)"""
+        model = model or self.config.DEPLOYMENT_NAME
         try:
-            self.llm = AzureChatOpenAI(
-                deployment_name=self.config.DEPLOYMENT_NAME,
-                temperature=self.config.DEFAULT_TEMPERATURE
+            from langchain_openai import AzureChatOpenAI, ChatOpenAI
+            if self.config.OPENAI_API_TYPE == "azure":
+                return AzureChatOpenAI(
+                    deployment_name=model,
+                    azure_endpoint=self.config.AZURE_OPENAI_ENDPOINT,
+                    api_key=self.config.OPENAI_API_KEY,
+                    api_version=self.config.OPENAI_API_VERSION,
+                    temperature=self.config.DEFAULT_TEMPERATURE,
+                    http_client=self.http_client,
+                    max_retries=0  # 재시도는 공통 호출 계층(resilience)에서 처리
+                )
+            return ChatOpenAI(
+                model=model,
+                api_key=self.config.OPENAI_API_KEY,
+                temperature=self.config.DEFAULT_TEMPERATURE,
+                http_client=self.http_client,
+                max_retries=0
             )
         except Exception as e:
             st.error(f"LangChain LLM 초기화 실패: {e}")
-            self.llm = None
+            return None
+    
+    def warm_up(self):
+        """매뉴얼 검색 경로 미리 준비 (LangChain import, Retriever/LLM 생성, 검색 서비스 연결)"""
+        # 속성에 처음 접근할 때 LangChain을 import 하고 Retriever/LLM을 생성
+        retriever = self.retriever
+        if self.llm is not None and hasattr(retriever, "warm_up"):
+            retriever.warm_up()
+    
+    def _invoke_chain(self, prompt, inputs, response_format=None, stage=None, validate=None):
+        """프롬프트 | LLM 체인 실행 (동일한 프롬프트는 캐시에서 반환, stage를 넘기면 단계별 라우팅)
+        
+        잘린 응답이나 validate(결과)를 통과하지 못한 응답은 캐시에 저장하지 않습니다.
+        """
+        from langchain_core.output_parsers import StrOutputParser
+        
+        model = self.router.select(stage) if stage else self.config.DEPLOYMENT_NAME
+        messages = [
+            {"role": message.type, "content": message.content}
+            for message in prompt.format_messages(**inputs)
+        ]
+        options = {"response_format": response_format} if response_format else {}
+        cache_key = self.cache.make_key(model, messages, self.config.DEFAULT_TEMPERATURE, **options)
+        attributes = dict(llm_attributes(model, self.config.DEFAULT_TEMPERATURE), **{"gen_ai.route.stage": stage or "default"})
+        with span(f"chat {model}", attributes) as llm_span:
+            cached = self.cache.get(cache_key)
+            llm_span.set_attribute("cache.hit", cached is not None)
+            if cached is not None:
+                record_cache_hit()
+                return cached
+            
+            llm = self.llm_for(model)
+            if llm is None:
+                raise RuntimeError(f"'{model}' 배포의 LLM을 초기화할 수 없습니다.")
+            llm = llm.bind(**options) if options else llm
+            chain = prompt | llm
+            # 라우터에는 성공한 시도의 지연 시간만 기록 (속도 제한 대기/재시도 백오프 제외)
+            message = self.caller.call(model, lambda: chain.invoke(inputs),
+                                       on_success=lambda latency_ms: self.router.observe(stage, model, latency_ms))
+            
+            # AIMessage의 usage_metadata로 토큰 사용량 기록
+            usage = usage_from_metadata(getattr(message, "usage_metadata", None))
+            if usage:
+                record_usage(*usage)
+                llm_span.set_attributes({
+                    "gen_ai.usage.input_tokens": usage[0],
+                    "gen_ai.usage.output_tokens": usage[1],
+                    "gen_ai.usage.cached_input_tokens": usage[2]
+                })
+            result = StrOutputParser().invoke(message)
+            finish_reason = (getattr(message, "response_metadata", None) or {}).get("finish_reason")
+            cacheable = is_cacheable(result, finish_reason, validate)
+            llm_span.set_attribute("cache.stored", cacheable)
+            if cacheable:
+                self.cache.set(cache_key, result)
+            return result
     
     def format_docs(self, docs):
-        """검색된 문서들을 포맷팅"""
-        return "\n\n".join([doc.page_content for doc in docs])
+        """검색된 문서들을 토큰 예산 안에서 순위 순서대로 포맷팅"""
+        return ContextPacker(self.config.MANUAL_CONTEXT_TOKEN_BUDGET).pack_documents(docs)
+    
+    def generate_search_keywords(self, requirement_text):
+        """요구사항에서 매뉴얼 검색 키워드 생성 (설정에 따라 로컬 추출 또는 LLM)"""
+        with span("generate_search_keywords") as keyword_span:
+            keyword_span.set_attribute("keywords.extractor", "local" if self.keyword_extractor is not None else "llm")
+            if self.keyword_extractor is not None:
+                record_route("keywords", "local", reason="로컬 추출 (LLM 호출 없음)")
+                return self.keyword_extractor.extract(requirement_text)
+            return self.generate_keywords_with_llm(requirement_text)
+    
+    def generate_keywords_with_llm(self, requirement_text):
+        """LLM으로 검색 키워드 생성"""
+        if not self.llm:
+            return None
+        
+        # 검색 쿼리 생성 프롬프트
+        from langchain_core.prompts import ChatPromptTemplate
+        search_prompt = ChatPromptTemplate.from_template(
+            """다음 사용자 요구사항과 관련된 시스템 매뉴얼 내용을 검색하기 위한 키워드를 생성해주세요.
+            
+            요구사항: {requirement}
+            
+            검색할 키워드 (한국어): """
+        )
+        
+        return self._invoke_chain(search_prompt, {"requirement": requirement_text}, stage="keywords")
     
     def search_manual_content(self, requirement_text):
         """매뉴얼에서 요구사항과 관련된 내용 검색"""
-        if not self.retriever or not self.llm:
+        if not self.retriever or (self.keyword_extractor is None and not self.llm):
             return None
         
-        try:
-            # 검색 쿼리 생성 프롬프트
-            search_prompt = ChatPromptTemplate.from_template(
-                """다음 사용자 요구사항과 관련된 시스템 매뉴얼 내용을 검색하기 위한 키워드를 생성해주세요.
-                
-                요구사항: {requirement}
-                
-                검색할 키워드 (한국어): """
-            )
-            
-            # 검색 키워드 생성
-            search_chain = search_prompt | self.llm | StrOutputParser()
-            search_keywords = search_chain.invoke({"requirement": requirement_text})
+        with span("search_manual_content") as search_span:
+            try:
+                # 검색 키워드 생성
+                search_keywords = self.generate_search_keywords(requirement_text)
             
-            # 매뉴얼에서 관련 내용 검색
-            docs = self.retriever.invoke(search_keywords)
+                # 매뉴얼에서 관련 내용 검색 후 관련도 임계값/중복 제거/MMR로 프롬프트에 넣을 청크 선별
+                with span("retrieval", {"retrieval.backend": self.config.RETRIEVER_BACKEND}) as retrieval_span:
+                    docs = self.retriever.invoke(search_keywords)
+                    retrieval_span.set_attribute("retrieval.fetched_documents", len(docs))
+                    docs = select_documents(
+                        docs,
+                        threshold=self.config.PDF_SEARCH_THRESHOLD,
+                        max_docs=self.config.PDF_SEARCH_TOP_K,
+                        mmr_lambda=self.config.PDF_SEARCH_MMR_LAMBDA,
+                        dedupe_threshold=self.config.PDF_SEARCH_DEDUPE_THRESHOLD
+                    )
+                    retrieval_span.set_attribute("retrieval.selected_documents", len(docs))
             
-            if not docs:
-                return None
+                if not docs:
+                    return None
             
-            return {
-                "search_keywords": search_keywords,
-                "relevant_docs": docs,
-                "formatted_content": self.format_docs(docs)
-            }
+                return {
+                    "search_keywords": search_keywords,
+                    "relevant_docs": docs,
+                    "formatted_content": self.format_docs(docs)
+                }
             
-        except Exception as e:
-            st.error(f"매뉴얼 검색 중 오류 발생: {e}")
-            return None
+            except Exception as e:
+                search_span.record_exception(e)
+                st.error(f"매뉴얼 검색 중 오류 발생: {e}")
+                return None
     
-    def analyze_with_manual(self, requirement_text, focus_areas=None):
-        """매뉴얼 내용을 참고하여 요구사항 분석"""
+    def analyze_with_manual(self, requirement_text, focus_areas=None, search_result=None):
+        """매뉴얼 내용을 참고하여 요구사항 분석 (search_result를 넘기면 검색을 재사용)"""
         if not self.retriever or not self.llm:
             return None
         
         # 매뉴얼에서 관련 내용 검색
-        search_result = self.search_manual_content(requirement_text)
+        if search_result is None:
+            search_result = self.search_manual_content(requirement_text)
         
         if not search_result:
             return None
@@ -88,6 +310,7 @@ class PDFSearchClient:
             focus_text = f"\n특히 다음 영역에 집중해서 분석해주세요: {', '.join(focus_areas)}\n"
         
         # 매뉴얼 내용을 포함한 분석 프롬프트
+        from langchain_core.prompts import ChatPromptTemplate
         analysis_prompt = ChatPromptTemplate.from_template(
             """당신은 시스템 분석 전문가입니다. 
             사용자 요구사항과 시스템 매뉴얼 내용을 참고하여 구현 전 요청자에게 반드시 확인이 필요한 사항들을 분석해주세요.
@@ -129,28 +352,35 @@ class PDFSearchClient:
             """
         )
         
-        try:
-            # 분석 실행
-            analysis_chain = analysis_prompt | self.llm | StrOutputParser()
-            analysis_result = analysis_chain.invoke({
-                "requirement": requirement_text,
-                "manual_content": search_result["formatted_content"],
-                "focus_text": focus_text
-            })
+        with span("analyze_with_manual") as analysis_span:
+            try:
+                # 분석 실행
+                analysis_result = self._invoke_chain(analysis_prompt, {
+                    "requirement": requirement_text,
+                    "manual_content": search_result["formatted_content"],
+                    "focus_text": focus_text
+                }, response_format=analysis_response_format(), stage="manual_analysis", validate=is_valid_analysis)
             
-            return {
-                "analysis_result": analysis_result,
-                "search_info": search_result
-            }
+                return {
+                    "analysis_result": analysis_result,
+                    "search_info": search_result
+                }
             
-        except Exception as e:
-            st.error(f"매뉴얼 기반 분석 중 오류 발생: {e}")
-            return None
+            except Exception as e:
+                analysis_span.record_exception(e)
+                st.error(f"매뉴얼 기반 분석 중 오류 발생: {e}")
+                return None
     
-    def get_system_context(self, requirement_text):
+    def get_system_context(self, requirement_text, search_result=None):
         """요구사항과 관련된 시스템 컨텍스트 정보 반환"""
-        search_result = self.search_manual_content(requirement_text)
+        if search_result is None:
+            search_result = self.search_manual_content(requirement_text)
         
+        return self.build_system_context(search_result)
+    
+    @staticmethod
+    def build_system_context(search_result):
+        """검색 결과로부터 UI 표시용 시스템 컨텍스트 정보 생성"""
         if not search_result:
             return None
         
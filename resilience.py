@@ -0,0 +1,231 @@
+import random
+import threading
+import time
+from config import Config
+
+# 재시도할 HTTP 상태 코드 (요청 시간 초과, 충돌, 호출 한도 초과, 서버 오류)
+RETRYABLE_STATUS_CODES = {408, 409, 429, 500, 502, 503, 504}
+
+# 상태 코드가 없는 네트워크 계열 예외 이름 (openai/httpx/requests)
+RETRYABLE_ERROR_NAMES = {
+    "APITimeoutError", "APIConnectionError", "TimeoutException", "ConnectTimeout",
+    "ReadTimeout", "ConnectError", "RemoteProtocolError", "Timeout", "ConnectionError"
+}
+
+class CircuitOpenError(Exception):
+    """서킷 브레이커가 열려 있어 호출을 즉시 거절한 경우"""
+    pass
+
+def _status_code(error):
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status
+
+def _retry_after(error):
+    """Retry-After(-ms) 헤더 값(초), 없으면 None"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except (TypeError, ValueError):
+        return None
+    return None
+
+def is_retryable(error):
+    # 재시도로 해결될 수 있는 오류인지 판단하는 함수
+    status = _status_code(error)
+    if status is not None:
+        return status in RETRYABLE_STATUS_CODES
+    return any(cls.__name__ in RETRYABLE_ERROR_NAMES for cls in type(error).__mro__)
+
+class TokenBucket:
+    """429 응답에 맞춰 속도를 조절하는 클라이언트 측 토큰 버킷
+    
+    429를 받으면 초당 요청 수를 절반으로 줄이고, 성공할 때마다 조금씩 다시 늘립니다 (AIMD).
+    동시에 보낸 요청들이 한꺼번에 429를 받아도 속도가 0에 가깝게 떨어지지 않도록
+    decrease_cooldown초 안에는 한 번만 줄입니다.
+    """
+    def __init__(self, rate, capacity, min_rate=0.2, increase_step=0.1, decrease_cooldown=10.0):
+        self.max_rate = rate
+        self.rate = rate
+        self.capacity = capacity
+        self.min_rate = min_rate
+        self.increase_step = increase_step
+        self.decrease_cooldown = decrease_cooldown
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._decreased_at = None
+        self._lock = threading.Lock()
+    
+    def acquire(self):
+        # 토큰을 하나 얻을 때까지 대기하는 함수
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait_time = (1 - self._tokens) / self.rate
+            time.sleep(wait_time)
+    
+    def on_throttled(self):
+        # 429를 받았을 때 속도를 절반으로 줄이는 함수 (직전 감소 후 decrease_cooldown초 안이면 유지)
+        with self._lock:
+            now = time.monotonic()
+            if self._decreased_at is not None and now - self._decreased_at < self.decrease_cooldown:
+                return False
+            self._decreased_at = now
+            self.rate = max(self.min_rate, self.rate / 2)
+            self._tokens = min(self._tokens, 0)
+            return True
+    
+    def on_success(self):
+        with self._lock:
+            self.rate = min(self.max_rate, self.rate + self.increase_step)
+
+class CircuitBreaker:
+    """연속으로 실패한 호출 수가 임계값을 넘으면 일정 시간 호출을 즉시 거절하는 서킷 브레이커
+    
+    복구 대기 시간이 지나면 시험 호출 하나만 허용(half-open)하고, 성공하면 다시 닫습니다.
+    429나 요청 자체의 오류처럼 배포 상태를 알 수 없는 결과는 release로 시험 호출 자리만 돌려줍니다.
+    """
+    def __init__(self, failure_threshold, recovery_timeout):
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+    
+    def allow(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self._opened_at >= self.recovery_timeout:
+                self.state = "half_open"
+                self._trial_in_flight = False
+            if self.state == "half_open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+    
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self._failures = 0
+            self._trial_in_flight = False
+    
+    def release(self):
+        # 상태를 바꾸지 않고 half-open 시험 호출 자리만 돌려주는 함수
+        with self._lock:
+            self._trial_in_flight = False
+    
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == "half_open" or self._failures >= self.failure_threshold:
+                self.state = "open"
+                self._opened_at = time.monotonic()
+                self._trial_in_flight = False
+
+class ResilientCaller:
+    """LLM 호출 공통 계층 (지터 지수 백오프 재시도, 적응형 속도 제한, 서킷 브레이커)
+    
+    속도 제한과 서킷 브레이커는 배포(deployment)별로 따로 관리합니다.
+    """
+    def __init__(self, max_retries, base_delay, max_delay, rate, burst, failure_threshold, recovery_timeout,
+                 decrease_cooldown=10.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._rate = rate
+        self._burst = burst
+        self._failure_threshold = failure_threshold
+        self._recovery_timeout = recovery_timeout
+        self._decrease_cooldown = decrease_cooldown
+        self._buckets = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+    
+    def _get(self, key):
+        with self._lock:
+            if key not in self._buckets:
+                self._buckets[key] = TokenBucket(self._rate, self._burst, decrease_cooldown=self._decrease_cooldown)
+                self._breakers[key] = CircuitBreaker(self._failure_threshold, self._recovery_timeout)
+            return self._buckets[key], self._breakers[key]
+    
+    def breaker_state(self, key):
+        # 배포별 서킷 브레이커 상태 ("closed"/"open"/"half_open")
+        return self._get(key)[1].state
+    
+    def call(self, key, fn, on_success=None):
+        # fn을 재시도/속도 제한/서킷 브레이커를 적용해 실행하는 함수
+        # on_success(latency_ms)는 성공한 시도의 fn 실행 시간만 받음 (토큰 버킷 대기, 재시도 백오프 제외)
+        bucket, breaker = self._get(key)
+        
+        for attempt in range(self.max_retries + 1):
+            if not breaker.allow():
+                raise CircuitOpenError(f"'{key}' 배포가 응답하지 않아 일시적으로 호출을 중단했습니다. 잠시 후 다시 시도해주세요.")
+            bucket.acquire()
+            
+            try:
+                started = time.monotonic()
+                result = fn()
+                latency_ms = (time.monotonic() - started) * 1000
+            except Exception as e:
+                if not is_retryable(e):
+                    # 요청 자체의 오류(400 등)는 배포 장애도 정상 응답도 아니므로 브레이커 상태 유지
+                    breaker.release()
+                    raise
+                
+                if _status_code(e) == 429:
+                    bucket.on_throttled()
+                    breaker.release()
+                elif attempt == self.max_retries or breaker.state == "half_open":
+                    # 배포 장애는 재시도를 모두 소진한 호출 1건당 한 번만 집계
+                    # (요청 하나의 재시도만으로 모든 사용자가 쓰는 브레이커가 열리지 않도록, half-open 시험 호출은 바로 다시 열림)
+                    breaker.record_failure()
+                    raise
+                else:
+                    breaker.release()
+                
+                if attempt == self.max_retries:
+                    raise
+                
+                delay = _retry_after(e)
+                if delay is None:
+                    delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+                time.sleep(min(delay, self.max_delay))
+                continue
+            
+            breaker.record_success()
+            bucket.on_success()
+            if on_success is not None:
+                on_success(latency_ms)
+            return result
+
+_caller = None
+_caller_lock = threading.Lock()
+
+def get_llm_caller():
+    # 프로세스 공유 LLM 호출 계층 반환
+    global _caller
+    with _caller_lock:
+        if _caller is None:
+            _caller = ResilientCaller(
+                max_retries=Config.LLM_MAX_RETRIES,
+                base_delay=Config.LLM_RETRY_BASE_DELAY,
+                max_delay=Config.LLM_RETRY_MAX_DELAY,
+                rate=Config.LLM_RATE_LIMIT_RPS,
+                burst=Config.LLM_RATE_LIMIT_BURST,
+                failure_threshold=Config.CIRCUIT_FAILURE_THRESHOLD,
+                recovery_timeout=Config.CIRCUIT_RECOVERY_SECONDS,
+                decrease_cooldown=Config.LLM_RATE_DECREASE_COOLDOWN
+            )
+        return _caller
@@ -1,8 +1,22 @@
-import json
+import math
 import streamlit as st
 from datetime import datetime
+from config import Config
+from analysis_schema import parse_analysis_json
+from tracing import span
+from model_router import STAGE_LABELS
 
 class ResultProcessor:
+    # 스트리밍 표시용 섹션 제목과 우선순위 아이콘
+    STREAM_SECTION_TITLES = {
+        "manual_references": "📚 시스템 매뉴얼 참고사항",
+        "analysis_summary": "📝 요구사항 요약",
+        "business_impact": "💼 비즈니스 영향도",
+        "clarification_needed": "❓ 확인이 필요한 사항들",
+        "potential_issues": "⚠️ 잠재적 문제점들",
+    }
+    PRIORITY_ICONS = {"높음": "🔴", "보통": "🟡", "낮음": "🟢"}
+    
     def __init__(self):
         pass
     
@@ -12,16 +26,17 @@ class ResultProcessor:
             st.error("분석 결과가 없습니다.")
             return None
         
-        try:
-            # JSON 파싱 시도
-            result_data = json.loads(analysis_result)
-            return result_data
-        except json.JSONDecodeError:
+        # JSON 파싱 시도 (코드 펜스/잘린 응답은 보정 후 스키마 검증)
+        with span("parse_analysis_result") as parse_span:
+            result_data = parse_analysis_json(analysis_result)
+            parse_span.set_attribute("parse.success", result_data is not None)
+        if result_data is None:
             st.warning("JSON 파싱에 실패했습니다. 원본 텍스트를 표시합니다.")
             return {"raw_text": analysis_result}
+        return result_data
     
-    def display_analysis_result(self, result_data):
-        # 분석 결과를 화면에 표시하는 함수
+    def display_analysis_result(self, result_data, key_prefix="analysis"):
+        # 분석 결과를 화면에 표시하는 함수 (key_prefix: 분석별 페이지 선택 위젯 키 접두사)
         if not result_data:
             return
         
@@ -64,18 +79,9 @@ class ResultProcessor:
             ]:
                 if priority_group:
                     st.markdown(f"**우선순위: {priority_name}**")
-                    for i, item in enumerate(priority_group, 1):
-                        category = item.get('category', '기타')
-                        question = item.get('question', '질문 없음')
-                        reason = item.get('reason', '이유 없음')
-                        manual_ref = item.get('manual_reference', '')
-                        
-                        with st.expander(f"[{category}] {question}"):
-                            st.write("**확인이 필요한 이유:**")
-                            st.write(reason)
-                            if manual_ref:
-                                st.write("**매뉴얼 참고사항:**")
-                                st.write(manual_ref)
+                    # 항목이 많으면 우선순위 그룹별로 현재 페이지만 렌더링
+                    for item in self._paginate(priority_group, f"{key_prefix}_clarification_page_{color}"):
+                        self._render_clarification(item)
                     st.markdown("---")
                 
         # 잠재적 이슈
@@ -85,6 +91,70 @@ class ResultProcessor:
             for i, issue in enumerate(issues, 1):
                 st.warning(f"{i}. {issue}")
     
+    @staticmethod
+    def _paginate(items, key):
+        """항목이 페이지 크기보다 많으면 페이지 선택기를 표시하고 현재 페이지 항목만 반환"""
+        page_size = Config.CLARIFICATION_PAGE_SIZE
+        if page_size <= 0 or len(items) <= page_size:
+            return items
+        
+        page_count = math.ceil(len(items) / page_size)
+        page = st.radio(
+            "페이지",
+            range(page_count),
+            format_func=lambda page: f"{page * page_size + 1}–{min((page + 1) * page_size, len(items))}",
+            horizontal=True,
+            label_visibility="collapsed",
+            key=key
+        )
+        st.caption(f"총 {len(items)}건 · {page_size}건씩 표시")
+        return items[page * page_size:(page + 1) * page_size]
+    
+    def display_analysis_stream(self, events):
+        # 스트리밍 이벤트를 받아 완성된 항목부터 점진적으로 표시하는 함수
+        sections = {}
+        counts = {}
+        
+        for key, value in events:
+            # 필드가 처음 도착하면 섹션을 만들고 이후 항목은 같은 섹션에 추가
+            if key not in sections:
+                sections[key] = st.container()
+                title = self.STREAM_SECTION_TITLES.get(key)
+                if title:
+                    sections[key].subheader(title)
+            counts[key] = counts.get(key, 0) + 1
+            
+            with sections[key]:
+                if key == "clarification_needed" and isinstance(value, dict):
+                    priority = value.get('priority', '')
+                    self._render_clarification(value, prefix=self.PRIORITY_ICONS.get(priority, ""))
+                elif key == "potential_issues":
+                    st.warning(f"{counts[key]}. {value}")
+                elif key == "manual_references":
+                    st.info(f"{counts[key]}. {value}")
+                elif key == "analysis_summary":
+                    st.info(value)
+                elif key == "business_impact":
+                    st.write(value)
+    
+    def _render_clarification(self, item, prefix=""):
+        """확인 필요사항 한 건을 expander로 표시"""
+        category = item.get('category', '기타')
+        question = item.get('question', '질문 없음')
+        reason = item.get('reason', '이유 없음')
+        manual_ref = item.get('manual_reference', '')
+        
+        title = f"[{category}] {question}"
+        if prefix:
+            title = f"{prefix} {title}"
+        
+        with st.expander(title):
+            st.write("**확인이 필요한 이유:**")
+            st.write(reason)
+            if manual_ref:
+                st.write("**매뉴얼 참고사항:**")
+                st.write(manual_ref)
+    
     def display_checklist(self, checklist):
         # 체크리스트를 화면에 표시하는 함수
         if not checklist:
@@ -115,8 +185,8 @@ class ResultProcessor:
         
         return stats
     
-    def display_summary_stats(self, stats):
-        # 요약 통계를 표시하는 함수
+    def display_summary_stats(self, stats, analysis_usage=None, session_usage=None):
+        # 요약 통계와 토큰 사용량(이번 분석, 세션 누적)을 표시하는 함수
         col1, col2, col3, col4 = st.columns(4)
         
         with col1:
@@ -131,6 +201,54 @@ class ResultProcessor:
         with col4:
             st.metric("긴급 확인사항", f"{stats['high_priority_count']}개", 
                      delta=None if stats['high_priority_count'] == 0 else "중요!")
+        
+        if analysis_usage is None and session_usage is None:
+            return
+        
+        col1, col2, col3, col4 = st.columns(4)
+        
+        with col1:
+            if analysis_usage is not None:
+                st.metric("분석 토큰", f"{analysis_usage['total_tokens']:,}",
+                          help=self._usage_help(analysis_usage))
+        
+        with col2:
+            if session_usage is not None:
+                st.metric("세션 누적 토큰", f"{session_usage['total_tokens']:,}",
+                          help=self._usage_help(session_usage))
+        
+        with col3:
+            if analysis_usage is not None:
+                st.metric("LLM 호출", f"{analysis_usage['calls']}회",
+                          help=f"캐시 적중 {analysis_usage['cache_hits']}회")
+        
+        with col4:
+            if analysis_usage is not None:
+                st.metric("캐시된 입력 토큰", f"{analysis_usage['cached_tokens']:,}")
+    
+    def display_model_routes(self, routes, stages):
+        # 단계별로 선택된 모델을 표시하는 함수 (대체 배포로 전환된 단계는 이유를 함께 표시)
+        parts = []
+        for stage in stages:
+            route = routes.get(stage)
+            if not route:
+                continue
+            label = f"{STAGE_LABELS.get(stage, stage)} `{route['model']}`"
+            if route['fallback']:
+                label += f" (대체 배포, {route['reason']})"
+            parts.append(label)
+        if parts:
+            st.caption("🧭 사용 모델: " + " · ".join(parts))
+    
+    @staticmethod
+    def _usage_help(usage):
+        """토큰 사용량 metric 도움말 (입력/출력 토큰, 예산, 추정치 여부)"""
+        lines = [f"입력 {usage['prompt_tokens']:,} / 출력 {usage['completion_tokens']:,} 토큰"]
+        if usage['budget']:
+            lines.append(f"예산 {usage['budget']:,} 토큰 중 {usage['total_tokens'] / usage['budget']:.0%} 사용")
+        if usage['estimated_calls']:
+            lines.append(f"스트리밍 호출 {usage['estimated_calls']}회는 추정치")
+        return "\n\n".join(lines)
     
     def get_analysis_insights(self, stats):
         # 분석 결과에 대한 인사이트를 생성하는 함수
@@ -0,0 +1,62 @@
+from text_utils import normalize_text, char_ngrams, cosine_similarity
+
+# 검색 결과 메타데이터에서 점수로 사용할 키 (앞쪽 우선)
+SCORE_KEYS = ["@search.rerankerScore", "@search.score"]
+
+def _relevance_scores(docs):
+    """문서별 관련도를 0~1로 정규화 (최고 점수 대비 비율, 점수가 없으면 순위 기반)
+    
+    점수 기반이면 (점수 목록, True), 순위 기반이면 (점수 목록, False)를 반환합니다.
+    """
+    raw_scores = []
+    for doc in docs:
+        score = next((doc.metadata.get(key) for key in SCORE_KEYS if doc.metadata.get(key) is not None), None)
+        raw_scores.append(score)
+    
+    if any(score is None for score in raw_scores):
+        return [1.0 - i / len(docs) for i in range(len(docs))], False
+    
+    top_score = max(raw_scores)
+    if top_score <= 0:
+        return [0.0 for _ in raw_scores], True
+    return [score / top_score for score in raw_scores], True
+
+def select_documents(docs, threshold=0.0, max_docs=5, mmr_lambda=0.7, dedupe_threshold=0.85):
+    # 검색된 청크에서 관련도 임계값 미만/중복 청크를 제거하고 MMR로 다양한 청크를 고르는 함수
+    if not docs:
+        return []
+    
+    relevance, has_scores = _relevance_scores(docs)
+    if not has_scores:
+        # 검색 점수가 없으면 임계값을 적용할 수 없음
+        threshold = 0.0
+    
+    # 1. 관련도 임계값 적용 + 2. 중복/겹치는 청크 제거 (관련도 높은 청크 우선)
+    candidates = []
+    for doc, score in sorted(zip(docs, relevance), key=lambda item: -item[1]):
+        if score < threshold:
+            continue
+        normalized = normalize_text(doc.page_content)
+        if not normalized:
+            continue
+        vector = char_ngrams(normalized)
+        if any(
+            normalized in kept_text or kept_text in normalized
+            or cosine_similarity(vector, kept_vector) >= dedupe_threshold
+            for _, _, kept_text, kept_vector in candidates
+        ):
+            continue
+        candidates.append((doc, score, normalized, vector))
+    
+    # 3. MMR: 관련도는 높고 이미 고른 청크와는 덜 비슷한 청크부터 선택
+    selected = []
+    while candidates and len(selected) < max_docs:
+        best_index, best_value = 0, None
+        for i, (_, score, _, vector) in enumerate(candidates):
+            redundancy = max((cosine_similarity(vector, chosen[3]) for chosen in selected), default=0.0)
+            value = mmr_lambda * score - (1 - mmr_lambda) * redundancy
+            if best_value is None or value > best_value:
+                best_index, best_value = i, value
+        selected.append(candidates.pop(best_index))
+    
+    return [doc for doc, _, _, _ in selected]
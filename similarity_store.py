@@ -0,0 +1,171 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from config import Config
+from text_utils import normalize_text, collapse_whitespace, char_ngrams, cosine_similarity
+
+class SimilarAnalysisStore:
+    """과거 분석 결과를 문자 n-gram 유사도로 찾아주는 저장소
+    
+    공백, 문장부호, 어순이 조금 다른 요구사항도 찾을 수 있도록 정규화한 요구사항의 문자 bigram
+    역색인으로 후보를 좁힌 뒤 코사인 유사도를 계산합니다. 외부 서비스 없이 로컬에서 동작합니다.
+    정규화는 숫자/문장부호 차이("1.5초"/"15초", "C++"/"C")를 지우므로 유사도 계산에만 쓰고,
+    기존 항목 교체는 공백만 정리한 요구사항 원문이 같을 때만 합니다.
+    """
+    def __init__(self, path, threshold, max_entries, enabled=True):
+        self.path = path
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self._conn = None
+        self._loaded = False
+        self._vectors = {}
+        self._meta = {}
+        self._postings = defaultdict(set)
+        
+        if self.enabled:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    requirement TEXT NOT NULL,
+                    normalized TEXT NOT NULL,
+                    analysis_type TEXT NOT NULL,
+                    focus_key TEXT NOT NULL,
+                    analysis_result TEXT NOT NULL,
+                    manual_context TEXT,
+                    created_at REAL NOT NULL
+                )"""
+            )
+    
+    @staticmethod
+    def _focus_key(focus_areas):
+        return ",".join(sorted(focus_areas or []))
+    
+    def _ensure_loaded(self):
+        """저장된 분석들을 읽어 메모리 색인 구성 (최초 1회)"""
+        if self._loaded:
+            return
+        rows = self._conn.execute(
+            "SELECT id, requirement, normalized, analysis_type, focus_key FROM analyses"
+        ).fetchall()
+        for entry_id, requirement, normalized, analysis_type, focus_key in rows:
+            self._index(entry_id, requirement, normalized, analysis_type, focus_key)
+        self._loaded = True
+    
+    def _index(self, entry_id, requirement, normalized, analysis_type, focus_key):
+        vector = char_ngrams(normalized)
+        self._vectors[entry_id] = vector
+        self._meta[entry_id] = (collapse_whitespace(requirement), analysis_type, focus_key)
+        for gram in vector:
+            self._postings[gram].add(entry_id)
+    
+    def _unindex(self, entry_id):
+        for gram in self._vectors.pop(entry_id, {}):
+            self._postings[gram].discard(entry_id)
+            if not self._postings[gram]:
+                del self._postings[gram]
+        self._meta.pop(entry_id, None)
+    
+    def find_similar(self, requirement_text, analysis_type, focus_areas):
+        # 같은 분석 유형/집중 영역의 과거 분석 중 유사도가 임계값 이상인 가장 비슷한 분석을 반환하는 함수
+        if not self.enabled:
+            return None
+        
+        normalized = normalize_text(requirement_text)
+        vector = char_ngrams(normalized)
+        focus_key = self._focus_key(focus_areas)
+        
+        with self._lock:
+            self._ensure_loaded()
+            
+            candidates = set()
+            for gram in vector:
+                candidates.update(self._postings.get(gram, ()))
+            
+            best_id, best_score = None, 0.0
+            for entry_id in candidates:
+                _, entry_type, entry_focus = self._meta[entry_id]
+                if entry_type != analysis_type or entry_focus != focus_key:
+                    continue
+                score = cosine_similarity(vector, self._vectors[entry_id])
+                if score > best_score:
+                    best_id, best_score = entry_id, score
+            
+            if best_id is None or best_score < self.threshold:
+                return None
+            
+            row = self._conn.execute(
+                "SELECT requirement, analysis_result, manual_context, created_at FROM analyses WHERE id = ?",
+                (best_id,)
+            ).fetchone()
+        
+        requirement, analysis_result, manual_context, created_at = row
+        return {
+            "id": best_id,
+            "requirement": requirement,
+            "analysis_result": analysis_result,
+            "manual_context": json.loads(manual_context) if manual_context else None,
+            "similarity": best_score,
+            "created_at": created_at
+        }
+    
+    def add(self, requirement_text, analysis_type, focus_areas, analysis_result, manual_context=None):
+        # 분석 결과를 저장하는 함수 (공백만 다른 같은 요구사항의 기존 항목은 교체)
+        if not self.enabled or not analysis_result:
+            return
+        
+        normalized = normalize_text(requirement_text)
+        identity = collapse_whitespace(requirement_text)
+        focus_key = self._focus_key(focus_areas)
+        
+        with self._lock:
+            self._ensure_loaded()
+            
+            for entry_id, meta in list(self._meta.items()):
+                if meta == (identity, analysis_type, focus_key):
+                    self._conn.execute("DELETE FROM analyses WHERE id = ?", (entry_id,))
+                    self._unindex(entry_id)
+            
+            cursor = self._conn.execute(
+                """INSERT INTO analyses
+                (requirement, normalized, analysis_type, focus_key, analysis_result, manual_context, created_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    requirement_text, normalized, analysis_type, focus_key, analysis_result,
+                    json.dumps(manual_context, ensure_ascii=False) if manual_context else None,
+                    time.time()
+                )
+            )
+            self._index(cursor.lastrowid, requirement_text, normalized, analysis_type, focus_key)
+            
+            # 최대 개수를 넘으면 가장 오래된 분석부터 삭제
+            overflow = len(self._meta) - self.max_entries
+            if overflow > 0:
+                for entry_id in sorted(self._meta)[:overflow]:
+                    self._conn.execute("DELETE FROM analyses WHERE id = ?", (entry_id,))
+                    self._unindex(entry_id)
+
+_store = None
+_store_lock = threading.Lock()
+
+def get_similarity_store():
+    # 프로세스 공유 유사 분석 저장소 반환
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = SimilarAnalysisStore(
+                path=Config.SIMILARITY_STORE_PATH,
+                threshold=Config.SIMILARITY_THRESHOLD,
+                max_entries=Config.SIMILARITY_STORE_MAX_ENTRIES,
+                enabled=Config.SIMILARITY_STORE_ENABLED
+            )
+        return _store
@@ -0,0 +1,159 @@
+import json
+
+class IncrementalJSONParser:
+    """스트리밍으로 들어오는 JSON 객체에서 완성된 필드를 즉시 꺼내는 파서
+    
+    최상위 객체의 일반 필드는 값이 완성되는 순간 (필드명, 값)으로,
+    배열 필드는 항목 하나가 완성될 때마다 (필드명, 항목)으로 내보냅니다.
+    첫 '{' 이전의 텍스트(마크다운 코드 펜스 등)는 무시합니다.
+    """
+    def __init__(self):
+        self.result = {}
+        self._text = ""
+        self._pos = 0
+        self._depth = 0
+        self._started = False
+        self._in_string = False
+        self._escape = False
+        self._string_start = None
+        self._expect_key = False
+        self._key = None
+        self._awaiting_value = False
+        self._value_start = None
+        self._array_key = None
+        self._awaiting_item = False
+        self._item_start = None
+    
+    @property
+    def done(self):
+        # 최상위 객체가 닫혔는지 여부
+        return self._started and self._depth == 0
+    
+    def feed(self, chunk):
+        # 새로 받은 텍스트 조각을 파싱하고 완성된 (필드명, 값) 이벤트 목록을 반환하는 함수
+        self._text += chunk
+        events = []
+        text = self._text
+        
+        while self._pos < len(text) and not self.done:
+            i = self._pos
+            c = text[i]
+            self._pos += 1
+            
+            if not self._started:
+                if c == "{":
+                    self._started = True
+                    self._depth = 1
+                    self._expect_key = True
+                continue
+            
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif c == "\\":
+                    self._escape = True
+                elif c == '"':
+                    self._in_string = False
+                    self._on_string_end(i, events)
+                continue
+            
+            if c in " \t\r\n":
+                continue
+            
+            # 최상위 필드 값의 시작
+            if self._awaiting_value:
+                self._awaiting_value = False
+                if c == "[":
+                    self._depth += 1
+                    self._array_key = self._key
+                    self.result[self._key] = []
+                    self._awaiting_item = True
+                    continue
+                self._value_start = i
+            
+            # 배열 항목의 시작
+            if self._awaiting_item:
+                if c == "]":
+                    self._close_array()
+                    continue
+                self._awaiting_item = False
+                self._item_start = i
+            
+            if c == '"':
+                self._in_string = True
+                self._string_start = i
+            elif c in "{[":
+                self._depth += 1
+            elif c in "}]":
+                self._on_close(c, i, events)
+            elif c == ",":
+                self._on_comma(i, events)
+            elif c == ":" and self._depth == 1:
+                self._awaiting_value = True
+        
+        return events
+    
+    def _on_string_end(self, i, events):
+        """문자열이 닫혔을 때 키/값/배열 항목 완성 여부 처리"""
+        if self._depth == 1:
+            if self._expect_key:
+                self._key = self._loads(self._string_start, i + 1)
+                self._expect_key = False
+            elif self._value_start == self._string_start:
+                self._emit_value(self._value_start, i + 1, events)
+        elif self._depth == 2 and self._array_key is not None and self._item_start == self._string_start:
+            self._emit_item(self._item_start, i + 1, events)
+    
+    def _on_close(self, c, i, events):
+        """'}' 또는 ']' 처리"""
+        # 숫자/불리언 같은 따옴표 없는 값은 닫는 괄호에서 완성됨
+        if self._depth == 1 and self._value_start is not None:
+            self._emit_value(self._value_start, i, events)
+        if self._depth == 2 and self._array_key is not None and c == "]":
+            if self._item_start is not None:
+                self._emit_item(self._item_start, i, events)
+            self._close_array()
+            return
+        
+        self._depth -= 1
+        if self._depth == 1 and self._array_key is None and self._value_start is not None:
+            self._emit_value(self._value_start, i + 1, events)
+        elif self._depth == 2 and self._array_key is not None and self._item_start is not None:
+            self._emit_item(self._item_start, i + 1, events)
+    
+    def _on_comma(self, i, events):
+        """',' 처리"""
+        if self._depth == 1:
+            if self._value_start is not None:
+                self._emit_value(self._value_start, i, events)
+            self._expect_key = True
+        elif self._depth == 2 and self._array_key is not None:
+            if self._item_start is not None:
+                self._emit_item(self._item_start, i, events)
+            self._awaiting_item = True
+    
+    def _close_array(self):
+        self._depth -= 1
+        self._array_key = None
+        self._awaiting_item = False
+        self._item_start = None
+    
+    def _emit_value(self, start, end, events):
+        value = self._loads(start, end)
+        self._value_start = None
+        if value is not None:
+            self.result[self._key] = value
+            events.append((self._key, value))
+    
+    def _emit_item(self, start, end, events):
+        item = self._loads(start, end)
+        self._item_start = None
+        if item is not None:
+            self.result[self._array_key].append(item)
+            events.append((self._array_key, item))
+    
+    def _loads(self, start, end):
+        try:
+            return json.loads(self._text[start:end])
+        except json.JSONDecodeError:
+            return None
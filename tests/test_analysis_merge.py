@@ -0,0 +1,53 @@
+from analysis_merge import merge_clarifications, merge_issues
+
+def _question(question, reason="", priority="보통", manual_reference=None):
+    item = {"question": question, "reason": reason, "priority": priority}
+    if manual_reference:
+        item["manual_reference"] = manual_reference
+    return item
+
+def test_different_questions_on_same_subject_are_kept():
+    basic = [_question("메인 화면의 어느 위치에 챗봇 링크를 배치해야 하나요?", "배치 위치")]
+    manual = [_question("모바일 화면에서도 챗봇 링크를 노출해야 하나요?", "모바일 노출")]
+    assert len(merge_clarifications(basic, manual)) == 2
+
+    basic = [_question("챗봇 링크 클릭 시 새 창으로 열리나요?")]
+    manual = [_question("챗봇 링크를 누가 볼 수 있나요?")]
+    assert len(merge_clarifications(basic, manual)) == 2
+
+def test_paraphrased_questions_across_sources_are_merged_with_own_reason():
+    basic = [_question("챗봇 링크 클릭 시 새 창으로 열리나요?", "열기 방식", "보통")]
+    manual = [_question("챗봇 링크를 클릭하면 새 창으로 열리나요?", "매뉴얼상 팝업 정책이 화면마다 다르기 때문",
+                        "높음", "3.2 팝업 정책")]
+    merged = merge_clarifications(basic, manual)
+    assert len(merged) == 1
+    assert merged[0]["question"] == "챗봇 링크 클릭 시 새 창으로 열리나요?"
+    assert merged[0]["reason"] == "열기 방식"
+    assert merged[0]["priority"] == "높음"
+    assert merged[0]["manual_reference"] == "3.2 팝업 정책"
+
+def test_questions_within_one_analysis_are_not_merged():
+    basic = [
+        _question("챗봇 링크 클릭 시 새 창으로 열리나요?"),
+        _question("챗봇 링크를 클릭하면 새 창으로 열리나요?")
+    ]
+    assert len(merge_clarifications(basic, [])) == 2
+
+def test_match_is_required_against_every_cluster_member():
+    # 세 번째 항목은 한쪽과만 비슷하므로 이미 만들어진 묶음에 들어가지 않음
+    basic = [_question("챗봇 링크 클릭 시 새 창으로 열리나요?")]
+    manual = [
+        _question("챗봇 링크를 클릭하면 새 창으로 열리나요?"),
+        _question("챗봇 링크를 누가 볼 수 있나요?")
+    ]
+    merged = merge_clarifications(basic, manual)
+    assert [item["question"] for item in merged] == [
+        "챗봇 링크 클릭 시 새 창으로 열리나요?",
+        "챗봇 링크를 누가 볼 수 있나요?"
+    ]
+
+def test_merge_issues_keeps_longer_sentence_across_sources_only():
+    basic = ["권한이 없는 사용자에게 링크가 노출될 수 있음", "권한이 없는 사용자에게 링크가 노출될 수 있음"]
+    manual = ["권한이 없는 사용자에게 챗봇 링크가 노출될 수 있음"]
+    merged = merge_issues(basic, manual)
+    assert merged == ["권한이 없는 사용자에게 챗봇 링크가 노출될 수 있음", "권한이 없는 사용자에게 링크가 노출될 수 있음"]
@@ -0,0 +1,42 @@
+import json
+from analysis_schema import parse_analysis_json, repair_json
+
+def _repaired(text):
+    return json.loads(repair_json(text))
+
+def test_code_fence_and_surrounding_text_are_removed():
+    text = '분석 결과입니다.\n```json\n{"analysis_summary": "요약", "potential_issues": []}\n```\n참고하세요.'
+    assert _repaired(text) == {"analysis_summary": "요약", "potential_issues": []}
+
+    text = '결과: {"analysis_summary": "요약"} 이상입니다. {"other": 1}'
+    assert _repaired(text) == {"analysis_summary": "요약"}
+
+def test_trailing_commas_are_removed():
+    assert _repaired('{"items": [1, 2, ], "name": "a", }') == {"items": [1, 2], "name": "a"}
+
+def test_truncated_array_and_string_are_closed():
+    text = '{"analysis_summary": "요약", "potential_issues": ["첫 번째 위험", "두 번째 위'
+    assert _repaired(text) == {"analysis_summary": "요약", "potential_issues": ["첫 번째 위험", "두 번째 위"]}
+
+def test_dangling_key_and_partial_literal_are_dropped():
+    assert _repaired('{"analysis_summary": "요약", "business_impact":') == {"analysis_summary": "요약"}
+    assert _repaired('{"analysis_summary": "요약", "business_imp') == {"analysis_summary": "요약"}
+    assert _repaired('{"count": 3, "done": tr') == {"count": 3}
+    assert _repaired('{"items": [{"question": "q", "priority": "높음"}, {"quest') == {
+        "items": [{"question": "q", "priority": "높음"}, {}]
+    }
+
+def test_escaped_quotes_and_braces_in_strings_are_kept():
+    text = '{"analysis_summary": "\\"따옴표\\"와 {중괄호}], 포함", "potential_issues": ["a\\\\'
+    assert _repaired(text) == {"analysis_summary": '"따옴표"와 {중괄호}], 포함', "potential_issues": ["a\\"]}
+
+def test_text_without_object_is_not_repaired():
+    assert repair_json("") is None
+    assert repair_json("분석할 수 없습니다.") is None
+    assert parse_analysis_json("분석할 수 없습니다.") is None
+
+def test_truncated_response_is_normalized():
+    result = parse_analysis_json('```json\n{"analysis_summary": "요약", "clarification_needed": [{"question": "q", "priority": "high"},')
+    assert result["analysis_summary"] == "요약"
+    assert result["clarification_needed"][0]["question"] == "q"
+    assert result["clarification_needed"][0]["priority"] == "높음"
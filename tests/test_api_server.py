@@ -0,0 +1,55 @@
+import asyncio
+import threading
+import time
+import pytest
+from aiohttp.test_utils import TestClient, TestServer
+import api_server
+from api_server import request_key
+
+class _FakeClient:
+    def __init__(self):
+        self.calls = []
+        self._lock = threading.Lock()
+
+    def get_manual_context(self, requirement):
+        with self._lock:
+            self.calls.append(requirement)
+        time.sleep(0.2)
+        return [{"content": requirement}]
+
+@pytest.fixture
+def service(monkeypatch):
+    fake = _FakeClient()
+    monkeypatch.setattr(api_server, "get_openai_client", lambda: fake)
+    return api_server.AnalysisService(workers=4)
+
+def _post_together(service, requirements):
+    async def run():
+        client = TestClient(TestServer(service.create_app()))
+        await client.start_server()
+        try:
+            async def post(requirement):
+                response = await client.post("/manual-context", json={"requirement": requirement})
+                return await response.json()
+            return await asyncio.gather(*(post(requirement) for requirement in requirements))
+        finally:
+            await client.close()
+    return asyncio.run(run())
+
+@pytest.mark.parametrize("first, second", [
+    ("타임아웃을 1.5초로 설정해주세요", "타임아웃을 15초로 설정"),
+    ("C++ 빌드 단계를 추가해주세요", "C 빌드 단계를 추가해주세요"),
+    ("A/B 테스트 화면을 추가", "AB 테스트 화면을 추가"),
+])
+def test_requirements_differing_in_number_or_punctuation_are_not_coalesced(service, first, second):
+    assert request_key("manual_context", first) != request_key("manual_context", second)
+
+    results = _post_together(service, [first, second])
+    assert [result["coalesced"] for result in results] == [False, False]
+    assert [result["manual_context"][0]["content"] for result in results] == [first, second]
+    assert sorted(service.openai_client.calls) == sorted([first, second])
+
+def test_identical_requirements_are_coalesced(service):
+    results = _post_together(service, ["타임아웃을 1.5초로 설정해주세요", "  타임아웃을 1.5초로\n설정해주세요 "])
+    assert sorted(result["coalesced"] for result in results) == [False, True]
+    assert len(service.openai_client.calls) == 1
@@ -0,0 +1,49 @@
+import json
+import pytest
+import batch_runner
+from batch_runner import BatchRunner
+
+class _FakeClient:
+    def __init__(self):
+        self.requirements = []
+
+    def analyze_requirements(self, requirement_text, analysis_type, focus_areas, context=None):
+        self.requirements.append(requirement_text)
+        return json.dumps({"analysis_summary": requirement_text}, ensure_ascii=False)
+
+@pytest.fixture
+def fake_client(monkeypatch):
+    client = _FakeClient()
+    monkeypatch.setattr(batch_runner, "get_openai_client", lambda: client)
+    return client
+
+def _write_input(path, records):
+    path.write_text("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records), encoding="utf-8")
+
+def test_duplicate_ids_are_rejected_before_processing(tmp_path, fake_client):
+    input_path = tmp_path / "input.jsonl"
+    _write_input(input_path, [
+        {"id": "REQ-1", "requirement": "타임아웃을 1.5초로 설정"},
+        {"id": "REQ-2", "requirement": "타임아웃을 15초로 설정"},
+        {"id": "REQ-1", "requirement": "C++ 빌드 단계 추가"},
+    ])
+    runner = BatchRunner(str(input_path), str(tmp_path / "output.jsonl"), workers=2)
+    with pytest.raises(ValueError, match=r"REQ-1 \(1행, 3행\)"):
+        runner.run()
+    assert fake_client.requirements == []
+    assert not (tmp_path / "output.jsonl").exists()
+
+def test_unique_ids_are_processed_and_resumed(tmp_path, fake_client):
+    input_path = tmp_path / "input.jsonl"
+    output_path = tmp_path / "output.jsonl"
+    _write_input(input_path, [
+        {"id": "REQ-1", "requirement": "타임아웃을 1.5초로 설정"},
+        {"requirement": "타임아웃을 15초로 설정"},
+    ])
+    stats = BatchRunner(str(input_path), str(output_path), workers=2).run()
+    assert (stats["completed"], stats["skipped"]) == (2, 0)
+    ids = sorted(json.loads(line)["id"] for line in output_path.read_text(encoding="utf-8").splitlines())
+    assert ids == ["REQ-1", "line-2"]
+
+    stats = BatchRunner(str(input_path), str(output_path), workers=2).run()
+    assert (stats["completed"], stats["skipped"]) == (0, 2)
@@ -0,0 +1,48 @@
+import json
+import random
+import pytest
+from context_packer import ContextPacker, count_tokens, truncate_to_tokens
+
+def _analysis(rng, size):
+    words = ["요구사항", "챗봇", "링크", "메인 화면", "권한", "timeout", "API", "설정", "\"인용\"", "C++"]
+    text = lambda n: " ".join(rng.choice(words) for _ in range(n))
+    return {
+        "analysis_summary": text(size * 3),
+        "clarification_needed": [
+            {"category": text(2), "question": text(8), "reason": text(10), "priority": rng.choice(["높음", "보통", "낮음"])}
+            for _ in range(size)
+        ],
+        "potential_issues": [text(6) for _ in range(size)],
+        "manual_references": [text(4) for _ in range(size // 2)],
+        "business_impact": text(size * 3),
+    }
+
+def test_small_analysis_is_kept_whole():
+    analysis = {"analysis_summary": "요약", "clarification_needed": [{"question": "q", "priority": "높음"}]}
+    packed = ContextPacker(1000).pack_analysis(analysis)
+    assert json.loads(packed)["clarification_needed"][0]["question"] == "q"
+
+def test_high_priority_clarifications_are_kept_longest():
+    analysis = {
+        "analysis_summary": "요약",
+        "clarification_needed": [
+            {"question": "낮은 우선순위 " * 20, "priority": "낮음"},
+            {"question": "높은 우선순위", "priority": "높음"},
+        ],
+    }
+    packed = json.loads(ContextPacker(60).pack_analysis(analysis))
+    assert [item["priority"] for item in packed["clarification_needed"]] == ["높음"]
+
+@pytest.mark.parametrize("budget", [1, 2, 5, 10, 20, 40, 80, 150, 300, 600])
+@pytest.mark.parametrize("size", [1, 5, 20])
+def test_packed_analysis_never_exceeds_budget(budget, size):
+    rng = random.Random(budget * 100 + size)
+    analysis = _analysis(rng, size)
+    for value in (analysis, json.dumps(analysis, ensure_ascii=False), "분석 결과를 해석할 수 없는 응답 " * size * 10):
+        assert count_tokens(ContextPacker(budget).pack_analysis(value)) <= budget
+
+def test_truncate_to_tokens_respects_limit():
+    text = "메인 화면에 챗봇 링크를 추가해주세요. " * 50
+    for limit in (0, 1, 3, 10, 100):
+        assert count_tokens(truncate_to_tokens(text, limit)) <= limit
+    assert truncate_to_tokens(text, 10_000) == text
@@ -0,0 +1,34 @@
+import pytest
+from ingest_manuals import ManualIngestor, chunk_text
+
+class _Sink:
+    name = "test"
+
+    def apply(self, docs, added, removed_ids):
+        pass
+
+def _ingestor(tmp_path):
+    return ManualIngestor(str(tmp_path / "src"), str(tmp_path / "state"), _Sink(), chunk_size=100, chunk_overlap=20)
+
+def test_identical_chunks_on_one_page_get_distinct_ids(tmp_path):
+    ingestor = _ingestor(tmp_path)
+    docs = ingestor._documents("guide/manual.pdf", [
+        (1, "hash-1", ["주의: 저장 후 새로고침", "본문", "주의: 저장 후 새로고침"]),
+        (2, "hash-2", ["주의: 저장 후 새로고침"]),
+    ])
+    assert len({doc["id"] for doc in docs}) == 4
+    assert docs[0]["title"] == "manual p.1"
+
+def test_chunk_ids_are_stable_for_unchanged_pages(tmp_path):
+    ingestor = _ingestor(tmp_path)
+    before = ingestor._documents("manual.pdf", [(1, "a", ["첫 청크", "둘째 청크"]), (2, "b", ["셋째 청크"])])
+    after = ingestor._documents("manual.pdf", [(1, "a", ["첫 청크", "둘째 청크"]), (2, "c", ["바뀐 청크", "셋째 청크"])])
+    assert [doc["id"] for doc in before[:2]] == [doc["id"] for doc in after[:2]]
+
+def test_chunk_text_respects_size_and_overlap():
+    text = " ".join(f"단어{i}" for i in range(200))
+    chunks = chunk_text(text, chunk_size=100, chunk_overlap=20)
+    assert all(len(chunk) <= 100 for chunk in chunks)
+    assert chunks[0].split()[0] == "단어0" and chunks[-1].split()[-1] == "단어199"
+    with pytest.raises(ValueError):
+        chunk_text(text, chunk_size=10, chunk_overlap=10)
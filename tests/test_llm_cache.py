@@ -0,0 +1,59 @@
+from types import SimpleNamespace
+import pytest
+from analysis_schema import is_valid_analysis
+from llm_cache import LLMCache, is_cacheable
+from model_router import ModelRouter, parse_routing
+from openai_client import OpenAIClient
+from resilience import ResilientCaller
+
+VALID = '{"analysis_summary": "요약", "clarification_needed": [], "potential_issues": [], "business_impact": ""}'
+
+class _FakeCompletions:
+    def __init__(self, replies):
+        self.replies = list(replies)
+        self.calls = 0
+
+    def create(self, **kwargs):
+        self.calls += 1
+        content, finish_reason = self.replies.pop(0)
+        choice = SimpleNamespace(message=SimpleNamespace(content=content), finish_reason=finish_reason)
+        return SimpleNamespace(choices=[choice], usage=None)
+
+def _client(tmp_path, replies):
+    client = OpenAIClient.__new__(OpenAIClient)
+    completions = _FakeCompletions(replies)
+    client.client = SimpleNamespace(chat=SimpleNamespace(completions=completions))
+    client.deployment_name = "gpt-4o"
+    client.cache = LLMCache(str(tmp_path / "llm.sqlite3"), ttl_seconds=3600, max_entries=100, max_bytes=10 ** 6)
+    client.caller = ResilientCaller(max_retries=0, base_delay=0, max_delay=0, rate=1000, burst=1000,
+                                    failure_threshold=5, recovery_timeout=30)
+    client.router = ModelRouter(parse_routing("", "gpt-4o"))
+    return client, completions
+
+def _ask(client):
+    messages = [{"role": "user", "content": "요구사항"}]
+    return client.get_response(messages, stage="basic_analysis", validate=is_valid_analysis)
+
+def test_is_cacheable():
+    assert is_cacheable(VALID, "stop", is_valid_analysis)
+    assert is_cacheable("체크리스트")
+    assert not is_cacheable("", "stop")
+    assert not is_cacheable(None)
+    assert not is_cacheable(VALID, "length", is_valid_analysis)
+    assert not is_cacheable("분석할 수 없습니다.", "stop", is_valid_analysis)
+
+def test_valid_response_is_cached(tmp_path):
+    client, completions = _client(tmp_path, [(VALID, "stop")])
+    assert _ask(client) == VALID
+    assert _ask(client) == VALID
+    assert completions.calls == 1
+
+@pytest.mark.parametrize("broken", [
+    ("분석할 수 없습니다.", "stop"),
+    ('{"analysis_summary": "요약", "clarification_needed": [{"question": "잘린', "length"),
+])
+def test_unparsable_or_truncated_response_is_not_cached(tmp_path, broken):
+    client, completions = _client(tmp_path, [broken, (VALID, "stop")])
+    assert _ask(client) == broken[0]
+    assert _ask(client) == VALID
+    assert completions.calls == 2
@@ -0,0 +1,59 @@
+import math
+import os
+import pytest
+from local_retriever import BM25Index, LocalBM25Retriever
+
+DOCS = [
+    {"id": "1", "chunk": "메인 화면 챗봇 링크 설정"},
+    {"id": "2", "chunk": "메인 화면 공지사항 배너 노출"},
+    {"id": "3", "chunk": "메인 화면 로그인 비밀번호 찾기"},
+]
+
+def _fd_count():
+    return len(os.listdir("/proc/self/fd"))
+
+requires_proc = pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="파일 핸들 수를 셀 수 없는 환경")
+
+def test_search_ranks_rare_terms(tmp_path):
+    BM25Index.build(DOCS, str(tmp_path))
+    with BM25Index(str(tmp_path)) as index:
+        results = index.search("챗봇 링크", top_k=3)
+    assert [doc["id"] for doc, _ in results] == ["1"]
+
+def test_query_of_only_common_terms_still_matches(tmp_path):
+    docs = [{"id": str(i), "chunk": f"메인 화면 항목{i} 설정"} for i in range(30)]
+    BM25Index.build(docs, str(tmp_path))
+    with BM25Index(str(tmp_path)) as index:
+        _, df = index.vocab["메인"]
+        assert math.log(1 + (index.doc_count - df + 0.5) / (df + 0.5)) < index.MIN_IDF
+        assert len(index.search("메인 화면", top_k=5)) == 5
+        # 드문 용어가 함께 있으면 흔한 용어는 순위 계산에서 빠짐
+        assert [doc["id"] for doc, _ in index.search("메인 화면 항목7", top_k=5)][0] == "7"
+
+@requires_proc
+def test_close_releases_file_handles(tmp_path):
+    BM25Index.build(DOCS, str(tmp_path))
+    before = _fd_count()
+    for _ in range(20):
+        with BM25Index(str(tmp_path)) as index:
+            index.search("챗봇", top_k=1)
+    assert _fd_count() == before
+
+    index = BM25Index(str(tmp_path))
+    index.close()
+    with pytest.raises(ValueError):
+        index.search("챗봇", top_k=1)
+
+@requires_proc
+def test_retriever_reloads_rebuilt_index_and_closes_previous(tmp_path):
+    BM25Index.build(DOCS, str(tmp_path))
+    retriever = LocalBM25Retriever.from_index_dir(str(tmp_path), top_k=3)
+    assert [doc.metadata["id"] for doc in retriever.invoke("챗봇")] == ["1"]
+    before = _fd_count()
+
+    for i in range(5):
+        BM25Index.build(DOCS + [{"id": f"new-{i}", "chunk": f"새 매뉴얼 챗봇 안내 {i}"}], str(tmp_path))
+        ids = [doc.metadata["id"] for doc in retriever.invoke("챗봇")]
+        assert f"new-{i}" in ids
+    assert _fd_count() == before
+    retriever.close()
@@ -0,0 +1,38 @@
+import pytest
+from model_router import DEFAULT_P95_THRESHOLD_MS, STAGES, parse_routing
+
+def test_single_model_uses_default_everywhere():
+    routes = parse_routing("", "gpt-4o")
+    assert set(routes) == set(STAGES)
+    for stage, route in routes.items():
+        assert route == ("gpt-4o", None, DEFAULT_P95_THRESHOLD_MS[stage])
+
+def test_fast_model_is_primary_for_fast_stages():
+    routes = parse_routing(None, "gpt-4o", "gpt-4o-mini")
+    assert routes["keywords"][:2] == ("gpt-4o-mini", "gpt-4o")
+    assert routes["checklist"][:2] == ("gpt-4o-mini", "gpt-4o")
+    assert routes["basic_analysis"][:2] == ("gpt-4o", "gpt-4o-mini")
+    assert routes["manual_analysis"][:2] == ("gpt-4o", "gpt-4o-mini")
+
+def test_fast_model_same_as_default_has_no_fallback():
+    routes = parse_routing("", "gpt-4o", "gpt-4o")
+    assert routes["keywords"] == ("gpt-4o", None, DEFAULT_P95_THRESHOLD_MS["keywords"])
+
+def test_spec_overrides_primary_fallback_and_threshold():
+    routes = parse_routing(" checklist = gpt-4o-mini > gpt-4o @ 20000 ; keywords=gpt-4o-mini ;", "gpt-4o")
+    assert routes["checklist"] == ("gpt-4o-mini", "gpt-4o", 20000.0)
+    assert routes["keywords"] == ("gpt-4o-mini", None, DEFAULT_P95_THRESHOLD_MS["keywords"])
+    assert routes["basic_analysis"] == ("gpt-4o", None, DEFAULT_P95_THRESHOLD_MS["basic_analysis"])
+
+def test_spec_with_empty_primary_or_same_fallback():
+    routes = parse_routing("basic_analysis=>gpt-4o-mini;checklist=gpt-4o>gpt-4o", "gpt-4o")
+    assert routes["basic_analysis"][:2] == ("gpt-4o", "gpt-4o-mini")
+    assert routes["checklist"][:2] == ("gpt-4o", None)
+
+def test_unknown_stage_is_rejected():
+    with pytest.raises(ValueError, match="summary"):
+        parse_routing("summary=gpt-4o-mini", "gpt-4o")
+
+def test_invalid_threshold_is_rejected():
+    with pytest.raises(ValueError):
+        parse_routing("checklist=gpt-4o-mini@fast", "gpt-4o")
@@ -0,0 +1,217 @@
+import pytest
+import resilience
+from resilience import CircuitBreaker, ResilientCaller, TokenBucket
+
+class _Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(seconds, 0.001)
+
+class _StatusError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = _Clock()
+    monkeypatch.setattr(resilience.time, "monotonic", clock)
+    monkeypatch.setattr(resilience.time, "sleep", clock.sleep)
+    return clock
+
+def _caller(**kwargs):
+    options = dict(max_retries=0, base_delay=0, max_delay=0, rate=1000, burst=1000,
+                   failure_threshold=1, recovery_timeout=30)
+    options.update(kwargs)
+    return ResilientCaller(**options)
+
+def _raise(status_code):
+    def fn():
+        raise _StatusError(status_code)
+    return fn
+
+def test_breaker_opens_after_consecutive_failures(clock):
+    breaker = CircuitBreaker(failure_threshold=2, recovery_timeout=30)
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+def test_breaker_half_open_allows_single_trial(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    clock.now += 29
+    assert not breaker.allow()
+
+    clock.now += 1
+    assert breaker.allow()
+    assert breaker.state == "half_open"
+    assert not breaker.allow()
+
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.allow()
+
+def test_breaker_half_open_failure_reopens(clock):
+    breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=30)
+    for _ in range(3):
+        breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+def test_breaker_release_returns_trial_without_changing_state(clock):
+    breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=30)
+    breaker.record_failure()
+    clock.now += 30
+    assert breaker.allow()
+    breaker.release()
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+
+@pytest.mark.parametrize("status_code", [400, 404, 429])
+def test_throttled_or_client_errors_do_not_open_breaker(clock, status_code):
+    caller = _caller()
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _raise(status_code))
+    assert caller.breaker_state("gpt-4o") == "closed"
+
+def test_server_errors_open_breaker_per_deployment(clock):
+    caller = _caller()
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _raise(503))
+    assert caller.breaker_state("gpt-4o") == "open"
+    assert caller.breaker_state("gpt-4o-mini") == "closed"
+    with pytest.raises(resilience.CircuitOpenError):
+        caller.call("gpt-4o", lambda: "ok")
+
+def test_429_in_half_open_keeps_trial_available(clock):
+    caller = _caller()
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _raise(503))
+    clock.now += 30
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _raise(429))
+    assert caller.breaker_state("gpt-4o") == "half_open"
+    assert caller.call("gpt-4o", lambda: "ok") == "ok"
+    assert caller.breaker_state("gpt-4o") == "closed"
+
+def test_retryable_error_is_retried_until_success(clock):
+    caller = _caller(max_retries=2, failure_threshold=5)
+    attempts = []
+
+    def flaky():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise _StatusError(500)
+        return "ok"
+
+    assert caller.call("gpt-4o", flaky) == "ok"
+    assert len(attempts) == 3
+    assert caller.breaker_state("gpt-4o") == "closed"
+
+def _failing(status_code, attempts):
+    def fn():
+        attempts.append(1)
+        raise _StatusError(status_code)
+    return fn
+
+def test_one_exhausted_call_does_not_open_breaker(clock):
+    caller = _caller(max_retries=4, failure_threshold=5)
+    attempts = []
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _failing(503, attempts))
+    assert len(attempts) == 5
+    assert caller.breaker_state("gpt-4o") == "closed"
+
+def test_breaker_counts_failed_calls_not_attempts(clock):
+    caller = _caller(max_retries=4, failure_threshold=3)
+    attempts = []
+    for _ in range(2):
+        with pytest.raises(_StatusError):
+            caller.call("gpt-4o", _failing(503, attempts))
+    assert caller.breaker_state("gpt-4o") == "closed"
+
+    # 성공하면 연속 실패 수가 초기화됨
+    assert caller.call("gpt-4o", lambda: "ok") == "ok"
+    for _ in range(2):
+        with pytest.raises(_StatusError):
+            caller.call("gpt-4o", _failing(503, attempts))
+    assert caller.breaker_state("gpt-4o") == "closed"
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _failing(503, attempts))
+    assert caller.breaker_state("gpt-4o") == "open"
+    assert len(attempts) == 25
+
+def test_failed_half_open_trial_reopens_without_retrying(clock):
+    caller = _caller(max_retries=4, failure_threshold=1)
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _raise(503))
+    assert caller.breaker_state("gpt-4o") == "open"
+
+    clock.now += 30
+    attempts = []
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _failing(503, attempts))
+    assert len(attempts) == 1
+    assert caller.breaker_state("gpt-4o") == "open"
+
+def test_on_success_latency_excludes_backoff_and_rate_limit_waits(clock):
+    caller = _caller(max_retries=3, base_delay=2, max_delay=2, rate=1, burst=1, failure_threshold=5)
+    latencies = []
+    attempts = []
+
+    def slow_after_throttling():
+        attempts.append(1)
+        clock.now += 0.05
+        if len(attempts) < 3:
+            raise _StatusError(429 if len(attempts) == 1 else 503)
+        return "ok"
+
+    started = clock.now
+    assert caller.call("gpt-4o", slow_after_throttling, on_success=latencies.append) == "ok"
+    assert clock.now - started > 1
+    assert latencies == [pytest.approx(50)]
+
+def test_on_success_is_not_called_for_failed_calls(clock):
+    caller = _caller(max_retries=1, failure_threshold=5)
+    latencies = []
+    with pytest.raises(_StatusError):
+        caller.call("gpt-4o", _raise(503), on_success=latencies.append)
+    assert latencies == []
+
+def test_aimd_decreases_once_per_cooldown(clock):
+    bucket = TokenBucket(rate=8, capacity=8, min_rate=1, increase_step=0.5, decrease_cooldown=10)
+    assert bucket.on_throttled()
+    assert bucket.rate == 4
+    # 같은 순간에 함께 보낸 요청들의 429는 한 번만 반영
+    assert not bucket.on_throttled()
+    clock.now += 9.9
+    assert not bucket.on_throttled()
+    assert bucket.rate == 4
+
+    clock.now += 0.1
+    assert bucket.on_throttled()
+    assert bucket.rate == 2
+    clock.now += 10
+    bucket.on_throttled()
+    clock.now += 10
+    bucket.on_throttled()
+    assert bucket.rate == 1
+
+def test_aimd_increases_up_to_max_rate(clock):
+    bucket = TokenBucket(rate=2, capacity=2, increase_step=0.5, decrease_cooldown=10)
+    bucket.on_throttled()
+    assert bucket.rate == 1
+    for _ in range(5):
+        bucket.on_success()
+    assert bucket.rate == 2
@@ -0,0 +1,37 @@
+from similarity_store import SimilarAnalysisStore
+
+def _store(tmp_path, threshold=0.9):
+    return SimilarAnalysisStore(str(tmp_path / "similar.sqlite3"), threshold=threshold, max_entries=100)
+
+def _requirements(store):
+    return sorted(row[0] for row in store._conn.execute("SELECT requirement FROM analyses"))
+
+def test_requirements_differing_in_number_or_punctuation_are_kept(tmp_path):
+    store = _store(tmp_path)
+    store.add("타임아웃을 1.5초로 설정해주세요", "기본 분석", [], "1.5초 분석")
+    store.add("타임아웃을 15초로 설정해주세요", "기본 분석", [], "15초 분석")
+    store.add("C++ 빌드 단계를 추가해주세요", "기본 분석", [], "C++ 분석")
+    store.add("C 빌드 단계를 추가해주세요", "기본 분석", [], "C 분석")
+    assert len(_requirements(store)) == 4
+
+def test_same_requirement_replaces_entry_and_survives_reload(tmp_path):
+    store = _store(tmp_path)
+    store.add("타임아웃을 1.5초로 설정해주세요", "기본 분석", ["보안"], "이전 분석")
+    store.add("  타임아웃을 1.5초로\n설정해주세요 ", "기본 분석", ["보안"], "새 분석")
+    store.add("타임아웃을 1.5초로 설정해주세요", "상세 분석", ["보안"], "상세 분석 결과")
+    assert len(_requirements(store)) == 2
+
+    reloaded = _store(tmp_path)
+    reloaded.add("타임아웃을 1.5초로 설정해주세요", "기본 분석", ["보안"], "다시 분석")
+    match = reloaded.find_similar("타임아웃을 1.5초로 설정해주세요", "기본 분석", ["보안"])
+    assert match["analysis_result"] == "다시 분석"
+    assert len(_requirements(reloaded)) == 2
+
+def test_opposite_action_is_not_offered_by_default(tmp_path):
+    store = _store(tmp_path)
+    store.add("메인 화면에 챗봇 링크를 추가해주세요", "기본 분석", [], "추가 분석")
+    assert store.find_similar("메인 화면에 챗봇 링크를 삭제해주세요", "기본 분석", []) is None
+
+    match = store.find_similar("메인화면에 챗봇 링크를 추가해 주세요.", "기본 분석", [])
+    assert match["requirement"] == "메인 화면에 챗봇 링크를 추가해주세요"
+    assert match["similarity"] >= 0.9
@@ -0,0 +1,31 @@
+import pytest
+from stream_parser import IncrementalJSONParser
+
+TEXT = '```json\n{"analysis_summary": "요약 \\"인용\\" {괄호}", "potential_issues": ["x", {"q": [1, 2]}], "count": 3}\n```'
+
+def _feed(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for i in range(0, len(text), size):
+        events += parser.feed(text[i:i + size])
+    return parser, events
+
+@pytest.mark.parametrize("size", [1, 3, len(TEXT)])
+def test_fields_and_array_items_are_emitted_when_complete(size):
+    parser, events = _feed(TEXT, size)
+    assert events == [
+        ("analysis_summary", '요약 "인용" {괄호}'),
+        ("potential_issues", "x"),
+        ("potential_issues", {"q": [1, 2]}),
+        ("count", 3)
+    ]
+    assert parser.done
+    assert parser.result == {"analysis_summary": '요약 "인용" {괄호}', "potential_issues": ["x", {"q": [1, 2]}], "count": 3}
+
+def test_incomplete_value_is_not_emitted():
+    parser = IncrementalJSONParser()
+    assert parser.feed('{"analysis_summary": "요약", "potential_issues": ["첫 번째", "두 번') == [
+        ("analysis_summary", "요약"),
+        ("potential_issues", "첫 번째")
+    ]
+    assert not parser.done
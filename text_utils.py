@@ -0,0 +1,98 @@
+import math
+import re
+from collections import Counter
+from functools import lru_cache
+
+# 요청 문장 끝에 붙는 상투적인 표현 (유사도 비교 시 제거)
+REQUEST_ENDINGS = [
+    "해주시기 바랍니다", "부탁드립니다", "요청드립니다", "요청합니다",
+    "해 주세요", "해주세요", "바랍니다", "요청"
+]
+
+def normalize_text(text):
+    # 대소문자, 공백, 문장부호, 요청 어미 차이를 없애 비교용 문자열로 만드는 함수
+    text = re.sub(r"[\W_]+$", "", text.strip().lower())
+    for ending in REQUEST_ENDINGS:
+        if text.endswith(ending):
+            text = text[:-len(ending)]
+            break
+    return re.sub(r"[\W_]+", "", text)
+
+def collapse_whitespace(text):
+    # 앞뒤 공백을 없애고 연속 공백을 하나로 줄이는 함수 (내용이 똑같은 요청인지 판단할 때 사용, 문장부호/숫자는 유지)
+    return " ".join((text or "").split())
+
+def char_ngrams(text, n=2):
+    # 정규화된 문자열의 문자 n-gram 빈도를 반환하는 함수
+    if len(text) < n:
+        return Counter([text]) if text else Counter()
+    return Counter(text[i:i + n] for i in range(len(text) - n + 1))
+
+def cosine_similarity(a, b):
+    # 두 n-gram 빈도 벡터의 코사인 유사도
+    if not a or not b:
+        return 0.0
+    if len(a) > len(b):
+        a, b = b, a
+    dot = sum(count * b[gram] for gram, count in a.items() if gram in b)
+    if not dot:
+        return 0.0
+    norm_a = math.sqrt(sum(count * count for count in a.values()))
+    norm_b = math.sqrt(sum(count * count for count in b.values()))
+    return dot / (norm_a * norm_b)
+
+def text_similarity(a, b, n=2):
+    # 두 텍스트의 문자 n-gram 코사인 유사도 (0.0 ~ 1.0)
+    return cosine_similarity(char_ngrams(normalize_text(a), n), char_ngrams(normalize_text(b), n))
+
+# 토큰 끝에서 떼어낼 조사/어미 (긴 것부터 검사)
+KOREAN_SUFFIXES = sorted([
+    "해주시기", "해주세요", "되도록", "하도록", "시키는", "에서는", "으로는", "에게서",
+    "까지", "부터", "에서", "에게", "으로", "처럼", "보다", "하고", "이나", "이랑",
+    "하는", "되는", "하면", "해서", "할", "된", "한", "과", "와", "을", "를",
+    "이", "가", "은", "는", "에", "의", "도", "로", "만"
+], key=len, reverse=True)
+
+# 검색에 도움이 되지 않는 일반 표현
+KOREAN_STOPWORDS = {
+    "해주세요", "요청", "부탁", "필요", "경우", "있도록", "없도록", "때", "시", "등", "및",
+    "수", "것", "좀", "더", "주세요", "바랍니다", "합니다", "드립니다"
+}
+
+@lru_cache(maxsize=65536)
+def strip_korean_suffix(token):
+    # 토큰 끝의 조사/어미를 하나 제거하는 함수 (어간이 2자 이상 남는 경우만, 매뉴얼 색인 시 같은 토큰이 반복되므로 결과 캐시)
+    for suffix in KOREAN_SUFFIXES:
+        if token.endswith(suffix) and len(token) - len(suffix) >= 2:
+            return token[:-len(suffix)]
+    return token
+
+def tokenize_korean(text):
+    # 한국어 텍스트를 조사/어미를 제거한 검색용 토큰 목록으로 나누는 함수
+    tokens = []
+    for raw in re.findall(r"\w+", text.lower()):
+        token = strip_korean_suffix(raw)
+        if len(token) < 2 or token in KOREAN_STOPWORDS or token.isdigit():
+            continue
+        tokens.append(token)
+    return tokens
+
+# 확인 질문/이슈 문장에 공통으로 붙는 표현 (문장 간 유사도 비교 시 제외)
+QUESTION_FILLERS = {
+    "하나요", "해야", "필요합니다", "확인", "확인이", "있음", "인가요", "어느", "어디", "누구",
+    "여부", "되나요", "할지", "하는지", "있나요", "합니까", "가능성", "가능한가요"
+}
+
+def term_vector(text):
+    # 조사를 뗀 토큰과 토큰 내부 문자 bigram으로 문장 벡터를 만드는 함수 (어순/조사가 달라도 비슷하게 나옴)
+    vector = Counter()
+    for token in tokenize_korean(text):
+        if token in QUESTION_FILLERS:
+            continue
+        vector[token] += 1
+        vector.update(char_ngrams(token))
+    return vector
+
+def term_similarity(a, b):
+    # 두 문장의 term_vector 코사인 유사도 (0.0 ~ 1.0)
+    return cosine_similarity(term_vector(a), term_vector(b))
@@ -0,0 +1,185 @@
+import contextvars
+import json
+import os
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from config import Config
+
+SERVICE_NAME = "requirement-analyzer"
+
+# 현재 실행 중인 span (스레드 풀 작업에는 bind_context로 전달)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class Trace:
+    """한 번의 실행(분석, 체크리스트 생성 등)에서 기록된 span 모음"""
+    def __init__(self, name):
+        self.name = name
+        self.trace_id = secrets.token_hex(16)
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self.spans.append(span)
+
+    def finished_spans(self):
+        # 종료된 span을 시작 시간 순으로 반환
+        with self._lock:
+            return sorted(self.spans, key=lambda span: span.start_ns)
+
+class Span:
+    """OpenTelemetry 규약을 따르는 실행 구간 기록 (이름, 부모, 시작/종료 시간, 속성, 상태)"""
+    def __init__(self, name, trace, parent=None, attributes=None):
+        self.name = name
+        self.trace = trace
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent.span_id if parent else None
+        self.depth = parent.depth + 1 if parent else 0
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+        self.attributes = {}
+        self.status = "UNSET"
+        self.status_message = None
+        self.set_attributes(attributes or {})
+
+    def set_attribute(self, key, value):
+        if value is not None:
+            self.attributes[key] = value
+
+    def set_attributes(self, attributes):
+        for key, value in attributes.items():
+            self.set_attribute(key, value)
+
+    def record_exception(self, error):
+        # 예외를 span 상태와 exception.* 속성으로 기록하는 함수
+        self.status = "ERROR"
+        self.status_message = str(error)
+        self.attributes["exception.type"] = type(error).__name__
+        self.attributes["exception.message"] = str(error)
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if self.status == "UNSET":
+                self.status = "OK"
+
+    @property
+    def duration_ms(self):
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return (end_ns - self.start_ns) / 1e6
+
+    def to_dict(self):
+        # OpenTelemetry span JSON 형식으로 변환하는 함수
+        return {
+            "name": self.name,
+            "context": {"trace_id": self.trace.trace_id, "span_id": self.span_id},
+            "parent_id": self.parent_id,
+            "start_time": _isoformat(self.start_ns),
+            "end_time": _isoformat(self.end_ns) if self.end_ns else None,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": {"status_code": self.status, "description": self.status_message},
+            "attributes": self.attributes,
+            "resource": {"service.name": SERVICE_NAME}
+        }
+
+class _NoopSpan:
+    """추적이 꺼져 있을 때 사용하는 빈 span"""
+    trace = None
+    duration_ms = 0.0
+
+    def set_attribute(self, key, value):
+        pass
+
+    def set_attributes(self, attributes):
+        pass
+
+    def record_exception(self, error):
+        pass
+
+_NOOP_SPAN = _NoopSpan()
+
+def _isoformat(timestamp_ns):
+    return datetime.fromtimestamp(timestamp_ns / 1e9, tz=timezone.utc).isoformat()
+
+class JsonlSpanExporter:
+    """종료된 span을 한 줄에 하나씩 JSON으로 기록하는 exporter"""
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def export(self, span):
+        line = json.dumps(span.to_dict(), ensure_ascii=False, default=str)
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+_exporter = None
+_exporter_lock = threading.Lock()
+
+def _get_exporter():
+    global _exporter
+    if not Config.TRACE_EXPORT_PATH:
+        return None
+    with _exporter_lock:
+        if _exporter is None:
+            _exporter = JsonlSpanExporter(Config.TRACE_EXPORT_PATH)
+        return _exporter
+
+@contextmanager
+def span(name, attributes=None):
+    # 실행 구간을 span으로 기록하는 컨텍스트 매니저 (상위 span이 없으면 새 trace 시작)
+    if not Config.TRACING_ENABLED:
+        yield _NOOP_SPAN
+        return
+
+    parent = _current_span.get()
+    trace = parent.trace if parent else Trace(name)
+    current = Span(name, trace, parent, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except Exception as e:
+        current.record_exception(e)
+        raise
+    finally:
+        current.end()
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # 스트리밍 제너레이터가 다른 컨텍스트에서 정리되는 경우
+            pass
+        trace.add(current)
+        exporter = _get_exporter()
+        if exporter is not None:
+            try:
+                exporter.export(current)
+            except OSError:
+                pass
+
+def current_span():
+    # 현재 span (없거나 추적이 꺼져 있으면 빈 span)
+    return _current_span.get() or _NOOP_SPAN
+
+def bind_context(fn):
+    # 현재 span 컨텍스트를 유지한 채 다른 스레드에서 fn을 실행하도록 감싸는 함수
+    # (복사한 컨텍스트는 동시에 한 스레드만 들어갈 수 있으므로 작업마다 새로 감쌈)
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.run(fn, *args, **kwargs)
+    return run
+
+def llm_attributes(model, temperature=None):
+    # LLM 호출 span의 gen_ai.* 기본 속성
+    return {
+        "gen_ai.operation.name": "chat",
+        "gen_ai.system": "az.ai.openai" if Config.OPENAI_API_TYPE == "azure" else "openai",
+        "gen_ai.request.model": model,
+        "gen_ai.request.temperature": temperature
+    }
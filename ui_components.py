@@ -1,4 +1,5 @@
 import streamlit as st
+from datetime import datetime
 from config import Config
 
 class UIComponents:
@@ -34,7 +35,7 @@ class UIComponents:
             st.header("⚡ 분석 옵션")
             analysis_type = st.selectbox(
                 "분석 유형:",
-                ["기본 분석", "상세 분석"],
+                Config.ANALYSIS_TYPES,
                 help="상세 분석은 더 많은 확인사항을 도출합니다."
             )
             
@@ -77,6 +78,87 @@ class UIComponents:
         
         return False
     
+    def render_similar_match(self, match, requirement_input):
+        # 유사한 이전 분석을 안내하고 재사용 여부를 선택받는 함수 ("reuse"/"new"/None 반환)
+        st.info(
+            f"비슷한 요구사항의 이전 분석 결과가 있습니다. (유사도 {match['similarity']:.0%})\n\n"
+            f"**현재 요구사항:** {requirement_input}\n\n"
+            f"**이전 요구사항:** {match['requirement']}\n\n"
+            "숫자, 대상, 동작(추가/삭제 등)이 다르면 새로 분석하세요."
+        )
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.button("♻️ 이전 분석 결과 사용", use_container_width=True, key="reuse_similar_btn"):
+                return "reuse"
+        with col2:
+            if st.button("🔍 새로 분석하기", use_container_width=True, key="analyze_new_btn"):
+                return "new"
+        
+        return None
+    
+    def render_history_selector(self, entries, current_id):
+        # 이번 세션의 이전 분석 중 표시할 분석을 선택받는 함수 (선택한 항목 ID 반환, 선택 안 함은 None)
+        if not entries:
+            return current_id
+        
+        labels = {None: "선택 안 함"}
+        for entry in entries:
+            preview = entry.requirement_text.replace("\n", " ")
+            if len(preview) > 40:
+                preview = preview[:40] + "..."
+            created_at = datetime.fromtimestamp(entry.created_at).strftime("%H:%M")
+            labels[entry.entry_id] = f"[{created_at}] {preview} ({entry.analysis_type})"
+        
+        options = list(labels)
+        return st.selectbox(
+            f"🕘 분석 히스토리 ({len(entries)}건)",
+            options,
+            index=options.index(current_id) if current_id in labels else 0,
+            format_func=labels.get,
+            help="이번 세션에서 분석한 결과를 다시 분석하지 않고 바로 불러옵니다."
+        )
+    
+    def render_trace_panel(self, traces):
+        # 실행 단계별 소요 시간(waterfall)과 토큰/캐시 정보를 보여주는 디버그 패널
+        if not traces:
+            return
+        
+        with st.expander("🛠️ 디버그: 단계별 실행 시간"):
+            for title, trace in traces.items():
+                spans = trace.finished_spans()
+                if not spans:
+                    continue
+                
+                start_ns = min(span.start_ns for span in spans)
+                total_ms = max((span.end_ns - start_ns) / 1e6 for span in spans) or 1.0
+                st.markdown(f"**{title}** · 총 {total_ms:,.0f}ms · trace `{trace.trace_id[:8]}`")
+                
+                rows = []
+                for span in spans:
+                    offset = (span.start_ns - start_ns) / 1e6 / total_ms * 100
+                    width = max(span.duration_ms / total_ms * 100, 0.5)
+                    color = "#e74c3c" if span.status == "ERROR" else "#4a90d9"
+                    details = []
+                    if span.attributes.get("cache.hit"):
+                        details.append("cache hit")
+                    if "gen_ai.usage.input_tokens" in span.attributes:
+                        details.append(
+                            f"in {span.attributes['gen_ai.usage.input_tokens']} / "
+                            f"out {span.attributes.get('gen_ai.usage.output_tokens', 0)} tokens"
+                        )
+                    if span.status == "ERROR":
+                        details.append(span.attributes.get("exception.type", "error"))
+                    rows.append(
+                        f'<div style="display:flex;align-items:center;font-size:0.8rem;margin:2px 0;">'
+                        f'<div style="width:30%;padding-left:{span.depth * 12}px;white-space:nowrap;overflow:hidden;">{span.name}</div>'
+                        f'<div style="width:45%;position:relative;height:12px;background:#f0f2f6;">'
+                        f'<div style="position:absolute;left:{offset:.2f}%;width:{width:.2f}%;height:100%;background:{color};"></div></div>'
+                        f'<div style="width:25%;padding-left:8px;white-space:nowrap;">{span.duration_ms:,.0f}ms {" · ".join(details)}</div>'
+                        f'</div>'
+                    )
+                st.markdown("".join(rows), unsafe_allow_html=True)
+    
     def render_examples(self):
         # 사용 예시를 렌더링하는 함수
         with st.expander("💡 사용 예시 보기"):
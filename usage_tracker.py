@@ -0,0 +1,113 @@
+import contextvars
+import threading
+from contextlib import contextmanager
+from config import Config
+
+# 현재 실행에 토큰 사용량을 기록할 meter 목록 (분석, 세션, 배치 등 여러 단위를 동시에 집계)
+_active_meters = contextvars.ContextVar("active_usage_meters", default=())
+
+class BudgetExceededError(Exception):
+    """토큰 예산을 모두 사용해 새 작업을 거부할 때 발생하는 예외"""
+
+class UsageMeter:
+    """LLM 호출 토큰 사용량 집계와 예산 상태
+
+    budget이 0이면 제한이 없습니다. 사용량이 budget * TOKEN_BUDGET_DOWNGRADE_RATIO 이상이면
+    "downgrade"(비용이 적은 경로 사용), budget 이상이면 "exceeded"(새 작업 거부) 상태가 됩니다.
+    """
+    FIELDS = ("calls", "cache_hits", "estimated_calls", "prompt_tokens", "completion_tokens", "cached_tokens")
+
+    def __init__(self, name, budget=0):
+        self.name = name
+        self.budget = budget
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, prompt_tokens=0, completion_tokens=0, cached_tokens=0, estimated=False):
+        with self._lock:
+            self._counts["calls"] += 1
+            self._counts["estimated_calls"] += int(estimated)
+            self._counts["prompt_tokens"] += prompt_tokens or 0
+            self._counts["completion_tokens"] += completion_tokens or 0
+            self._counts["cached_tokens"] += cached_tokens or 0
+
+    def add_cache_hit(self):
+        with self._lock:
+            self._counts["cache_hits"] += 1
+
+    @property
+    def total_tokens(self):
+        with self._lock:
+            return self._counts["prompt_tokens"] + self._counts["completion_tokens"]
+
+    def state(self):
+        # 예산 상태 ("normal", "downgrade", "exceeded")
+        if not self.budget:
+            return "normal"
+        total = self.total_tokens
+        if total >= self.budget:
+            return "exceeded"
+        if total >= self.budget * Config.TOKEN_BUDGET_DOWNGRADE_RATIO:
+            return "downgrade"
+        return "normal"
+
+    def to_dict(self):
+        with self._lock:
+            usage = dict(self._counts)
+        usage["total_tokens"] = usage["prompt_tokens"] + usage["completion_tokens"]
+        usage["budget"] = self.budget
+        return usage
+
+_STATE_ORDER = {"normal": 0, "downgrade": 1, "exceeded": 2}
+
+@contextmanager
+def usage_scope(*meters):
+    # 블록 안의 LLM 호출 사용량을 meters에도 기록하는 컨텍스트 매니저 (상위 범위의 meter는 유지)
+    token = _active_meters.set(_active_meters.get() + tuple(meter for meter in meters if meter is not None))
+    try:
+        yield
+    finally:
+        try:
+            _active_meters.reset(token)
+        except ValueError:
+            # 스트리밍 제너레이터가 다른 컨텍스트에서 정리되는 경우
+            pass
+
+def record_usage(prompt_tokens=0, completion_tokens=0, cached_tokens=0, estimated=False):
+    # LLM 호출 1회의 사용량을 현재 범위의 모든 meter에 기록하는 함수
+    for meter in _active_meters.get():
+        meter.add(prompt_tokens, completion_tokens, cached_tokens, estimated)
+
+def record_cache_hit():
+    # 응답 캐시 적중(토큰 사용 없음)을 기록하는 함수
+    for meter in _active_meters.get():
+        meter.add_cache_hit()
+
+def budget_state():
+    # 현재 범위의 meter 중 가장 나쁜 예산 상태
+    states = [meter.state() for meter in _active_meters.get()]
+    return max(states, key=_STATE_ORDER.get, default="normal")
+
+def check_budget(operation):
+    # 예산을 모두 사용한 meter가 있으면 새 작업을 거부하는 함수 (operation 예: "요구사항을 분석")
+    for meter in _active_meters.get():
+        if meter.state() == "exceeded":
+            raise BudgetExceededError(
+                f"{meter.name} 토큰 예산({meter.budget:,} 토큰)을 모두 사용해 더 이상 {operation}할 수 없습니다. "
+                f"(사용량 {meter.total_tokens:,} 토큰)"
+            )
+
+def usage_from_response(usage):
+    """OpenAI 응답의 usage 객체에서 (입력, 출력, 캐시된 입력) 토큰 수 추출"""
+    if usage is None:
+        return None
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) if details is not None else 0
+    return usage.prompt_tokens, usage.completion_tokens, cached or 0
+
+def usage_from_metadata(usage_metadata):
+    """LangChain AIMessage.usage_metadata에서 (입력, 출력, 캐시된 입력) 토큰 수 추출"""
+    if not usage_metadata:
+        return None
+    details = usage_metadata.get("input_token_details") or {}
+    return usage_metadata.get("input_tokens", 0), usage_metadata.get("output_tokens", 0), details.get("cache_read", 0) or 0
@@ -0,0 +1,73 @@
+import threading
+from config import Config
+from client_pool import get_openai_client
+from context_packer import load_token_encoding
+from tracing import span
+
+class WarmUp:
+    """앱 시작 직후 백그라운드에서 클라이언트를 미리 만들고 연결을 여는 작업 (프로세스당 1회)
+
+    첫 화면은 무거운 패키지(openai, LangChain)를 import 하지 않고 바로 렌더링하고,
+    그동안 백그라운드 스레드가 클라이언트 생성, 매뉴얼 검색 경로 준비, keep-alive 연결 열기를 끝내 둡니다.
+    각 단계의 실패는 기록만 하고, 실제 요청은 원래 경로에서 클라이언트를 가져와 처리합니다.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._done = threading.Event()
+        self.trace = None
+        self.errors = {}
+
+    def start(self):
+        # 워밍업 스레드를 시작하는 함수 (이미 시작했으면 아무것도 하지 않음)
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(target=self._run, name="warmup", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        try:
+            with span("warmup") as warmup_span:
+                self.trace = getattr(warmup_span, "trace", None)
+                self._step("token_encoding", load_token_encoding)
+                openai_client = self._step("clients", get_openai_client)
+                if openai_client is not None:
+                    self._step("manual_search", openai_client.pdf_client.warm_up)
+                    self._step("openai_connection", openai_client.warm_up)
+                warmup_span.set_attribute("warmup.errors", len(self.errors))
+        finally:
+            self._done.set()
+
+    def _step(self, name, fn):
+        """워밍업 단계 하나를 span으로 실행 (예외는 기록 후 None 반환)"""
+        with span(f"warmup.{name}") as step_span:
+            try:
+                return fn()
+            except Exception as e:
+                step_span.record_exception(e)
+                self.errors[name] = str(e)
+                return None
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        # 워밍업이 끝날 때까지 기다리는 함수 (시작하지 않았으면 바로 반환)
+        if self._thread is None:
+            return True
+        return self._done.wait(timeout)
+
+_warmup = WarmUp()
+
+def get_warmup():
+    # 프로세스 공유 워밍업 작업 반환
+    return _warmup
+
+def start_warmup():
+    # WARMUP_ENABLED 설정이면 워밍업을 시작하는 함수 (프로세스당 한 번만 실행)
+    if not Config.WARMUP_ENABLED:
+        return False
+    return _warmup.start()